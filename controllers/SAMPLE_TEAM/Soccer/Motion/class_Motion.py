@@ -7,8 +7,11 @@ This module contains walking engine
 
 import sys, os
 import math, time, json
-import starkit
 import logging
+try:
+    import starkit          # compiled IK solver
+except ImportError:
+    starkit = None
 
 #from ball_Approach_Steps_Seq import *
 from .compute_Alpha_v3 import Alpha
@@ -82,6 +85,11 @@ class Motion1:
         self.limAlpha1[3][1]=0
         #  end of  paramenetrs Not recommended for change
         self.al = Alpha()
+        # pure python solver is used when compiled module starkit is not installed
+        if starkit is not None:
+            self.alpha_calculation = starkit.alpha_calculation
+        else:
+            self.alpha_calculation = self.al.compute_Alpha_v3
         self.exitFlag = 0
         self.falling_Flag = 0
         self.neck_pan = 0
@@ -154,8 +162,8 @@ class Motion1:
         anglesL=[]
         #anglesR = self.al.compute_Alpha_v3(self.xtr,self.ytr,self.ztr,self.xr,self.yr,self.zr,self.wr, sizes, limAlpha)
         #anglesL = self.al.compute_Alpha_v3(self.xtl,-self.ytl,self.ztl,self.xl,-self.yl,self.zl,self.wl, sizes, limAlpha)
-        anglesR = starkit.alpha_calculation(self.xtr,self.ytr,self.ztr,self.xr,self.yr,self.zr,self.wr, sizes, limAlpha)
-        anglesL = starkit.alpha_calculation(self.xtl,-self.ytl,self.ztl,self.xl,-self.yl,self.zl,self.wl, sizes, limAlpha)
+        anglesR = self.alpha_calculation(self.xtr,self.ytr,self.ztr,self.xr,self.yr,self.zr,self.wr, sizes, limAlpha)
+        anglesL = self.alpha_calculation(self.xtl,-self.ytl,self.ztl,self.xl,-self.yl,self.zl,self.wl, sizes, limAlpha)
         if len(anglesR)>1:
             for i in range(len(anglesR)):
                 if len(anglesR)==1: break
@@ -10,6 +10,7 @@ import random
 from .class_Motion import *
 from .class_Motion_real import Motion_real
 from .compute_Alpha_v3 import Alpha
+from .motion_slot_repository import MotionSlotRepository
 
 class Motion_sim(Motion_real):
     def __init__(self, glob, robot, gcreceiver, pause, logger):
@@ -59,6 +60,10 @@ class Motion_sim(Motion_real):
                              "left_elbow_pitch", "left_shoulder_twirl", "left_shoulder_roll",
                              "left_shoulder_pitch", "head_yaw", "head_pitch"]
         self.trims = [ 0,0,0,0, 0, 0, 0, 0, -0.12, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0.12, 0, 0, 0]
+        self.motion_slots = MotionSlotRepository(self.glob.current_work_directory / "Soccer" / "Motion" / "motion_slots",
+                                                 len(self.ACTIVEJOINTS) - 2, self.trims, self.FRAMELENGTH,
+                                                 self.simThreadCycleInMs, self.glob.params['MOTION_SLOTS_HOT_RELOAD'],
+                                                 self.logger)
 
     def game_time(self):
         return self.robot.current_time/1000
@@ -82,11 +87,7 @@ class Motion_sim(Motion_real):
             self.wait_for_step(time)
 
     def wait_for_step(self, step):
-        while True:
-            time1 = self.game_time_ms()
-            if time1 >= (self.former_step_time + step):
-                self.former_step_time = time1
-                break
+        self.former_step_time = self.robot.clock.wait_until(self.former_step_time + step)
 
     def imu_activation(self):
         self.logger.info("imu_activation")
@@ -95,6 +96,7 @@ class Motion_sim(Motion_real):
             if body_euler: 
                 body_euler = body_euler['position']
                 break
+            self.robot.clock.wait_for(1)
         self.body_euler_angle['roll'] = body_euler[0]
         self.body_euler_angle['pitch'] = body_euler[1]
         self.body_euler_angle['yaw'] = body_euler[2]
@@ -180,27 +182,12 @@ class Motion_sim(Motion_real):
         self.logger.info('simulate motion slot:'+ str(name))
         self.chain_step_number = 0
         self.initial_time_for_chain = self.robot.current_time
-        with open(self.glob.current_work_directory /"Soccer" / "Motion" / "motion_slots" / (name + ".json"), "r") as f:
-            slots = json.loads(f.read())
-        mot_list = slots[name]
-        i=0
-        for i in range(len(mot_list)):
+        slot = self.motion_slots.get(name)
+        rows = slot.rows(self.activePose)
+        for i in range(len(slot.poses)):
             if  self.falling_Flag ==3: return
-            activePoseOld = []
-            for ind in range(len(self.activePose)): activePoseOld.append(self.activePose[ind])
-            self.activePose =[]
-            for j in range(len(self.ACTIVEJOINTS) - 2):
-                    self.activePose.append(0.017*mot_list[i][j+1]*0.03375)
-            pulseNum = int(mot_list[i][0]*self.FRAMELENGTH * 1000 / self.simThreadCycleInMs)
-            for k in range (pulseNum):
-                servo_data = {}
-                angles = []
-                for j in range(len(self.ACTIVEJOINTS) - 2):
-                    tempActivePose = activePoseOld[j]+(self.activePose[j]-activePoseOld[j])*k/pulseNum
-                    key = self.WBservosList[j]
-                    value = tempActivePose + self.trims[j]
-                    angles.append(value)
-                    servo_data.update({key:value})
+            self.activePose = list(slot.poses[i])
+            for angles in rows[slot.bounds[i]: slot.bounds[i + 1]]:
                 self.send_angles_to_servos(angles, use_step_correction = True)
                 #self.sim_Trigger(self.timestep)
         return
@@ -212,13 +199,19 @@ class Motion_sim(Motion_real):
             return ball_position["position"]
         else: return False
 
+    def sim_Get_Ball_Track(self):
+        ball_track = self.robot.get_ball_track()
+        self.logger.debug('ball_track'+ str(ball_track))
+        return [ball_position["position"] for ball_position in ball_track]
+
     def sim_Get_Obstacles(self):
-        obstacle1 = self.robot.get_mates()
+        objects = self.robot.get_all_objects()
+        obstacle1 = objects['mates']
         try:
             obstacle1 = list(obstacle1['position'])
         except Exception:
             obstacle1 = []
-        opponets = self.robot.get_opponents()
+        opponets = objects['opponents']
         try:
             obstacle2 = list(opponets[0]['position'])
         except Exception:
@@ -258,10 +251,7 @@ class Motion_sim(Motion_real):
             self.activePose.append(position)
 
     def sim_Progress(self, simTime):  # simTime in seconds
-        timer1 = self.game_time_ms()
-        while True:
-            time.sleep(0.002)
-            if simTime * 1000 + timer1 < self.game_time_ms(): break
+        self.robot.clock.wait_for(simTime * 1000)
 
 if __name__=="__main__":
     print('This is not main module!')
@@ -148,12 +148,11 @@ class Motion_real(Motion1):
     def detect_Ball_Speed(self, with_Localization = False):
         position = []
         if with_Localization : self.local.read_Localization_marks()
-        for number in range (2):
-            #self.pause_in_ms(100)
-            Ballposition = self.sim_Get_Ball_Position()
-            if Ballposition:
-                course, distance = Ballposition
-                position.append([course,distance])
+        # two latest recognition samples are taken from history instead of
+        # waiting for the second one
+        for Ballposition in self.sim_Get_Ball_Track():
+            course, distance = Ballposition
+            position.append([course,distance])
         n = len(position)
         speed = [0,0]
         if n > 1:
@@ -381,20 +380,15 @@ class Motion_real(Motion1):
         self.head_Return(old_neck_pan, old_neck_tilt)
 
     def far_distance_plan_approach(self, ball_coord, target_yaw, stop_Over = False):
-        dest = []
-        centers = []
-        price = 1000
+        targets = []
+        penalties = []
         for i in range(5):
                 for j in range(2):
                     target_x = ball_coord[0] - (0.21 + j * 0.05) * math.cos(target_yaw - 0.8 + i * 0.4)
                     target_y = ball_coord[1] - (0.21 + j * 0.05) * math.sin(target_yaw - 0.8 + i * 0.4)
-                    target_coord = [target_x, target_y, target_yaw]
-                    dest1, centers1, number_Of_Cycles = self.p.path_calc_optimum(self.glob.pf_coord, target_coord)
-                    if i != 2: number_Of_Cycles += 50
-                    if number_Of_Cycles <= price:
-                        dest = dest1
-                        centers = centers1
-                        price = number_Of_Cycles
+                    targets.append([target_x, target_y, target_yaw])
+                    penalties.append(0 if i == 2 else 50)       # side approaches are more expensive
+        dest, centers, price, index = self.p.plan_many(self.glob.pf_coord, targets, penalties)
         #target_x = ball_coord[0] - 0.26 * math.cos(target_yaw)
         #target_y = ball_coord[1] - 0.26 * math.sin(target_yaw)
         #target_coord = [target_x, target_y, target_yaw]
@@ -414,7 +408,7 @@ class Motion_real(Motion1):
         x1, y1, x2, y2, cx, cy, R, CW = centers[0]
         delta_yaw = self.p.delta_yaw(start_yaw, dest_yaw, CW)
         #self.logger.debug('delta_yaw:' + str(delta_yaw) + ' CW:' + str(CW))
-        number_Of_Cycles = math.ceil(abs(delta_yaw / 0.2))
+        number_Of_Cycles = max(math.ceil(abs(delta_yaw / 0.2)), 1)
         while True:
             delta_yaw_step = delta_yaw / number_Of_Cycles
             #self.logger.debug('R =' + str(R) + ' delta_yaw_step =' + str(delta_yaw_step) )
@@ -460,7 +454,7 @@ class Motion_real(Motion1):
                 dest_yaw = self.p.coord2yaw(dest[2*i+3][0] - dest[2*i+2][0], dest[2*i+3][1] - dest[2*i+2][1])
                 x1, y1, x2, y2, cx, cy, R, CW = centers[i+1]
                 delta_yaw = self.p.delta_yaw(start_yaw, dest_yaw, CW)
-                number_Of_Cycles = math.ceil(abs(delta_yaw / 0.2))
+                number_Of_Cycles = max(math.ceil(abs(delta_yaw / 0.2)), 1)
                 while True:
                     delta_yaw_step = delta_yaw / number_Of_Cycles
                     stepLength = R * abs(delta_yaw_step) * 1000 * 64 / self.cycle_step_yield * 1.1
@@ -506,7 +500,7 @@ class Motion_real(Motion1):
                 dest_yaw = target_yaw
                 x1, y1, x2, y2, cx, cy, R, CW = centers[len(centers)-1]
                 delta_yaw = self.p.delta_yaw(start_yaw, dest_yaw, CW)
-                number_Of_Cycles = math.ceil(abs(delta_yaw / 0.2))
+                number_Of_Cycles = max(math.ceil(abs(delta_yaw / 0.2)), 1)
                 while True:
                     delta_yaw_step = delta_yaw / number_Of_Cycles
                     stepLength = R * abs(delta_yaw_step) * 1000 * 64 / self.cycle_step_yield * 1.1
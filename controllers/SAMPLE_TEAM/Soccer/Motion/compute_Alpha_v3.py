@@ -51,21 +51,7 @@ class Alpha():
         #t1_start =time.perf_counter_ns()
         a5, b5, c5, a6, a7, a8, a9, a10, b10, c10 = sizes
         limAlpha5, limAlpha6, limAlpha7, limAlpha8, limAlpha9, limAlpha10 = limAlpha
-        alpha5 = w
-        cos5 = math.cos(alpha5)
-        sin5 = math.sin(alpha5)
-        nor = math.sqrt(x*x+y*y+z*z)
-        x = x/nor
-        y = y/nor
-        z = z/nor
-        xtp = xt * cos5 + (yt + a5) * sin5
-        ytp = (yt + a5) * cos5 - xt * sin5
-        ztp = zt
-        xp =  x * cos5 + y * sin5
-        yp = y * cos5 - x * sin5
-        zp = z
-        var = [-1,1]
-        angles = []
+        alpha5, xtp, ytp, ztp, xp, yp, zp = self.foot_in_hip_frame(xt,yt,zt,x,y,z,w, a5)
         lim1a= limAlpha6[0]*0.00058909
         lim2a = limAlpha6[1]*0.00058909
         ind = 1
@@ -121,10 +107,103 @@ class Alpha():
                 ind = ind + 1
                 if ind> (limAlpha6[1]- limAlpha6[0]): break
             alpha6m.append(alpha6)
-        alpha10m =[]
-        kk=0
         #t1_stop =time.perf_counter_ns()
         #print('time t1 elapsed= ',(t1_stop-t1_start))
+        return self.angles_from_alpha6(alpha6m, alpha5, xtp, ytp, ztp, xp, yp, zp, sizes, limAlpha)
+
+    def compute_Alpha_v3_numpy(self, xt,yt,zt,x,y,z,w, sizes, limAlpha):
+        """
+        Same as compute_Alpha_v3, but 11 candidate values of alpha6 of
+        every bisection iteration are evaluated as numpy array.
+        Arguments and result are the same as of compute_Alpha_v3.
+        """
+        import numpy as np
+        a5, b5, c5, a6, a7, a8, a9, a10, b10, c10 = sizes
+        limAlpha6 = limAlpha[1]
+        alpha5, xtp, ytp, ztp, xp, yp, zp = self.foot_in_hip_frame(xt,yt,zt,x,y,z,w, a5)
+        grid = np.arange(11)
+
+        def test_alpha6(alpha6):
+            cos = np.cos(alpha6)
+            sin = np.sin(alpha6)
+            ycz = yp*cos+zp*sin
+            zcy = zp*cos-yp*sin
+            return ((ytp+b5)*cos+ztp*sin -c10)*(ycz*ycz - zcy*zcy -xp*xp)-a10-b10*ycz/np.sqrt(zcy*zcy+xp*xp)
+
+        lim1a= limAlpha6[0]*0.00058909
+        lim2a = limAlpha6[1]*0.00058909
+        ind = 1
+        step1 = (lim2a-lim1a)/10
+        testalpha6 = test_alpha6(lim1a + grid*step1)
+        points = np.nonzero(((testalpha6[:-1] > 0) & (testalpha6[1:] < 0)) |
+                            ((testalpha6[:-1] < 0) & (testalpha6[1:] > 0)))[0].tolist()
+        if len(points)==0:
+            abs_test = np.abs(testalpha6)
+            k = int(np.argmin(abs_test))
+            if k==10: points.append(9)
+            else:
+                if abs_test[k-1] < abs_test[k+1]: points.append(k-1)
+                else: points.append(k)
+        alpha6m = []
+        for point in points:
+            lim1=lim1a+point*step1
+            lim2=lim1+step1
+            while (True):
+                step = (lim2-lim1)/10
+                abs_test = np.abs(test_alpha6(lim1 + grid*step))
+                k = int(np.argmin(abs_test))
+                if k==0: k2=1
+                elif k==10: k2 = 9
+                else:
+                    if abs_test[k-1] < abs_test[k+1]: k2=k-1
+                    else: k2=k+1
+                alpha6 = lim1+k*step
+                if k>k2:
+                    lim1 = lim1+k2*step
+                    lim2 = lim1+ step
+                else:
+                    lim1 = lim1+k*step
+                    lim2 = lim1+ step
+                if (lim2-lim1 < 0.00025): break
+                ind = ind + 1
+                if ind> (limAlpha6[1]- limAlpha6[0]): break
+            alpha6m.append(alpha6)
+        return self.angles_from_alpha6(alpha6m, alpha5, xtp, ytp, ztp, xp, yp, zp, sizes, limAlpha)
+
+    @staticmethod
+    def foot_in_hip_frame(xt,yt,zt,x,y,z,w, a5):
+        """
+        Target point and orientation vector of foot rotated by alpha5 = w
+        into coordinate system of servo 6.
+        Returns tuple: (alpha5, xtp, ytp, ztp, xp, yp, zp)
+        """
+        alpha5 = w
+        cos5 = math.cos(alpha5)
+        sin5 = math.sin(alpha5)
+        nor = math.sqrt(x*x+y*y+z*z)
+        x = x/nor
+        y = y/nor
+        z = z/nor
+        xtp = xt * cos5 + (yt + a5) * sin5
+        ytp = (yt + a5) * cos5 - xt * sin5
+        ztp = zt
+        xp =  x * cos5 + y * sin5
+        yp = y * cos5 - x * sin5
+        zp = z
+        return alpha5, xtp, ytp, ztp, xp, yp, zp
+
+    @staticmethod
+    def angles_from_alpha6(alpha6m, alpha5, xtp, ytp, ztp, xp, yp, zp, sizes, limAlpha):
+        """
+        Calculates angles of servos 10, 9, 8, 7 for every found value of alpha6
+        and filters solutions by limits of servos.
+        Returns list of solutions (alpha10, alpha9, alpha8, alpha7, alpha6, alpha5)
+        """
+        a5, b5, c5, a6, a7, a8, a9, a10, b10, c10 = sizes
+        limAlpha5, limAlpha6, limAlpha7, limAlpha8, limAlpha9, limAlpha10 = limAlpha
+        angles = []
+        alpha10m =[]
+        kk=0
         for i in range (len(alpha6m)):
             tan6 = math.tan(alpha6m[i-kk])
             alpha10 = math.atan((-yp-zp*tan6)/math.sqrt((zp-yp*tan6)**2+xp*xp*(1+tan6*tan6)))
@@ -215,10 +294,8 @@ if __name__ == "__main__":
     limAlpha10 =[-2815,   600]
     limAlpha = [limAlpha5, limAlpha6, limAlpha7, limAlpha8, limAlpha9, limAlpha10]
 
-    clock1 = time.clock()
-    clock1.tick()
-    compute_Alpha_v3(0,-54.3,-200,0,0,-1,0, sizes, limAlpha)
-    print('time elapsed in compute_Alpha:', clock1.avg())
-
-
-
+    al = Alpha()
+    for solver in (al.compute_Alpha_v3, al.compute_Alpha_v3_numpy):
+        start = time.perf_counter()
+        angles = solver(0,-54.3,-200,0,0,-1,0, sizes, limAlpha)
+        print(solver.__name__, angles, 'time elapsed in us:', (time.perf_counter() - start) * 1e6)
@@ -0,0 +1,114 @@
+"""
+The module is designed by team Robokit of Phystech Lyceum and team Starkit
+of MIPT under mentorship of A. Babaev.
+
+Benchmark of inverted kinematics solvers of legs: compiled starkit.alpha_calculation,
+pure python Alpha.compute_Alpha_v3 and Alpha.compute_Alpha_v3_numpy.
+Foot targets are recorded from walking engine Motion1 over set of walk cycles
+with different step length, side length and rotation. Solutions of every solver
+are compared with pure python solver and latency per call is measured.
+usage from directory controllers/SAMPLE_TEAM:
+    python -m Soccer.Motion.ik_benchmark
+"""
+
+import math, time
+from pathlib import Path
+
+from .class_Motion import Motion1, starkit
+from .compute_Alpha_v3 import Alpha
+from ..Localisation.class_Glob import Glob
+
+
+class _Local:
+    coord_shift = [0, 0, 0]
+    robot_moved = False
+    quality = 1
+
+
+class TrajectoryRecorder(Motion1):
+    """
+    Walking engine without servos. Every foot target passed to IK solver
+    is recorded as tuple of arguments (xt, yt, zt, x, y, z, w).
+    """
+    def __init__(self, glob):
+        super().__init__(glob)
+        self.local = _Local()
+        self.targets = []
+
+    def falling_Test(self):
+        return 0
+
+    def send_angles_to_servos(self, angles, use_step_correction = False):
+        pass
+
+    def computeAlphaForWalk(self, sizes, limAlpha, hands_on = True):
+        self.targets.append((self.xtr,self.ytr,self.ztr,self.xr,self.yr,self.zr,self.wr))
+        self.targets.append((self.xtl,-self.ytl,self.ztl,self.xl,-self.yl,self.zl,self.wl))
+        return super().computeAlphaForWalk(sizes, limAlpha, hands_on)
+
+
+def walk_targets(current_work_directory, number_Of_Cycles = 3):
+    """
+    Returns list of foot targets of initial pose, walk cycles with all combinations
+    of step length, side length and rotation and final pose.
+    """
+    recorder = TrajectoryRecorder(Glob(0, current_work_directory))
+    for first_Leg_Is_Right_Leg in (True, False):
+        recorder.first_Leg_Is_Right_Leg = first_Leg_Is_Right_Leg
+        for stepLength in (-50, 0, 32, 64):
+            for sideLength in (-20, 0, 20):
+                for rotation in (-0.3, 0, 0.3):
+                    recorder.walk_Initial_Pose()
+                    for cycle in range(number_Of_Cycles):
+                        recorder.walk_Cycle(stepLength, sideLength, rotation, cycle, number_Of_Cycles)
+                    recorder.walk_Final_Pose()
+    return recorder.targets, recorder.SIZES, recorder.limAlpha1
+
+
+def max_difference(solutions, reference):
+    """
+    Returns maximum difference of angles in radians between two lists of solutions
+    or None if number of solutions is different.
+    """
+    if len(solutions) != len(reference): return None
+    difference = 0.0
+    for solution, ref in zip(solutions, reference):
+        for angle, ref_angle in zip(solution, ref):
+            difference = max(difference, math.fabs(angle - ref_angle))
+    return difference
+
+
+def benchmark(current_work_directory):
+    targets, sizes, limAlpha = walk_targets(current_work_directory)
+    solvers = {}
+    if starkit is not None: solvers['starkit'] = starkit.alpha_calculation
+    al = Alpha()
+    solvers['python'] = al.compute_Alpha_v3
+    try:
+        import numpy
+        solvers['numpy'] = al.compute_Alpha_v3_numpy
+    except ImportError:
+        print('numpy is not installed')
+    print('foot targets:', len(targets))
+    reference = [al.compute_Alpha_v3(*target, sizes, limAlpha) for target in targets]
+    for name, solver in solvers.items():
+        solver(*targets[0], sizes, limAlpha)          # warm up
+        latencies = []
+        mismatches = 0
+        difference = 0.0
+        for target, ref in zip(targets, reference):
+            start = time.perf_counter()
+            solutions = solver(*target, sizes, limAlpha)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            target_difference = max_difference(solutions, ref)
+            if target_difference is None: mismatches += 1
+            else: difference = max(difference, target_difference)
+        latencies.sort()
+        print('{:8s} mean {:8.1f} us, median {:8.1f} us, max {:8.1f} us, '
+              'different number of solutions: {}, max angle difference: {:.2e} rad'.format(
+                name, sum(latencies) / len(latencies), latencies[len(latencies) // 2],
+                latencies[-1], mismatches, difference))
+
+
+if __name__ == "__main__":
+    benchmark(Path(__file__).resolve().parents[2])
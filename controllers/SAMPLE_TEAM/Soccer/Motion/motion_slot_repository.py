@@ -0,0 +1,137 @@
+"""
+The module is designed by team Robokit of Phystech Lyceum and team Starkit
+of MIPT under mentorship of A. Babaev.
+
+Repository of motion slots. Motion slot files from Soccer/Motion/motion_slots are loaded and
+validated once. Keyframes are stored as numpy arrays of servo angles in radians and
+interpolated poses of every pulse are precomputed, so motion is played by streaming rows
+of pose matrix. Only interpolation from current pose to first keyframe is calculated
+at time of playing.
+"""
+
+import os, json
+from pathlib import Path
+
+import numpy as np
+
+
+class MotionSlot:
+    """
+    Compiled motion slot.
+    name:       name of slot
+    poses:      list of target poses of keyframes, radians
+    bounds:     list of indexes of first row of every keyframe in pose matrix and number of rows
+    """
+    def __init__(self, name, keyframes, servos_number, frame_length, cycle_ms, trims):
+        keyframes = np.asarray([frame[:servos_number + 1] for frame in keyframes], dtype = float)
+        self.name = name
+        self.pulses = (keyframes[:, 0] * frame_length * 1000 / cycle_ms).astype(int)
+        self.targets = 0.017 * keyframes[:, 1:] * 0.03375
+        self.poses = self.targets.tolist()
+        self.trims = np.asarray(trims, dtype = float)
+        self.bounds = [0]
+        for pulseNum in self.pulses:
+            self.bounds.append(self.bounds[-1] + max(int(pulseNum), 0))
+        # rows of all keyframes except first one don't depend on pose of robot before motion
+        self.matrix = np.empty((self.bounds[-1] - self.bounds[1], servos_number))
+        for i in range(1, len(self.targets)):
+            rows = self.segment(self.targets[i - 1], self.targets[i], self.pulses[i])
+            self.matrix[self.bounds[i] - self.bounds[1]: self.bounds[i + 1] - self.bounds[1]] = rows
+        self.rows_tail = self.matrix.tolist()
+
+    def segment(self, start, target, pulseNum):
+        if pulseNum <= 0: return np.empty((0, len(target)))
+        return start + np.outer(np.arange(pulseNum), target - start) / pulseNum + self.trims
+
+    def rows(self, start_pose):
+        """
+        Returns list of rows of servo angles with trims for all pulses of motion.
+        start_pose - pose of robot before motion. If number of servos in pose is
+        less than in slot, motion starts from first keyframe.
+        """
+        target = self.targets[0]
+        if len(start_pose) < len(target): start = target
+        else: start = np.asarray(start_pose[:len(target)], dtype = float)
+        return self.segment(start, target, self.pulses[0]).tolist() + self.rows_tail
+
+
+class MotionSlotRepository:
+    """
+    usage: slot = repository.get(name)
+    directory:      directory with motion slot files <name>.json
+    servos_number:  number of servos controlled by motion slots
+    trims:          list of trims added to angles of servos
+    frame_length:   duration in seconds of unit of keyframe duration
+    cycle_ms:       duration of pulse in ms
+    hot_reload:     slot is reloaded by get() when its file was changed on disk
+    logger:         logger used for messages about invalid slot files
+    """
+    def __init__(self, directory, servos_number, trims, frame_length, cycle_ms, hot_reload = False, logger = None):
+        self.directory = Path(directory)
+        self.servos_number = servos_number
+        self.trims = list(trims[:servos_number])
+        self.frame_length = frame_length
+        self.cycle_ms = cycle_ms
+        self.hot_reload = hot_reload
+        self.logger = logger
+        self.slots = {}
+        self.mtimes = {}
+        self.load_all()
+
+    def path(self, name):
+        return self.directory / (name + ".json")
+
+    def load_all(self):
+        """
+        Loads all slot files of directory. Invalid files are skipped with error message.
+        """
+        for file_name in sorted(os.listdir(self.directory)):
+            if not file_name.endswith(".json"): continue
+            try:
+                self.load(file_name[:-5])
+            except (OSError, ValueError) as e:
+                if self.logger is not None: self.logger.warning('motion slot ' + file_name + ' is not loaded: ' + str(e))
+
+    def load(self, name):
+        """
+        Loads, validates and compiles slot. Raises OSError if file can't be read
+        and ValueError if file has wrong format.
+        """
+        path = self.path(name)
+        mtime = os.stat(path).st_mtime
+        with open(path, "r") as f:
+            slots = json.loads(f.read())
+        keyframes = slots.get(name) if isinstance(slots, dict) else None
+        if not isinstance(keyframes, list) or len(keyframes) == 0:
+            raise ValueError('no keyframes with key ' + name)
+        for i, frame in enumerate(keyframes):
+            if not isinstance(frame, list) or len(frame) < self.servos_number + 1:
+                raise ValueError('keyframe ' + str(i) + ' has less than ' + str(self.servos_number + 1) + ' values')
+            for value in frame[:self.servos_number + 1]:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError('keyframe ' + str(i) + ' has not numeric value ' + repr(value))
+        slot = MotionSlot(name, keyframes, self.servos_number, self.frame_length, self.cycle_ms, self.trims)
+        self.slots[name] = slot
+        self.mtimes[name] = mtime
+        return slot
+
+    def get(self, name):
+        """
+        Returns compiled slot. Slot which was not loaded at startup is loaded from file.
+        """
+        slot = self.slots.get(name)
+        if slot is None:
+            return self.load(name)
+        if self.hot_reload:
+            try:
+                mtime = os.stat(self.path(name)).st_mtime
+            except OSError:
+                return slot
+            if mtime != self.mtimes[name]:
+                try:
+                    slot = self.load(name)
+                    if self.logger is not None: self.logger.info('motion slot ' + name + ' is reloaded')
+                except ValueError as e:
+                    if self.logger is not None: self.logger.error('motion slot ' + name + ' is not reloaded: ' + str(e))
+                    self.mtimes[name] = mtime
+        return slot
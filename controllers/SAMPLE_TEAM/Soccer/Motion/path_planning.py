@@ -15,6 +15,13 @@ import array
 import json
 import random
 import logging
+import time
+import collections
+import heapq
+try:
+    import numpy as np      # vectorized arc path search
+except ImportError:
+    np = None
 
 
 
@@ -22,6 +29,193 @@ goalPostRadius = 0.15       # Radius to walk around a goal post (in m).
 ballRadius = 0.1           # Radius to walk around the ball (in m).
 uprightRobotRadius = 0.2  # Radius to walk around an upright robot (in m).
 roundAboutRadiusIncrement = 0.15
+planCacheSize = 32          # Number of plans kept by PathPlan.plan_many, 0 switches cache off.
+planCachePositionTolerance = 0.05  # Cached plan is reused if start, targets, ball and obstacles moved less (in m).
+planCacheYawTolerance = 0.05       # Cached plan is reused if yaws of start and targets changed less (in rad).
+fieldGridCellSize = 0.5     # Cell size of grid of static obstacles of field (in m).
+fieldBoxMargin = 0.01       # Margin of bounding boxes for rounding in intersection tests (in m).
+occupancyCellSize = 0.05    # Cell size of occupancy grid of grid path planning (in m).
+occupancyFieldMargin = 1.0  # Occupancy grid covers field and margin around field lines (in m).
+gridPlanApproachDistance = 0.2  # Grid path comes to target straight along target yaw from this distance (in m).
+gridPlanCollisionPrice = 100    # Arc path with not less price of collisions is replaced by grid path, None switches it off.
+
+
+class FieldGeometry:
+    """
+    Static obstacles of soccer field for path planning: goal posts and goal bottoms.
+    Every object has bounding box. Coarse grid over the objects refers every cell to objects which
+    bounding boxes overlap the cell, so only objects in the few cells crossed by path segment are tested.
+    Vectorized pricing of PathPlan tests goal bottoms of a goal only for paths near the box of the goal.
+    Occupancy grid of field with goal posts and goal bottoms is the base of grid path planning of PathPlan.
+    Geometry is built once per set of landmarks and shared by all PathPlan instances: use from_landmarks.
+    Boxes are tuples (x_min, y_min, x_max, y_max).
+    """
+    shared = {}
+
+    @classmethod
+    def from_landmarks(cls, landmarks):
+        posts = [landmarks["post1"][0], landmarks["post2"][0], landmarks["post3"][0], landmarks["post4"][0]]
+        key = json.dumps([posts, landmarks["FIELD_LENGTH"], landmarks["FIELD_WIDTH"]])
+        if key not in cls.shared: cls.shared[key] = cls(posts, landmarks["FIELD_LENGTH"], landmarks["FIELD_WIDTH"])
+        return cls.shared[key]
+
+    def __init__(self, posts, field_length, field_width):
+        self.posts = posts
+        self.goal_bottoms = [[[self.posts[0][0]+0.10, self.posts[0][1]],[self.posts[1][0]+0.10, self.posts[1][1]]],
+                             [[self.posts[2][0]-0.10, self.posts[2][1]],[self.posts[3][0]-0.10, self.posts[3][1]]],
+                             [[self.posts[0][0], self.posts[0][1]],[self.posts[0][0]+0.35, self.posts[0][1]]],
+                             [[self.posts[1][0], self.posts[1][1]],[self.posts[1][0]+0.35, self.posts[1][1]]],
+                             [[self.posts[2][0], self.posts[2][1]],[self.posts[2][0]-0.35, self.posts[2][1]]],
+                             [[self.posts[3][0], self.posts[3][1]],[self.posts[3][0]-0.35, self.posts[3][1]]]]
+        self.post_boxes = [self.circle_box(x, y, goalPostRadius) for x, y in self.posts]
+        self.goal_bottom_boxes = [self.segment_box(p1[0], p1[1], p2[0], p2[1]) for p1, p2 in self.goal_bottoms]
+        boxes = self.post_boxes + self.goal_bottom_boxes
+        self.box = (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                    max(box[2] for box in boxes), max(box[3] for box in boxes))
+        self.x0, self.y0 = self.box[:2]
+        self.columns = int((self.box[2] - self.x0) / fieldGridCellSize) + 1
+        self.rows = int((self.box[3] - self.y0) / fieldGridCellSize) + 1
+        self.post_cells = self.grid(self.post_boxes)
+        self.goal_bottom_cells = self.grid(self.goal_bottom_boxes)
+        # goals as groups of posts and goal bottoms with common bounding box
+        self.goals = []
+        for posts, goal_bottoms in (([0, 1], [0, 2, 3]), ([2, 3], [1, 4, 5])):
+            boxes = [self.post_boxes[j] for j in posts] + [self.goal_bottom_boxes[j] for j in goal_bottoms]
+            box = (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                   max(box[2] for box in boxes), max(box[3] for box in boxes))
+            self.goals.append((box, posts, goal_bottoms))
+        if np is not None:
+            # columns of price_circles_numpy of PathPlan
+            self.post_circles_numpy = np.array([(x, y, goalPostRadius, 300, 200, 300, 100) for x, y in self.posts], dtype=float).T
+            self.goal_bottoms_numpy = [(box, np.array([[self.goal_bottoms[j][0][0], self.goal_bottoms[j][0][1],
+                                                        self.goal_bottoms[j][1][0], self.goal_bottoms[j][1][1]]
+                                                       for j in goal_bottoms], dtype=float).T)
+                                       for box, posts, goal_bottoms in self.goals]
+
+        # occupancy grid of field with goal posts and goal bottoms
+        self.occupancy_x0 = - field_length / 2 - occupancyFieldMargin
+        self.occupancy_y0 = - field_width / 2 - occupancyFieldMargin
+        self.occupancy_columns = math.ceil((field_length + 2 * occupancyFieldMargin) / occupancyCellSize)
+        self.occupancy_rows = math.ceil((field_width + 2 * occupancyFieldMargin) / occupancyCellSize)
+        self.occupancy = bytearray(self.occupancy_columns * self.occupancy_rows)
+        for x, y in self.posts:
+            self.occupy_circle(self.occupancy, x, y, goalPostRadius)
+        for p1, p2 in self.goal_bottoms:
+            self.occupy_segment(self.occupancy, p1[0], p1[1], p2[0], p2[1], goalPostRadius)
+
+    def circle_box(self, xc, yc, R):
+        return xc - R - fieldBoxMargin, yc - R - fieldBoxMargin, xc + R + fieldBoxMargin, yc + R + fieldBoxMargin
+
+    def segment_box(self, x1, y1, x2, y2):
+        return (min(x1, x2) - fieldBoxMargin, min(y1, y2) - fieldBoxMargin,
+                max(x1, x2) + fieldBoxMargin, max(y1, y2) + fieldBoxMargin)
+
+    def column(self, x):
+        return math.floor((x - self.x0) / fieldGridCellSize)
+
+    def row(self, y):
+        return math.floor((y - self.y0) / fieldGridCellSize)
+
+    def box_cells(self, box):
+        for column in range(max(self.column(box[0]), 0), min(self.column(box[2]), self.columns - 1) + 1):
+            for row in range(max(self.row(box[1]), 0), min(self.row(box[3]), self.rows - 1) + 1):
+                yield column, row
+
+    def segment_cells(self, x1, y1, x2, y2):
+        """
+        Yields cells of grid crossed by line segment widened by fieldBoxMargin.
+        """
+        x_min, x_max = min(x1, x2), max(x1, x2)
+        for column in range(max(self.column(x_min - fieldBoxMargin), 0), min(self.column(x_max + fieldBoxMargin), self.columns - 1) + 1):
+            if x1 == x2:
+                ya, yb = y1, y2
+            else:
+                xa = max(x_min, self.x0 + column * fieldGridCellSize - fieldBoxMargin)
+                xb = min(x_max, self.x0 + (column + 1) * fieldGridCellSize + fieldBoxMargin)
+                ya = y1 + (y2 - y1) * (xa - x1) / (x2 - x1)
+                yb = y1 + (y2 - y1) * (xb - x1) / (x2 - x1)
+            for row in range(max(self.row(min(ya, yb) - fieldBoxMargin), 0), min(self.row(max(ya, yb) + fieldBoxMargin), self.rows - 1) + 1):
+                yield column, row
+
+    def grid(self, boxes):
+        cells = {}
+        for index, box in enumerate(boxes):
+            for cell in self.box_cells(box):
+                cells.setdefault(cell, []).append(index)
+        return cells
+
+    def objects(self, cells, box):
+        """
+        Returns sorted indices of goal posts and of goal bottoms registered in cells which bounding boxes overlap box.
+        """
+        posts, goal_bottoms = set(), set()
+        for cell in cells:
+            posts.update(self.post_cells.get(cell, ()))
+            goal_bottoms.update(self.goal_bottom_cells.get(cell, ()))
+        return ([index for index in sorted(posts) if self.boxes_overlap(self.post_boxes[index], box)],
+                [index for index in sorted(goal_bottoms) if self.boxes_overlap(self.goal_bottom_boxes[index], box)])
+
+    def boxes_overlap(self, box1, box2):
+        return box1[0] <= box2[2] and box2[0] <= box1[2] and box1[1] <= box2[3] and box2[1] <= box1[3]
+
+    def near_segment(self, x1, y1, x2, y2):
+        """
+        Returns indices of goal posts and of goal bottoms to be tested for intersection with line segment.
+        """
+        box = self.segment_box(x1, y1, x2, y2)
+        if not self.boxes_overlap(self.box, box): return (), ()
+        return self.objects(self.segment_cells(x1, y1, x2, y2), box)
+
+    def near_circle(self, xc, yc, R):
+        """
+        Returns indices of goal posts and of goal bottoms to be tested for intersection with circle or its arc.
+        """
+        box = self.circle_box(xc, yc, R)
+        if not self.boxes_overlap(self.box, box): return (), ()
+        return self.objects(self.box_cells(box), box)
+
+    def occupancy_cell(self, x, y):
+        """
+        Returns index of cell of occupancy grid which contains point or None if point is out of grid.
+        """
+        column = math.floor((x - self.occupancy_x0) / occupancyCellSize)
+        row = math.floor((y - self.occupancy_y0) / occupancyCellSize)
+        if 0 <= column < self.occupancy_columns and 0 <= row < self.occupancy_rows:
+            return row * self.occupancy_columns + column
+        return None
+
+    def cell_center(self, index):
+        row, column = divmod(index, self.occupancy_columns)
+        return self.occupancy_x0 + (column + 0.5) * occupancyCellSize, self.occupancy_y0 + (row + 0.5) * occupancyCellSize
+
+    def occupancy_cells(self, x_min, y_min, x_max, y_max):
+        """
+        Yields index, x, y of centers of cells of occupancy grid inside box.
+        """
+        first_column = max(math.ceil((x_min - self.occupancy_x0) / occupancyCellSize - 0.5), 0)
+        last_column = min(math.floor((x_max - self.occupancy_x0) / occupancyCellSize - 0.5), self.occupancy_columns - 1)
+        first_row = max(math.ceil((y_min - self.occupancy_y0) / occupancyCellSize - 0.5), 0)
+        last_row = min(math.floor((y_max - self.occupancy_y0) / occupancyCellSize - 0.5), self.occupancy_rows - 1)
+        for row in range(first_row, last_row + 1):
+            y = self.occupancy_y0 + (row + 0.5) * occupancyCellSize
+            for column in range(first_column, last_column + 1):
+                yield row * self.occupancy_columns + column, self.occupancy_x0 + (column + 0.5) * occupancyCellSize, y
+
+    def occupy_circle(self, occupancy, xc, yc, R):
+        """
+        Occupies cells which centers are closer than R to center of circle.
+        """
+        for index, x, y in self.occupancy_cells(xc - R, yc - R, xc + R, yc + R):
+            if (x - xc)**2 + (y - yc)**2 < R**2: occupancy[index] = 1
+
+    def occupy_segment(self, occupancy, x1, y1, x2, y2, R):
+        """
+        Occupies cells which centers are closer than R to line segment.
+        """
+        length = (x2 - x1)**2 + (y2 - y1)**2
+        for index, x, y in self.occupancy_cells(min(x1, x2) - R, min(y1, y2) - R, max(x1, x2) + R, max(y1, y2) + R):
+            t = min(max(((x - x1) * (x2 - x1) + (y - y1) * (y2 - y1)) / length, 0), 1) if length else 0
+            if (x - x1 - t * (x2 - x1))**2 + (y - y1 - t * (y2 - y1))**2 < R**2: occupancy[index] = 1
 
 
 class PathPlan:
@@ -35,19 +229,22 @@ class PathPlan:
     Therefore there are used evaluations of prices of variants of path. The Path with cheaper
     price is returned. Collision with obstacle in far distance is cheaper than collision with 
     obstacle in near distance.
+    If price of collisions of path of plan_many is gridPlanCollisionPrice or more or path touches obstacle
+    then it is replaced by path searched by A* on occupancy grid of field (grid_plan) if there is one.
     During Path heuristic various radiuses of arcs are considered. Arc with zero radius means
     turning without changing coordinate.
 
     """
     def __init__(self, glob):
         self.glob = glob
-        self.posts = [self.glob.landmarks["post1"][0], self.glob.landmarks["post2"][0], self.glob.landmarks["post3"][0], self.glob.landmarks["post4"][0]]
-        self.goal_bottoms = [[[self.posts[0][0]+0.10, self.posts[0][1]],[self.posts[1][0]+0.10, self.posts[1][1]]],
-                             [[self.posts[2][0]-0.10, self.posts[2][1]],[self.posts[3][0]-0.10, self.posts[3][1]]],
-                             [[self.posts[0][0], self.posts[0][1]],[self.posts[0][0]+0.35, self.posts[0][1]]],
-                             [[self.posts[1][0], self.posts[1][1]],[self.posts[1][0]+0.35, self.posts[1][1]]],
-                             [[self.posts[2][0], self.posts[2][1]],[self.posts[2][0]-0.35, self.posts[2][1]]],
-                             [[self.posts[3][0], self.posts[3][1]],[self.posts[3][0]-0.35, self.posts[3][1]]]]
+        self.field = FieldGeometry.from_landmarks(self.glob.landmarks)
+        self.posts = self.field.posts
+        self.goal_bottoms = self.field.goal_bottoms
+        self.plan_cache = collections.OrderedDict()   # quantized start, targets, penalties, ball -> cached plan
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_revalidations = 0                  # hits with moved obstacles which do not touch cached path
+        self.cache_saved_time = 0.0                   # planning time of plans returned from cache (in s)
         
 
     def coord2yaw(self, x, y):
@@ -223,6 +420,13 @@ class PathPlan:
         """
         #print('obstacles:', self.glob.obstacles)
         dest, centers, number_Of_Cycles = self.path_calc(start_coord, target_coord)
+        self.correct_short_arcs(start_coord, target_coord, dest, centers)
+        return dest, centers, number_Of_Cycles
+
+    def correct_short_arcs(self, start_coord, target_coord, dest, centers):
+        """
+        Changes direction of initial and final arcs of small radius if turn on the spot is shorter in opposite direction.
+        """
         if len(centers) > 0:
             x1, y1, x2, y2, cx, cy, R, CW = centers[0]
             if R <= 0.08:
@@ -236,17 +440,322 @@ class PathPlan:
                 dest_yaw = target_coord[2]
                 delta_yaw = self.delta_yaw(start_yaw, dest_yaw, CW)
                 if abs(delta_yaw) > math.pi: centers[len(centers)-1][7] = not CW
-        return dest, centers, number_Of_Cycles
+
+    def plan_many(self, start_coord, targets, penalties = None):
+        """
+        Returns optimized path to the cheapest of several targets.
+        usage:
+            list: dest, list: centers, int: number_Of_Cycles, int: index = self.plan_many(list: start_coord, list: targets, list: penalties)
+            dest, centers:    as in path_calc_optimum for target with index in targets.
+            number_Of_Cycles: price of path as in path_calc_optimum plus penalty of target.
+            index:            index of chosen target. Among targets with equal price the last one is chosen.
+                              If all prices are higher than 1000 returns [], [], 1000, -1.
+            targets:          list of target_coord of path_calc_optimum
+            penalties:        list of integers added to prices of paths to targets, zeros by default.
+        Plan is returned from cache if start_coord, targets and ball moved less than planCachePositionTolerance
+        and planCacheYawTolerance since the cached plan was searched and obstacles which moved more do not touch
+        path of cached plan neither in old nor in new position. number_Of_Cycles of cached plan is its price
+        at the time of search.
+        """
+        if penalties is None: penalties = [0] * len(targets)
+        if planCacheSize <= 0: return self.search_many(start_coord, targets, penalties)
+        ball_coord = list(self.glob.ball_coord)
+        obstacles = [list(obstacle) for obstacle in self.glob.obstacles]
+        entry = self.find_cached_plan(start_coord, targets, penalties, ball_coord, obstacles)
+        if entry is not None:
+            self.cache_hits += 1
+            self.cache_saved_time += entry['planning_time']
+            dest, centers, number_Of_Cycles, index = entry['plan']
+            return [list(point) for point in dest], [list(center) for center in centers], number_Of_Cycles, index
+        self.cache_misses += 1
+        start = time.perf_counter()
+        plan = self.search_many(start_coord, targets, penalties)
+        dest, centers, number_Of_Cycles, index = plan
+        key = (self.quantize_coord(start_coord), tuple(self.quantize_coord(target_coord) for target_coord in targets),
+               tuple(penalties), self.quantize_coord(ball_coord))
+        self.plan_cache[key] = {'start_coord': list(start_coord), 'targets': [list(target_coord) for target_coord in targets],
+                                'penalties': list(penalties), 'ball_coord': ball_coord, 'obstacles': obstacles,
+                                'plan': ([list(point) for point in dest], [list(center) for center in centers], number_Of_Cycles, index),
+                                'planning_time': time.perf_counter() - start}
+        self.plan_cache.move_to_end(key)
+        if len(self.plan_cache) > planCacheSize: self.plan_cache.popitem(last = False)
+        return plan
+
+    def search_many(self, start_coord, targets, penalties):
+        """
+        Returns dest, centers, number_Of_Cycles, index of plan_many without cache.
+        Result is the same as choice of the cheapest of path_calc_optimum for every target. One target is planned
+        first, its price limits the others: arc path variants which need more cycles than the limit are not
+        checked for collisions.
+        Colliding arc path is replaced by grid path as described in PathPlan.
+        """
+        order = sorted(range(len(targets)), key = lambda k: (penalties[k], math.sqrt((targets[k][0] - start_coord[0])**2 +
+                                                                                       (targets[k][1] - start_coord[1])**2)))
+        best = [], [], 1000, -1
+        for group in (order[:1], order[1:]):
+            if not group: continue
+            limits = [best[2] - penalties[k] for k in group]
+            for k, (dest, centers, number_Of_Cycles) in zip(group, self.path_calc_many(start_coord, [targets[k] for k in group], limits)):
+                number_Of_Cycles += penalties[k]
+                if number_Of_Cycles < best[2] or (number_Of_Cycles == best[2] and k > best[3]):
+                    best = dest, centers, number_Of_Cycles, k
+        dest, centers, number_Of_Cycles, index = best
+        if index >= 0 and gridPlanCollisionPrice is not None and self.arc_path_collides(start_coord, targets[index], dest, centers,
+                                                                                         number_Of_Cycles - penalties[index]):
+            # grid path to the first target of order or to the chosen one replaces colliding arc path
+            grid_best = best[:2] + (math.inf, -1)
+            for k in sorted({order[0], index}):
+                dest1, centers1, number_Of_Cycles1 = self.grid_plan(start_coord, targets[k])
+                number_Of_Cycles1 += penalties[k]
+                if len(dest1) > 0 and number_Of_Cycles1 <= grid_best[2]:
+                    grid_best = dest1, centers1, number_Of_Cycles1, k
+            if grid_best[3] >= 0: best = grid_best
+        dest, centers, number_Of_Cycles, index = best
+        if index >= 0: self.correct_short_arcs(start_coord, targets[index], dest, centers)
+        return dest, centers, number_Of_Cycles, index
+
+    def arc_path_collides(self, start_coord, target_coord, dest, centers, number_Of_Cycles):
+        """
+        Returns True if price of collisions of arc path is gridPlanCollisionPrice or more or if path touches
+        obstacle: arc around obstacle is not priced by check_Price.
+        """
+        if number_Of_Cycles - self.number_Of_Cycles_count(dest, centers, start_coord[2], target_coord[2]) >= gridPlanCollisionPrice:
+            return True
+        return any(self.path_touches_circle(dest, centers, obstacle[0], obstacle[1], obstacle[2] / 2 + roundAboutRadiusIncrement)
+                   for obstacle in self.glob.obstacles)
+
+    def grid_plan(self, start_coord, target_coord):
+        """
+        Returns path found by A* search on occupancy grid of field with ball and obstacles.
+        usage:
+            list: dest, list: centers, int: number_Of_Cycles = self.grid_plan(list: start_coord, list: target_coord)
+            dest, centers:    as in path_calc_optimum. All arcs have zero radius: robot turns on the spot
+                              between straight segments.
+            number_Of_Cycles: number of cycles of path without price of collisions. Returns [], [], 1000 if
+                              start or target is out of grid or if there is no free path.
+        Obstacles are inflated by uprightRobotRadius, ball by ballRadius + roundAboutRadiusIncrement, goal posts
+        and goal bottoms by goalPostRadius. Path comes to target straight along target yaw from distance
+        gridPlanApproachDistance, this last segment is not checked as it usually ends near the ball.
+        If that point is occupied the distance is reduced by cells down to zero.
+        """
+        x2, y2, yaw2 = target_coord
+        start = self.field.occupancy_cell(start_coord[0], start_coord[1])
+        if start is None: return [], [], 1000
+        occupancy = self.occupancy_grid(start_coord)
+        occupancy[start] = 0
+        steps = round(gridPlanApproachDistance / occupancyCellSize)
+        for step in range(steps, -1, -1):
+            distance = gridPlanApproachDistance * step / steps
+            x3, y3 = x2 - distance * math.cos(yaw2), y2 - distance * math.sin(yaw2)
+            goal = self.field.occupancy_cell(x3, y3)
+            if goal is not None and not occupancy[goal]: break
+        else: return [], [], 1000
+        points = [(x2, y2)] if step else []
+        cells = self.a_star(occupancy, start, goal)
+        if cells is None: return [], [], 1000
+        path = [(start_coord[0], start_coord[1])] + [self.field.cell_center(cell) for cell in cells[1:-1]] + [(x3, y3)]
+        dest, centers = self.polyline_path(start_coord, target_coord, self.smooth_path(occupancy, path) + points)
+        return dest, centers, self.number_Of_Cycles_count(dest, centers, start_coord[2], yaw2)
+
+    def occupancy_grid(self, start_coord):
+        """
+        Returns copy of static occupancy grid of field with occupied cells of ball and obstacles.
+        Circles which contain start are shrunk so that robot can leave start.
+        """
+        occupancy = bytearray(self.field.occupancy)
+        circles = [(self.glob.ball_coord[0], self.glob.ball_coord[1], ballRadius + roundAboutRadiusIncrement)]
+        for obstacle in self.glob.obstacles:
+            circles.append((obstacle[0], obstacle[1], obstacle[2] / 2 + uprightRobotRadius))
+        for xc, yc, R in circles:
+            R = min(R, math.sqrt((start_coord[0] - xc)**2 + (start_coord[1] - yc)**2) - 2 * occupancyCellSize)
+            if R > 0: self.field.occupy_circle(occupancy, xc, yc, R)
+        return occupancy
+
+    def a_star(self, occupancy, start, goal):
+        """
+        Returns list of indices of cells of the shortest path from cell start to cell goal through free cells
+        of occupancy or None. Cells are connected to 8 neighbours, diagonal step is permitted if both
+        adjacent cells are free. Octile distance to goal is the heuristic: it is admissible and consistent.
+        """
+        columns = self.field.occupancy_columns
+        rows = self.field.occupancy_rows
+        goal_row, goal_column = divmod(goal, columns)
+        diagonal = math.sqrt(2) * occupancyCellSize
+        def heuristic(cell):
+            row, column = divmod(cell, columns)
+            dx, dy = abs(column - goal_column), abs(row - goal_row)
+            return (max(dx, dy) + (math.sqrt(2) - 1) * min(dx, dy)) * occupancyCellSize
+        distances = {start: 0.0}
+        previous = {}
+        queue = [(heuristic(start), start)]
+        closed = set()
+        while queue:
+            cost, cell = heapq.heappop(queue)
+            if cell == goal:
+                path = [cell]
+                while cell in previous:
+                    cell = previous[cell]
+                    path.append(cell)
+                return path[::-1]
+            if cell in closed: continue
+            closed.add(cell)
+            row, column = divmod(cell, columns)
+            for d_column, d_row in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)):
+                next_column, next_row = column + d_column, row + d_row
+                if not (0 <= next_column < columns and 0 <= next_row < rows): continue
+                next_cell = next_row * columns + next_column
+                if occupancy[next_cell] or next_cell in closed: continue
+                if d_column and d_row:
+                    if occupancy[row * columns + next_column] or occupancy[next_row * columns + column]: continue
+                    distance = distances[cell] + diagonal
+                else: distance = distances[cell] + occupancyCellSize
+                if distance < distances.get(next_cell, math.inf):
+                    distances[next_cell] = distance
+                    previous[next_cell] = cell
+                    heapq.heappush(queue, (distance + heuristic(next_cell), next_cell))
+        return None
+
+    def line_of_sight(self, occupancy, x1, y1, x2, y2):
+        """
+        Returns True if points of line segment taken with step of half of cell are in free cells of occupancy.
+        """
+        steps = math.ceil(math.sqrt((x2 - x1)**2 + (y2 - y1)**2) / occupancyCellSize * 2)
+        for step in range(steps + 1):
+            cell = self.field.occupancy_cell(x1 + (x2 - x1) * step / max(steps, 1), y1 + (y2 - y1) * step / max(steps, 1))
+            if cell is None or occupancy[cell]: return False
+        return True
+
+    def smooth_path(self, occupancy, points):
+        """
+        Returns points of path with removed intermediate points which can be passed by straight line.
+        """
+        smoothed = [points[0]]
+        i = 0
+        while i < len(points) - 1:
+            j = len(points) - 1
+            while j > i + 1 and not self.line_of_sight(occupancy, *points[i], *points[j]): j -= 1
+            smoothed.append(points[j])
+            i = j
+        return smoothed
+
+    def polyline_path(self, start_coord, target_coord, points):
+        """
+        Returns dest, centers of path along line segments between points with turns on the spot.
+        """
+        dest = []
+        centers = []
+        yaw = start_coord[2]
+        points = [point for i, point in enumerate(points) if i == 0 or point != points[i - 1]]
+        for (x1, y1), (x2, y2) in zip(points[:-1], points[1:]):
+            dest += [[x1, y1], [x2, y2]]
+            dest_yaw = self.coord2yaw(x2 - x1, y2 - y1)
+            centers.append([x1, y1, x1, y1, x1, y1, 0, self.norm_yaw(dest_yaw - yaw) < 0])
+            yaw = dest_yaw
+        x, y = points[-1]
+        centers.append([x, y, x, y, x, y, 0, self.norm_yaw(target_coord[2] - yaw) < 0])
+        return dest, centers
+
+    def quantize_coord(self, coord):
+        key = [round(coord[0] / planCachePositionTolerance), round(coord[1] / planCachePositionTolerance)]
+        if len(coord) > 2: key.append(round(self.norm_yaw(coord[2]) / planCacheYawTolerance))
+        return tuple(key)
+
+    def coord_is_close(self, coord, cached_coord):
+        if abs(coord[0] - cached_coord[0]) > planCachePositionTolerance: return False
+        if abs(coord[1] - cached_coord[1]) > planCachePositionTolerance: return False
+        return len(coord) < 3 or abs(self.norm_yaw(coord[2] - cached_coord[2])) <= planCacheYawTolerance
+
+    def find_cached_plan(self, start_coord, targets, penalties, ball_coord, obstacles):
+        """
+        Returns the most recent entry of plan cache which is valid for arguments of plan_many or None.
+        """
+        for key in reversed(self.plan_cache):
+            entry = self.plan_cache[key]
+            if entry['penalties'] != list(penalties) or len(entry['targets']) != len(targets): continue
+            if not self.coord_is_close(start_coord, entry['start_coord']): continue
+            if not self.coord_is_close(ball_coord, entry['ball_coord']): continue
+            if not all(self.coord_is_close(target_coord, cached_coord) for target_coord, cached_coord in zip(targets, entry['targets'])):
+                continue
+            if not self.cached_plan_is_valid(entry, obstacles): continue
+            self.plan_cache.move_to_end(key)
+            return entry
+        return None
+
+    def cached_plan_is_valid(self, entry, obstacles):
+        """
+        Cached plan is valid if every obstacle is close to obstacle of the same size which was used for planning
+        or if obstacles which moved touch path of plan neither in old nor in new position. Moved obstacles are
+        inflated by uprightRobotRadius as in grid_plan. Empty plan is valid only without moved obstacles.
+        """
+        dest, centers, number_Of_Cycles, index = entry['plan']
+        moved = []
+        unmatched = list(entry['obstacles'])
+        for obstacle in obstacles:
+            for cached_obstacle in unmatched:
+                if cached_obstacle[2] == obstacle[2] and self.coord_is_close(obstacle[:2], cached_obstacle[:2]):
+                    unmatched.remove(cached_obstacle)
+                    break
+            else: moved.append(obstacle)
+        moved += unmatched
+        if not moved: return True
+        if len(dest) == 0: return False
+        for obstacle in moved:
+            if self.path_touches_circle(dest, centers, obstacle[0], obstacle[1], obstacle[2] / 2 + uprightRobotRadius):
+                return False
+        self.cache_revalidations += 1
+        return True
+
+    def path_touches_circle(self, dest, centers, xc, yc, R):
+        """
+        Returns True if any arc or line segment of path crosses circle or ends inside it.
+        """
+        for x1, y1, x2, y2, cx, cy, radius, CW in centers:
+            if (x1 - xc)**2 + (y1 - yc)**2 <= R**2 or (x2 - xc)**2 + (y2 - yc)**2 <= R**2: return True
+            if cx == xc and cy == yc: return True           # arc around this obstacle
+            if radius > 0 and self.intersection_circle_segment_and_circle(x1, y1, x2, y2, cx, cy, CW, xc, yc, R):
+                return True
+        for i in range(0, len(dest), 2):
+            if dest[i] == dest[i + 1]: continue             # ends are checked with arcs
+            if self.intersection_line_segment_and_circle(dest[i][0], dest[i][1], dest[i + 1][0], dest[i + 1][1], xc, yc, R):
+                return True
+        return False
+
+    def cache_statistics(self):
+        """
+        Returns dictionary of counters of plan cache of plan_many.
+        """
+        requests = self.cache_hits + self.cache_misses
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'revalidations': self.cache_revalidations,
+                'hit_rate': self.cache_hits / requests if requests else 0.0, 'saved_time': self.cache_saved_time}
 
     def path_calc(self, start_coord, target_coord):
-        x1, y1, yaw1 = start_coord 
+        x1, y1, yaw1 = start_coord
         x2, y2, yaw2 = target_coord
-        dest1, centers1, number_Of_Cycles1 = self.arc_path_internal( x1, y1, yaw1, x2, y2, yaw2)
-        dest2, centers2, number_Of_Cycles2 = self.arc_path_external( x1, y1, yaw1, x2, y2, yaw2)
+        if np is not None:
+            dest1, centers1, number_Of_Cycles1 = self.arc_path_numpy(True, x1, y1, yaw1, x2, y2, yaw2)
+            dest2, centers2, number_Of_Cycles2 = self.arc_path_numpy(False, x1, y1, yaw1, x2, y2, yaw2)
+        else:
+            dest1, centers1, number_Of_Cycles1 = self.arc_path_internal( x1, y1, yaw1, x2, y2, yaw2)
+            dest2, centers2, number_Of_Cycles2 = self.arc_path_external( x1, y1, yaw1, x2, y2, yaw2)
         if number_Of_Cycles1 < number_Of_Cycles2: return dest1, centers1, number_Of_Cycles1
         else: return dest2, centers2, number_Of_Cycles2
         return dest1, centers1
 
+    def path_calc_many(self, start_coord, targets, limits = None):
+        """
+        Returns list of (dest, centers, number_Of_Cycles) of path_calc for every target of targets.
+        limits: list of number_Of_Cycles for targets. Paths more expensive than limit can be replaced by
+                [], [], 1000 or by other path more expensive than limit.
+        """
+        if np is None: return [self.path_calc(start_coord, target_coord) for target_coord in targets]
+        x1, y1, yaw1 = start_coord
+        paths = []
+        for path1, path2 in zip(self.arc_paths_numpy(True, x1, y1, yaw1, targets, limits),
+                                self.arc_paths_numpy(False, x1, y1, yaw1, targets, limits)):
+            if path1[2] < path2[2]: paths.append(path1)
+            else: paths.append(path2)
+        return paths
+
     def arc_path_external(self, x1, y1, yaw1, x2, y2, yaw2):
         number_Of_Cycles_min = 1000
         for i in range(10):
@@ -352,13 +861,17 @@ class PathPlan:
         if self.intersection_circle_segment_and_circle(dest[ind][0], dest[ind][1], x2, y2, xc2, yc2, CW2,
                                                     self.glob.obstacles[0][0], self.glob.obstacles[0][1], uprightRobotRadius): permit = False
 
-        for j in range(4):
-            goalPostX, goalPostY = self.glob.landmarks["unsorted_posts"][j]
+        for j in self.field.near_circle(xc2, yc2, math.sqrt((dest[ind][0] - xc2)**2 + (dest[ind][1] - yc2)**2))[0]:
+            goalPostX, goalPostY = self.posts[j]
             if self.intersection_circle_segment_and_circle(dest[ind][0], dest[ind][1], x2, y2, xc2, yc2, CW2,
                                                     goalPostX, goalPostY, goalPostRadius): permit = False
+        for j in self.field.near_circle(xc1, yc1, math.sqrt((x1 - xc1)**2 + (y1 - yc1)**2))[0]:
+            goalPostX, goalPostY = self.posts[j]
             if self.intersection_circle_segment_and_circle(x1, y1, dest[0][0], dest[0][1], xc1, yc1, CW1,
                                                     goalPostX, goalPostY, goalPostRadius): permit = False
-            for i in range(0, len(dest), 2):
+        for i in range(0, len(dest), 2):
+            for j in self.field.near_segment(dest[i][0], dest[i][1], dest[i + 1][0], dest[i + 1][1])[0]:
+                goalPostX, goalPostY = self.posts[j]
                 if self.intersection_line_segment_and_circle(dest[i][0], dest[i][1], dest[i + 1][0], dest[i + 1][1], 
                                                          goalPostX, goalPostY, goalPostRadius): permit = False
         #if permit == False: print('permit denied')
@@ -383,22 +896,27 @@ class PathPlan:
             for i in range(0, len(dest), 2):
                     if self.intersection_line_segment_and_circle(dest[i][0], dest[i][1], dest[i + 1][0], dest[i + 1][1], 
                                                          self.glob.obstacles[j][0], self.glob.obstacles[j][1], roundAboutRadius): price += 300 - i * 100
-        for j in range(4):
+        # goal posts and goal bottoms are tested only if their bounding boxes overlap the ones of arcs and segments
+        for j in self.field.near_circle(xc2, yc2, math.sqrt((dest[ind][0] - xc2)**2 + (dest[ind][1] - yc2)**2))[0]:
             goalPostX, goalPostY = self.posts[j]
             if self.intersection_circle_segment_and_circle(dest[ind][0], dest[ind][1], x2, y2, xc2, yc2, CW2,
                                                     goalPostX, goalPostY, goalPostRadius): price += 200
+        for j in self.field.near_circle(xc1, yc1, math.sqrt((x1 - xc1)**2 + (y1 - yc1)**2))[0]:
+            goalPostX, goalPostY = self.posts[j]
             if self.intersection_circle_segment_and_circle(x1, y1, dest[0][0], dest[0][1], xc1, yc1, CW1,
                                                     goalPostX, goalPostY, goalPostRadius): price += 300
-            for i in range(0, len(dest), 2):
+        for i in range(0, len(dest), 2):
+            posts, goal_bottoms = self.field.near_segment(dest[i][0], dest[i][1], dest[i + 1][0], dest[i + 1][1])
+            for j in posts:
+                goalPostX, goalPostY = self.posts[j]
                 if self.intersection_line_segment_and_circle(dest[i][0], dest[i][1], dest[i + 1][0], dest[i + 1][1], 
                                                          goalPostX, goalPostY, goalPostRadius): price += 300 - i * 100
-
-        for j in range(6):
-            for i in range(0, len(dest), 2):
+            for j in goal_bottoms:
                 if self.intersection_line_segment_and_line_segment(dest[i][0], dest[i][1], dest[i + 1][0], dest[i + 1][1], 
                    self.goal_bottoms[j][0][0], self.goal_bottoms[j][0][1], self.goal_bottoms[j][1][0], self.goal_bottoms[j][1][1]):
                    price += 300 # - i * 100
-            for i in range(len(centers)):
+        for i in range(len(centers)):
+            for j in self.field.near_circle(centers[i][4], centers[i][5], centers[i][6])[1]:
                 if self.intersection_line_segment_and_circle(self.goal_bottoms[j][0][0], self.goal_bottoms[j][0][1],
                    self.goal_bottoms[j][1][0], self.goal_bottoms[j][1][1], 
                    centers[i][4], centers[i][5], centers[i][6]): price += 300 #- i * 100
@@ -410,7 +928,7 @@ class PathPlan:
         x1, y1, x2, y2, cx, cy, R, CW = centers[0]
         prop_yaw_local1 = self.delta_yaw(yaw1, prop_yaw_glob1, CW)
         number_Of_Cycles = math.ceil(abs(prop_yaw_local1 / 0.2))
-        while True:
+        while number_Of_Cycles:             # arc without turn takes no cycles
             delta_yaw_step = prop_yaw_local1 / number_Of_Cycles
             stepLength = R * abs(delta_yaw_step) * 1000 * 64 / self.glob.cycle_step_yield * 1.1
             if stepLength <= 64: break
@@ -426,7 +944,7 @@ class PathPlan:
                 prop_yaw_local2 = self.delta_yaw(prop_yaw_glob1, prop_yaw_glob2, CW)
                 prop_yaw_glob1 = prop_yaw_glob2
             number_Of_Cycles2 = math.ceil(abs(prop_yaw_local2 / 0.2))
-            while True:
+            while number_Of_Cycles2:
                 delta_yaw_step = prop_yaw_local2 / number_Of_Cycles2
                 stepLength = R * abs(delta_yaw_step) * 1000 * 64 / self.glob.cycle_step_yield * 1.1
                 if stepLength <= 64: break
@@ -595,6 +1113,392 @@ class PathPlan:
         if D < 0: return False, 0, 0
         return True, (-b + math.sqrt(D))/(2 * a), (-b - math.sqrt(D))/(2 * a)
 
+    # Vectorized arc path search. Methods with suffix _numpy repeat computations of methods above with
+    # the same order of floating point operations for numpy arrays of path variants, branches are replaced
+    # by np.where. arc_path_numpy evaluates all 10x10 arc radii and both ways around the nearest obstacle
+    # at once and returns the same path as arc_path_internal or arc_path_external.
+
+    def coord2yaw_numpy(self, x, y):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            yaw = np.arctan(y / x)
+        yaw = np.where(x == 0, np.where(y > 0, math.pi/2, -math.pi/2), yaw)
+        return np.where(x < 0, np.where(yaw > 0, yaw - math.pi, yaw + math.pi), yaw)
+
+    def norm_yaw_numpy(self, yaw):
+        yaw = np.mod(yaw, 2 * math.pi)
+        yaw = np.where(yaw > math.pi, yaw - 2 * math.pi, yaw)
+        return np.where(yaw < -math.pi, yaw + 2 * math.pi, yaw)
+
+    def delta_yaw_numpy(self, start_yaw, dest_yaw, CW):
+        start_yaw1 = np.where(CW & (start_yaw < dest_yaw), start_yaw + math.pi * 2, start_yaw)
+        dest_yaw1 = np.where(~CW & (dest_yaw < start_yaw), dest_yaw + math.pi * 2, dest_yaw)
+        return dest_yaw1 - start_yaw1
+
+    def square_equation_numpy(self, a, b, c):
+        D = b**2 - 4 * a * c
+        successCode = D >= 0
+        sqrtD = np.sqrt(np.where(successCode, D, 0))
+        return successCode, (-b + sqrtD)/(2 * a), (-b - sqrtD)/(2 * a)
+
+    def intersection_line_segment_and_line_segment_numpy(self, x1, y1, x2, y2, x3, y3, x4, y4):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # x2 == x1
+            vertical_both = (x1 == x3) & (np.maximum(y1, y2) >= np.minimum(y3, y4)) & (np.maximum(y3, y4) >= np.minimum(y1, y2))
+            dt = (y1 - y3)/ (y4 - y3) - (x1 - x3)/ (x4 - x3)
+            point = np.round(dt, 4) == 0
+            t2 = (x1 - x3)/(x4 - x3)
+            t1 = (y3 - y1 + (y4 - y3) * t2) / (y2 - y1)
+            vertical = self.parameters_in_segments_numpy(t1, t2)
+            vertical = np.where(x4 == x3, vertical_both, np.where(y2 == y1, point, vertical))
+            # x2 != x1
+            parallel = (y2 - y1) * (x4 - x3) == (y4 - y3) * (x2 - x1)
+            overlap = (np.maximum(x1, x2) >= np.minimum(x3, x4)) & (np.maximum(x3, x4) >= np.minimum(x1, x2))
+            t2 = (y3 - y1 - (y2 - y1) * (x3 - x1) / (x2 - x1)) /((y2 - y1) * (x4 - x3)/ (x2 - x1) - (y4 - y3))
+            t1 = (x3 + (x4 - x3) * t2 - x1) / (x2 - x1)
+            general = np.where(parallel, overlap, self.parameters_in_segments_numpy(t1, t2))
+        return np.where(x2 == x1, vertical, general)
+
+    def parameters_in_segments_numpy(self, t1, t2):
+        t1 = np.round(t1, 4)
+        t2 = np.round(t2, 4)
+        return (0 <= t1) & (t1 <= 1) & (0 <= t2) & (t2 <= 1)
+
+    def intersection_line_segment_and_circle_numpy(self, x1, y1, x2, y2, xc, yc, R):
+        a = (x2 - x1)**2 + (y2 - y1)**2
+        b = 2 * (x2 - x1) * (x1 - xc) + 2 * (y2 - y1) * (y1 - yc)
+        c = (x1 - xc)**2 + (y1 - yc)**2 - R**2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            successCode, t1, t2 = self.square_equation_numpy(a, b, c)
+        r1 = np.round(t1, 4)
+        r2 = np.round(t2, 4)
+        return successCode & (((0 <= r1) & (r1 <= 1)) | ((0 <= r2) & (r2 <= 1)) |
+                              ((t1 > 1) & (t2 < 0)) | ((t2 > 1) & (t1 < 0)))
+
+    def intersection_circle_segment_and_circle_numpy(self, x1, y1, x2, y2, x0, y0, CW, xc, yc, R):
+        R0sq = (x1 - x0)**2 + (y1 - y0)**2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # yc == y0
+            xh = (R0sq - R**2 + xc**2 - x0**2)/(2 * (xc - x0))
+            tmp = R0sq - (xh - x0)**2
+            successCodeh = tmp >= 0
+            sqrt_tmp = np.sqrt(np.where(successCodeh, tmp, 0))
+            A = (x0 - xc)/(yc - y0)
+            B = (R0sq - R**2 + xc**2 + yc**2 - x0**2 - y0**2)/(2*(yc - y0))
+            a = 1 + A**2
+            b = 2 * (-A * y0 + A * B - x0)
+            c = x0**2 - R0sq + (B - y0)**2
+            successCode, xp1, xp2 = self.square_equation_numpy(a, b, c)
+            horizontal = yc == y0
+            successCode = np.where(horizontal, successCodeh, successCode)
+            yp1 = np.where(horizontal, y0 + sqrt_tmp, A * xp1 + B)
+            yp2 = np.where(horizontal, y0 - sqrt_tmp, A * xp2 + B)
+            xp1 = np.where(horizontal, xh, xp1)
+            xp2 = np.where(horizontal, xh, xp2)
+        alpha2 = self.coord2yaw_numpy(x2 - x0, y2 - y0)
+        alpha1 = self.coord2yaw_numpy(x1 - x0, y1 - y0)
+        alphap2 = self.coord2yaw_numpy(xp2 - x0, yp2 - y0)
+        alphap1 = self.coord2yaw_numpy(xp1 - x0, yp1 - y0)
+        turn = np.where(CW, alpha1 < alpha2, alpha2 < alpha1)
+        alpha1 = np.where(CW & turn, alpha1 + math.pi * 2, alpha1)
+        alpha2 = np.where(~CW & turn, alpha2 + math.pi * 2, alpha2)
+        alphap1 = np.where(turn & (alphap1 < 0), alphap1 + math.pi * 2, alphap1)
+        alphap2 = np.where(turn & (alphap2 < 0), alphap2 + math.pi * 2, alphap2)
+        low = np.where(CW, alpha2, alpha1)
+        high = np.where(CW, alpha1, alpha2)
+        return successCode & (((low <= alphap1) & (alphap1 <= high)) | ((low <= alphap2) & (alphap2 <= high)))
+
+    def tangent_point_numpy(self, start, xp10, yp10, xp11, yp11, xc1, yc1, xc2, yc2, CW):
+        al0 = self.coord2yaw_numpy(xp10 - xc1, yp10 - yc1)
+        al1 = self.coord2yaw_numpy(xp11 - xc1, yp11 - yc1)
+        da = np.where(CW, -math.pi/2, math.pi/2)
+        directToOtherEnd = self.coord2yaw_numpy(xc2 - xc1, yc2 - yc1)
+        alpha_p10 = np.abs(self.norm_yaw_numpy(da + al0 - directToOtherEnd))
+        alpha_p11 = np.abs(self.norm_yaw_numpy(da + al1 - directToOtherEnd))
+        first = alpha_p10 <= alpha_p11 if start else alpha_p10 >= alpha_p11
+        return np.where(first, xp10, xp11), np.where(first, yp10, yp11)
+
+    def external_tangent_line_numpy(self, start, R1, R2, x1, y1, xc1, yc1, xc2, yc2, CW):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            L = np.sqrt((xc2 - xc1)**2 + (yc2 - yc1)**2)
+            # R1 == R2
+            xe0 = xc1 + (yc2-yc1) * R1 /L
+            xe1 = xc1 - (yc2-yc1) * R1/L
+            ye0 = yc1 - (xc2-xc1) * R1/L
+            ye1 = yc1 + (xc2-xc1) * R1/L
+            L1 = L * R1 / abs(R1 - R2)
+            x0 = (R2 * xc1 - R1 * xc2) / (R2 - R1)
+            y0 = (R2 * yc1 - R1 * yc2) / (R2 - R1)
+            # yc1 == y0
+            xh = (L1**2 - 2 * R1**2 + xc1**2 - x0**2)/(2 * xc1 - 2 * x0)
+            tmp = R1**2 - (xh - xc1)**2
+            successCodeh = tmp >= 0
+            sqrt_tmp = np.sqrt(np.where(successCodeh, tmp, 0))
+            A = (x0 - xc1) / (yc1 - y0)
+            B = (L1**2 - 2 * R1**2 + xc1**2 + yc1**2 - x0**2 - y0**2) / (2 * yc1 - 2 * y0)
+            ap = 1 + A**2
+            bp = 2 * (-A * yc1 + A * B - xc1)
+            cp = xc1**2 + (B - yc1)**2 - R1**2
+            successCode, xg0, xg1 = self.square_equation_numpy(ap, bp, cp)
+            equal = R1 == R2
+            horizontal = yc1 == y0
+            successCode = equal | np.where(horizontal, successCodeh, successCode)
+            xp10 = np.where(equal, xe0, np.where(horizontal, xh, xg0))
+            xp11 = np.where(equal, xe1, np.where(horizontal, xh, xg1))
+            yp10 = np.where(equal, ye0, np.where(horizontal, yc1 + sqrt_tmp, A * xg0 + B))
+            yp11 = np.where(equal, ye1, np.where(horizontal, yc1 - sqrt_tmp, A * xg1 + B))
+            xp1, yp1 = self.tangent_point_numpy(start, xp10, yp10, xp11, yp11, xc1, yc1, xc2, yc2, CW)
+        zero = R1 == 0
+        return successCode | zero, np.where(zero, x1, xp1), np.where(zero, y1, yp1)
+
+    def internal_tangent_line_numpy(self, start, R1, R2, x1, y1, xc1, yc1, xc2, yc2, CW):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            L = np.sqrt((xc2 - xc1)**2 + (yc2 - yc1)**2)
+            L1 = L * R1/(R1 +R2)
+            x3 = xc1 + (xc2 - xc1) * R1 / (R1 + R2)
+            y3 = yc1 + (yc2 - yc1) * R1 / (R1 + R2)
+            A = - (x3 - xc1) / (y3 - yc1)
+            B = ( 2 * R1**2 - L1**2 - xc1**2 + x3**2 - yc1**2 + y3**2)/ 2 /(y3 - yc1)
+            a = 1 + A**2
+            b = 2 * A *(B - yc1) - 2 * xc1
+            c = xc1**2 + (B - yc1)**2 - R1**2
+            successCode, xg0, xg1 = self.square_equation_numpy(a, b, c)
+            # round(y3, 4) == round(yc1, 4)
+            tmp1 = ( R1**2 - L1**2 - xc1**2 + x3**2 - yc1**2 + y3**2)/ 2 /(x3 - xc1)
+            ttt = R1**2 - (tmp1 - xc1)**2
+            successCodeh = ttt >= 0
+            tmp2 = np.sqrt(np.where(successCodeh, ttt, 0))
+            general = np.round(y3, 4) != np.round(yc1, 4)
+            successCode = np.where(general, successCode, successCodeh)
+            xp10 = np.where(general, xg0, tmp1)
+            xp11 = np.where(general, xg1, tmp1)
+            yp10 = np.where(general, A * xg0 + B, yc1 + tmp2)
+            yp11 = np.where(general, A * xg1 + B, yc1 - tmp2)
+            xp1, yp1 = self.tangent_point_numpy(start, xp10, yp10, xp11, yp11, xc1, yc1, xc2, yc2, CW)
+        zero = R1 == 0
+        return successCode | zero, np.where(zero, x1, xp1), np.where(zero, y1, yp1)
+
+    def arc_cycles_numpy(self, delta_yaw, R):
+        """Number of cycles of arcs as while loops of number_Of_Cycles_count, started near the solution."""
+        number_Of_Cycles = np.ceil(np.abs(delta_yaw / 0.2))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimate = np.ceil(R * np.abs(delta_yaw) * 1000 / self.glob.cycle_step_yield * 1.1) - 2
+            number_Of_Cycles = np.maximum(number_Of_Cycles, np.nan_to_num(estimate))
+            while True:
+                stepLength = R * np.abs(delta_yaw / number_Of_Cycles) * 1000 * 64 / self.glob.cycle_step_yield * 1.1
+                too_long = stepLength > 64
+                if not too_long.any(): return number_Of_Cycles
+                number_Of_Cycles = number_Of_Cycles + too_long
+
+    def number_Of_Cycles_count_numpy(self, xs, ys, arcs, yaw1, yaw2):
+        """
+        xs, ys: lists of arrays of coordinates of dest points of path variants.
+        arcs:   list of (R, CW) arrays of arcs of path variants.
+        """
+        prop_yaw_glob1 = self.coord2yaw_numpy(xs[1] - xs[0], ys[1] - ys[0])
+        R, CW = arcs[0]
+        number_Of_Cycles = self.arc_cycles_numpy(self.delta_yaw_numpy(yaw1, prop_yaw_glob1, CW), R)
+        for i in range(0, len(xs), 2):
+            distance = np.sqrt((xs[i+1] - xs[i])**2 + (ys[i+1] - ys[i])**2)
+            number_Of_Cycles = number_Of_Cycles + np.ceil(np.abs(distance / (self.glob.cycle_step_yield/1000)))
+            R, CW = arcs[i//2 + 1]
+            if len(xs) == i+2:
+                prop_yaw_local2 = self.delta_yaw_numpy(prop_yaw_glob1, yaw2, CW)
+            else:
+                prop_yaw_glob2 = self.coord2yaw_numpy(xs[i+3] - xs[i+2], ys[i+3] - ys[i+2])
+                prop_yaw_local2 = self.delta_yaw_numpy(prop_yaw_glob1, prop_yaw_glob2, CW)
+                prop_yaw_glob1 = prop_yaw_glob2
+            number_Of_Cycles = number_Of_Cycles + self.arc_cycles_numpy(prop_yaw_local2, R)
+        return number_Of_Cycles
+
+    def price_circles_numpy(self):
+        """
+        Circles checked by check_Price (ball, obstacles and goal posts) as arrays of columns
+        x, y, radius and prices of collision with initial arc, final arc and line segments 0 and 1.
+        """
+        circles = [(self.glob.ball_coord[0], self.glob.ball_coord[1], ballRadius + roundAboutRadiusIncrement, 0, 200, 200, 200)]
+        for obstacle in self.glob.obstacles:
+            circles.append((obstacle[0], obstacle[1], obstacle[2] / 2 + roundAboutRadiusIncrement, 200, 100, 300, 100))
+        return np.concatenate((np.array(circles, dtype=float).T, self.field.post_circles_numpy), axis=1)
+
+    def check_Price_numpy(self, circles, x1, y1, x2, y2, xs, ys, arcs, goal_bottoms = True):
+        """
+        Price of path variants as check_Price.
+        circles: result of price_circles_numpy or its part.
+        goal_bottoms: if False, intersections with goal bottoms are not priced.
+        x2, y2:  arrays of target coordinates of path variants.
+        xs, ys:  lists of arrays of coordinates of dest points of path variants.
+        arcs:    list of (xc, yc, R, CW) arrays of arcs of path variants.
+        """
+        x2, y2 = x2[:, None], y2[:, None]
+        cx, cy, cR, price_first, price_last, price_line0, price_line1 = circles[:, None, :]
+        ind = len(xs) - 1
+        xc1, yc1, R1, CW1 = (arc[:, None] for arc in arcs[0])
+        xc2, yc2, R2, CW2 = (arc[:, None] for arc in arcs[-1])
+        first = self.intersection_circle_segment_and_circle_numpy(x1, y1, xs[0][:, None], ys[0][:, None], xc1, yc1, CW1,
+                                                                  cx, cy, cR)
+        last = self.intersection_circle_segment_and_circle_numpy(xs[ind][:, None], ys[ind][:, None], x2, y2, xc2, yc2, CW2,
+                                                                 cx, cy, cR)
+        price = first * price_first + last * price_last
+        for i, price_line in zip(range(0, len(xs), 2), (price_line0, price_line1)):
+            line = self.intersection_line_segment_and_circle_numpy(xs[i][:, None], ys[i][:, None], xs[i + 1][:, None],
+                                                                   ys[i + 1][:, None], cx, cy, cR)
+            price = price + line * price_line
+        price = price.sum(axis=1)
+        if goal_bottoms: price += self.check_goal_bottoms_numpy(xs, ys, arcs)
+        return price
+
+    def check_goal_bottoms_numpy(self, xs, ys, arcs):
+        """
+        Price of intersections of path variants with goal bottoms as check_Price.
+        Bottoms of a goal are tested only for variants which bounding boxes overlap the box of the goal.
+        """
+        price = np.zeros(len(xs[0]))
+        x_min, y_min = np.minimum.reduce(xs), np.minimum.reduce(ys)
+        x_max, y_max = np.maximum.reduce(xs), np.maximum.reduce(ys)
+        for xc, yc, R, CW in arcs:
+            x_min, y_min = np.minimum(x_min, xc - R), np.minimum(y_min, yc - R)
+            x_max, y_max = np.maximum(x_max, xc + R), np.maximum(y_max, yc + R)
+        for box, bottoms in self.field.goal_bottoms_numpy:
+            near = np.nonzero((x_min <= box[2]) & (box[0] <= x_max) & (y_min <= box[3]) & (box[1] <= y_max))[0]
+            if not len(near): continue
+            hits = 0
+            for i in range(0, len(xs), 2):
+                hits += 300 * self.intersection_line_segment_and_line_segment_numpy(xs[i][near, None], ys[i][near, None],
+                    xs[i + 1][near, None], ys[i + 1][near, None], bottoms[0], bottoms[1], bottoms[2], bottoms[3]).sum(axis=1)
+            for xc, yc, R, CW in arcs:
+                hits += 300 * self.intersection_line_segment_and_circle_numpy(bottoms[0], bottoms[1], bottoms[2], bottoms[3],
+                    xc[near, None], yc[near, None], R[near, None]).sum(axis=1)
+            price[near] += hits
+        return price
+
+    def price_numpy(self, circles, x1, y1, x2, y2, xs, ys, arcs, cycles, limit):
+        """
+        Returns number_Of_Cycles of path variants: check_Price_numpy plus cycles for variants with cycles
+        not more than limit, inf for others.
+        limit: array of limits of variants or None for no limit.
+        With limit price of collision with ball is checked first, other obstacles and goals are checked
+        only for variants which are not more expensive than limit after it.
+        """
+        if limit is None:
+            return cycles + self.check_Price_numpy(circles, x1, y1, x2, y2, xs, ys, arcs)
+        number_Of_Cycles = np.full(len(cycles), np.inf)
+        priced = np.nonzero(cycles <= limit)[0]
+        number_Of_Cycles[priced] = cycles[priced]
+        for part, goal_bottoms in ((circles[:, :1], False), (circles[:, 1:], True)):
+            if len(priced) == 0: break
+            number_Of_Cycles[priced] += self.check_Price_numpy(part, x1, y1, x2[priced], y2[priced],
+                                                               [x[priced] for x in xs], [y[priced] for y in ys],
+                                                               [tuple(a[priced] for a in arc) for arc in arcs], goal_bottoms)
+            number_Of_Cycles[priced[number_Of_Cycles[priced] > limit[priced]]] = np.inf
+            priced = priced[number_Of_Cycles[priced] <= limit[priced]]
+        return number_Of_Cycles
+
+    def tangent_line_numpy(self, internal):
+        return self.internal_tangent_line_numpy if internal else self.external_tangent_line_numpy
+
+    def arc_path_numpy(self, internal, x1, y1, yaw1, x2, y2, yaw2):
+        """
+        Returns dest, centers, number_Of_Cycles as arc_path_internal (internal = True) or
+        arc_path_external (internal = False).
+        """
+        return self.arc_paths_numpy(internal, x1, y1, yaw1, [(x2, y2, yaw2)])[0]
+
+    def arc_paths_numpy(self, internal, x1, y1, yaw1, targets, limits = None):
+        """
+        Returns list of (dest, centers, number_Of_Cycles) of arc_path_numpy for every target coordinate
+        [x2, y2, yaw2] of targets. Paths to all targets are searched by one set of numpy operations.
+        limits: list of number_Of_Cycles for targets. Path variants with more cycles than limit are not priced
+                by check_Price_numpy as price is not negative.
+        """
+        circles = self.price_circles_numpy()
+        obstacles = np.array(self.glob.obstacles, dtype=float).reshape(-1, 3)
+        number_Of_Targets = len(targets)
+        K = 100 * number_Of_Targets
+        radii = np.arange(10) * 0.05
+        R1 = np.tile(np.repeat(radii, 10), number_Of_Targets)     # order of loops over i and j for every target
+        R2 = np.tile(radii, 10 * number_Of_Targets)
+        x2, y2, yaw2 = (np.repeat(np.array(column, dtype=float), 100) for column in zip(*targets))
+        sin2 = np.repeat([math.sin(target[2]) for target in targets], 100)
+        cos2 = np.repeat([math.cos(target[2]) for target in targets], 100)
+        sin1, cos1 = math.sin(yaw1), math.cos(yaw1)
+        # arc centers are shifted to the right of the robot for clockwise arcs
+        down = (y2-y1) < 0
+        if internal:
+            CW1, CW2 = down, ~down
+        else:
+            CW1, CW2 = ~down, ~down
+        xc1 = np.where(CW1, x1 + R1 * sin1, x1 - R1 * sin1)
+        yc1 = np.where(CW1, y1 - R1 * cos1, y1 + R1 * cos1)
+        xc2 = np.where(CW2, x2 + R2 * sin2, x2 - R2 * sin2)
+        yc2 = np.where(CW2, y2 - R2 * cos2, y2 + R2 * cos2)
+        tangent = self.tangent_line_numpy(internal)
+        successCode1, xp1, yp1 = tangent(True, R1, R2, x1, y1, xc1, yc1, xc2, yc2, CW1)
+        successCode2, xp2, yp2 = tangent(False, R2, R1, x2, y2, xc2, yc2, xc1, yc1, CW2)
+        valid = successCode1 & successCode2
+        # nearest obstacle crossed by connecting line as check_Obstacle
+        roundAboutRadii = obstacles[:, 2] / 2 + roundAboutRadiusIncrement
+        crossed = self.intersection_line_segment_and_circle_numpy(xp1[:, None], yp1[:, None], xp2[:, None], yp2[:, None],
+                                                                  obstacles[:, 0], obstacles[:, 1], roundAboutRadii)
+        detour = crossed.any(axis=1) & valid
+        distances = np.where(crossed, np.sqrt((xp1[:, None] - obstacles[:, 0])**2 + (yp1[:, None] - obstacles[:, 1])**2), np.inf)
+        nearestObstacle = distances.argmin(axis=1) if len(obstacles) else np.zeros(K, dtype=int)
+        limit = np.repeat(np.array(limits, dtype=float), 100) if limits is not None else None
+        # prices of variants: [direct path, around obstacle with CW = CW1, around obstacle with CW = not CW1]
+        number_Of_Cycles = np.full((K, 3), np.inf)
+        variants = {}
+        direct = np.nonzero(valid & ~detour)[0]
+        if len(direct):
+            xs, ys = [xp1[direct], xp2[direct]], [yp1[direct], yp2[direct]]
+            arcs = [(xc1[direct], yc1[direct], R1[direct], CW1[direct]), (xc2[direct], yc2[direct], R2[direct], CW2[direct])]
+            cycles = self.number_Of_Cycles_count_numpy(xs, ys, [arc[2:] for arc in arcs], yaw1, yaw2[direct])
+            number_Of_Cycles[direct, 0] = self.price_numpy(circles, x1, y1, x2[direct], y2[direct], xs, ys, arcs,
+                                                           cycles, limit[direct] if limit is not None else None)
+            variants[0] = (direct, xs, ys, arcs)
+        around = np.nonzero(detour)[0]
+        if len(around):
+            o = obstacles[nearestObstacle[around]]
+            ox, oy, rr = o[:, 0], o[:, 1], o[:, 2] / 2 + roundAboutRadiusIncrement
+            a1, a2, axc1, ayc1, axc2, ayc2 = R1[around], R2[around], xc1[around], yc1[around], xc2[around], yc2[around]
+            aCW1, aCW2, ax2, ay2 = CW1[around], CW2[around], x2[around], y2[around]
+            external, internal_line = self.external_tangent_line_numpy, self.internal_tangent_line_numpy
+            # tangent lines of variants of arc_path_internal and arc_path_external in the same order
+            if internal:
+                lines = [(external, external, internal_line, internal_line), (internal_line, internal_line, external, external)]
+            else:
+                lines = [(external, external, external, external), (internal_line, internal_line, internal_line, internal_line)]
+            for variant in range(2):
+                CW = aCW1 if variant == 0 else ~aCW1
+                line1, line2, line3, line4 = lines[variant]
+                s1, vxp1, vyp1 = line1(True, a1, rr, x1, y1, axc1, ayc1, ox, oy, aCW1)
+                s2, vxp2, vyp2 = line2(False, rr, a1, ax2, ay2, ox, oy, axc1, ayc1, CW)
+                s3, vxp3, vyp3 = line3(True, rr, a2, x1, y1, ox, oy, axc2, ayc2, CW)
+                s4, vxp4, vyp4 = line4(False, a2, rr, ax2, ay2, axc2, ayc2, ox, oy, aCW2)
+                ok = s1 & s2 & s3 & s4
+                xs, ys = [vxp1, vxp2, vxp3, vxp4], [vyp1, vyp2, vyp3, vyp4]
+                arcs = [(axc1, ayc1, a1, aCW1), (ox, oy, rr, CW), (axc2, ayc2, a2, aCW2)]
+                cycles = self.number_Of_Cycles_count_numpy(xs, ys, [arc[2:] for arc in arcs], yaw1, yaw2[around])
+                cycles = np.where(ok, cycles, np.inf)
+                number_Of_Cycles[around, variant + 1] = self.price_numpy(circles, x1, y1, ax2, ay2, xs, ys, arcs,
+                                                                         cycles, limit[around] if limit is not None else None)
+                variants[variant + 1] = (around, xs, ys, arcs)
+        number_Of_Cycles = np.where(np.isnan(number_Of_Cycles), np.inf, number_Of_Cycles).reshape(number_Of_Targets, 300)
+        best = number_Of_Cycles.argmin(axis=1)       # first variant with minimal price as loops of arc_path_internal
+        paths = []
+        for target, (x2, y2, yaw2) in enumerate(targets):
+            number_Of_Cycles_min = number_Of_Cycles[target, best[target]]
+            if not number_Of_Cycles_min < 1000:
+                paths.append(([], [], 1000))
+                continue
+            candidate, variant = divmod(int(best[target]), 3)
+            indices, xs, ys, arcs = variants[variant]
+            k = int(np.searchsorted(indices, target * 100 + candidate))
+            dest = [[float(x[k]), float(y[k])] for x, y in zip(xs, ys)]
+            points = [[x1, y1]] + dest + [[x2, y2]]
+            centers = [[points[2*i][0], points[2*i][1], points[2*i+1][0], points[2*i+1][1],
+                        float(xc[k]), float(yc[k]), float(R[k]), bool(CW[k])] for i, (xc, yc, R, CW) in enumerate(arcs)]
+            paths.append((dest, centers, int(number_Of_Cycles_min)))
+        return paths
+
 
 
 
@@ -746,17 +1650,15 @@ if __name__ == '__main__':
             #        dest = dest1
             #        centers = centers1
             #        number_Of_Cycles = number_Of_Cycles1
+            targets = []
+            penalties = []
             for i in range(5):
                 for j in range(2):
                     target_x = self.glob.ball_coord[0] - (0.21 + j * 0.05) * math.cos(target_yaw - 0.8 + i * 0.4)
                     target_y = self.glob.ball_coord[1] - (0.21 + j * 0.05) * math.sin(target_yaw - 0.8 + i * 0.4)
-                    target_coord = [target_x, target_y, target_yaw]
-                    dest1, centers1, number_Of_Cycles1 = self.p.path_calc_optimum(self.glob.pf_coord, target_coord)
-                    if i != 2: number_Of_Cycles1 += 50
-                    if number_Of_Cycles1 <= number_Of_Cycles:
-                        dest = dest1
-                        centers = centers1
-                        number_Of_Cycles = number_Of_Cycles1
+                    targets.append([target_x, target_y, target_yaw])
+                    penalties.append(0 if i == 2 else 50)
+            dest, centers, number_Of_Cycles, index = self.p.plan_many(self.glob.pf_coord, targets, penalties)
             print('number_Of_Cycles= ', number_Of_Cycles)
             #print('centers =', centers)
             if len(dest)==0: 
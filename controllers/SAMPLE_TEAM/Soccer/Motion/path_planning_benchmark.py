@@ -0,0 +1,348 @@
+"""
+The module is designed by team Robokit of Phystech Lyceum and team Starkit
+of MIPT under mentorship of A. Babaev.
+
+Benchmark of arc path search of PathPlan: pure python arc_path_internal and
+arc_path_external against vectorized arc_path_numpy.
+Scenes are random positions of robot, ball and obstacles on soccer field with
+targets behind the ball as in far_distance_plan_approach. Paths of both searches
+are compared and latency per path of both families of arcs is measured.
+Approach planning of far_distance_plan_approach by loop of path_calc_optimum over
+10 targets around the ball is compared with PathPlan.plan_many.
+Plan cache of plan_many is measured on sequences of approaches where robot, ball
+and obstacles move by few centimeters between consecutive plans.
+Approaches with arc planner only and with grid planner fallback are compared on
+scenes with several obstacles between robot and ball.
+usage from directory controllers/SAMPLE_TEAM:
+    python -m Soccer.Motion.path_planning_benchmark
+"""
+
+import math, random, sys, time
+from pathlib import Path
+
+from . import path_planning
+from .path_planning import PathPlan, np, roundAboutRadiusIncrement, uprightRobotRadius
+from ..Localisation.class_Glob import Glob
+
+
+def random_scenes(number_Of_Scenes, seed = 0):
+    """
+    Returns list of tuples (start_coord, target_coord, ball_coord, obstacles).
+    """
+    rng = random.Random(seed)
+    scenes = []
+    for scene in range(number_Of_Scenes):
+        start_coord = [rng.uniform(-4.5, 4.5), rng.uniform(-3, 3), rng.uniform(-math.pi, math.pi)]
+        ball_coord = [rng.uniform(-4.5, 4.5), rng.uniform(-3, 3)]
+        target_yaw = rng.uniform(-math.pi, math.pi)
+        target_coord = [ball_coord[0] - 0.21 * math.cos(target_yaw), ball_coord[1] - 0.21 * math.sin(target_yaw), target_yaw]
+        obstacles = []
+        for i in range(rng.randrange(5)):
+            # obstacles are placed near line from start to ball in order to force paths around them
+            t = rng.uniform(0.2, 0.8)
+            obstacles.append([start_coord[0] + (ball_coord[0] - start_coord[0]) * t + rng.uniform(-0.3, 0.3),
+                              start_coord[1] + (ball_coord[1] - start_coord[1]) * t + rng.uniform(-0.3, 0.3), 0.2])
+        scenes.append((start_coord, target_coord, ball_coord, obstacles))
+    return scenes
+
+
+def approach_targets(ball_coord, target_yaw):
+    """
+    Returns targets and penalties of far_distance_plan_approach.
+    """
+    targets = []
+    penalties = []
+    for i in range(5):
+        for j in range(2):
+            target_x = ball_coord[0] - (0.21 + j * 0.05) * math.cos(target_yaw - 0.8 + i * 0.4)
+            target_y = ball_coord[1] - (0.21 + j * 0.05) * math.sin(target_yaw - 0.8 + i * 0.4)
+            targets.append([target_x, target_y, target_yaw])
+            penalties.append(0 if i == 2 else 50)
+    return targets, penalties
+
+
+def plan_loop(p, start_coord, targets, penalties):
+    """
+    Returns dest, centers, price, index of loop of path_calc_optimum as it was in far_distance_plan_approach.
+    """
+    dest, centers, price, index = [], [], 1000, -1
+    for k, (target_coord, penalty) in enumerate(zip(targets, penalties)):
+        dest1, centers1, number_Of_Cycles = p.path_calc_optimum(start_coord, target_coord)
+        number_Of_Cycles += penalty
+        if number_Of_Cycles <= price:
+            dest, centers, price, index = dest1, centers1, number_Of_Cycles, k
+    return dest, centers, price, index
+
+
+def max_difference(path, reference):
+    """
+    Returns maximum difference of coordinates of dest and centers of two paths
+    or None if paths have different number of cycles, segments or directions of arcs.
+    """
+    dest, centers, number_Of_Cycles = path
+    ref_dest, ref_centers, ref_number_Of_Cycles = reference
+    if number_Of_Cycles != ref_number_Of_Cycles or len(dest) != len(ref_dest) or len(centers) != len(ref_centers):
+        return None
+    difference = 0.0
+    for point, ref_point in zip(dest, ref_dest):
+        for value, ref_value in zip(point, ref_point):
+            difference = max(difference, math.fabs(value - ref_value))
+    for center, ref_center in zip(centers, ref_centers):
+        if center[7] != ref_center[7]: return None
+        for value, ref_value in zip(center[:7], ref_center[:7]):
+            difference = max(difference, math.fabs(value - ref_value))
+    return difference
+
+
+def benchmark(current_work_directory, number_Of_Scenes = 200):
+    """
+    Compares arc_path_numpy with pure python arc paths of random scenes.
+    Returns number of failures: different paths and scenes failed in search.
+    """
+    glob = Glob(0, current_work_directory)
+    p = PathPlan(glob)
+    searches = {'python': lambda internal, *coords: (p.arc_path_internal if internal else p.arc_path_external)(*coords)}
+    if np is not None: searches['numpy'] = p.arc_path_numpy
+    else: print('numpy is not installed')
+    scenes = random_scenes(number_Of_Scenes)
+    print('scenes:', len(scenes))
+    reference = {}
+    failures = 0
+    for name, search in searches.items():
+        latencies = []
+        mismatches = 0
+        failed = 0
+        difference = 0.0
+        for number, (start_coord, target_coord, ball_coord, obstacles) in enumerate(scenes):
+            glob.ball_coord = ball_coord
+            glob.obstacles = obstacles
+            start = time.perf_counter()
+            try:
+                paths = [search(internal, *start_coord, *target_coord) for internal in (True, False)]
+            except ZeroDivisionError:     # degenerate geometry of pure python search
+                failed += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1e3)
+            if name == 'python':
+                reference[number] = paths
+            elif number in reference:
+                for path, ref in zip(paths, reference[number]):
+                    path_difference = max_difference(path, ref)
+                    if path_difference is None: mismatches += 1
+                    else: difference = max(difference, path_difference)
+        latencies.sort()
+        print('{:8s} mean {:8.2f} ms, median {:8.2f} ms, max {:8.2f} ms, '
+              'different paths: {}, max coordinate difference: {:.2e} m'.format(
+                name, sum(latencies) / len(latencies), latencies[len(latencies) // 2],
+                latencies[-1], mismatches, difference))
+        if mismatches or failed:
+            print('FAILED: {} search, different paths: {}, scenes failed in search: {}'.format(name, mismatches, failed))
+        failures += mismatches + failed
+    return failures
+
+
+def benchmark_approach(current_work_directory, number_Of_Scenes = 100):
+    """
+    Compares plan_many with loop of path_calc_optimum over approach targets.
+    Returns number of failures: different plans and scenes failed in search.
+    """
+    glob = Glob(0, current_work_directory)
+    p = PathPlan(glob)
+    planners = {'loop': lambda *args: plan_loop(p, *args), 'plan_many': p.plan_many}
+    scenes = random_scenes(number_Of_Scenes, seed = 1)
+    print('approaches:', len(scenes))
+    collision_price = path_planning.gridPlanCollisionPrice
+    path_planning.gridPlanCollisionPrice = None     # loop of path_calc_optimum has no grid planner fallback
+    reference = {}
+    failures = 0
+    for name, planner in planners.items():
+        latencies = []
+        mismatches = 0
+        failed = 0
+        for number, (start_coord, target_coord, ball_coord, obstacles) in enumerate(scenes):
+            glob.ball_coord = ball_coord
+            glob.obstacles = obstacles
+            targets, penalties = approach_targets(ball_coord, target_coord[2])
+            start = time.perf_counter()
+            try:
+                result = planner(start_coord, targets, penalties)
+            except ZeroDivisionError:     # degenerate geometry of pure python search
+                failed += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1e3)
+            if name == 'loop': reference[number] = result
+            elif number in reference and (result[0] != reference[number][0] or result[1] != reference[number][1] or
+                                          result[2:] != reference[number][2:]):
+                mismatches += 1
+        latencies.sort()
+        print('{:10s} mean {:8.2f} ms, median {:8.2f} ms, max {:8.2f} ms, different plans: {}'.format(
+                name, sum(latencies) / len(latencies), latencies[len(latencies) // 2], latencies[-1], mismatches))
+        if mismatches or failed:
+            print('FAILED: {}, different plans: {}, scenes failed in search: {}'.format(name, mismatches, failed))
+        failures += mismatches + failed
+    path_planning.gridPlanCollisionPrice = collision_price
+    return failures
+
+
+def approach_sequences(number_Of_Sequences, length = 10, seed = 2, jump_probability = 0.0):
+    """
+    Returns list of sequences of scenes of random_scenes where robot goes to the ball and
+    ball and obstacles move by up to 1 cm between consecutive scenes. With jump_probability
+    obstacle moves instead by 0.1 to 0.5 m in random direction.
+    """
+    rng = random.Random(seed)
+    sequences = []
+    for start_coord, target_coord, ball_coord, obstacles in random_scenes(number_Of_Sequences, seed):
+        sequence = []
+        for step in range(length):
+            sequence.append(([x for x in start_coord], target_coord, [x for x in ball_coord], [list(obstacle) for obstacle in obstacles]))
+            direction = math.atan2(ball_coord[1] - start_coord[1], ball_coord[0] - start_coord[0])
+            shift = rng.uniform(0, 0.03)
+            start_coord = [start_coord[0] + shift * math.cos(direction), start_coord[1] + shift * math.sin(direction),
+                           start_coord[2] + rng.uniform(-0.01, 0.01)]
+            ball_coord = [ball_coord[0] + rng.uniform(-0.01, 0.01), ball_coord[1] + rng.uniform(-0.01, 0.01)]
+            for obstacle in obstacles:
+                if jump_probability > 0 and rng.random() < jump_probability:
+                    direction, shift = rng.uniform(-math.pi, math.pi), rng.uniform(0.1, 0.5)
+                    obstacle[0] += shift * math.cos(direction)
+                    obstacle[1] += shift * math.sin(direction)
+                    continue
+                obstacle[0] += rng.uniform(-0.01, 0.01)
+                obstacle[1] += rng.uniform(-0.01, 0.01)
+        sequences.append(sequence)
+    return sequences
+
+
+def plan_collides(p, plan, obstacles, radius_increment = roundAboutRadiusIncrement):
+    dest, centers, number_Of_Cycles, index = plan
+    return any(p.path_touches_circle(dest, centers, obstacle[0], obstacle[1], obstacle[2] / 2 + radius_increment)
+               for obstacle in obstacles)
+
+
+def moved_obstacles(p, obstacles, cached_obstacles):
+    """
+    Returns obstacles which are not close to cached obstacle of the same size as in PathPlan.cached_plan_is_valid.
+    """
+    unmatched = list(cached_obstacles)
+    moved = []
+    for obstacle in obstacles:
+        for cached_obstacle in unmatched:
+            if cached_obstacle[2] == obstacle[2] and p.coord_is_close(obstacle[:2], cached_obstacle[:2]):
+                unmatched.remove(cached_obstacle)
+                break
+        else: moved.append(obstacle)
+    return moved
+
+
+def benchmark_cache(current_work_directory, number_Of_Sequences = 30):
+    """
+    Compares plan_many with cache and search_many on sequences of approaches with drifting obstacles and
+    with obstacles which jump farther than planCachePositionTolerance.
+    Returns number of failures: revalidated cached plans which collide with obstacles moved since planning,
+    inflated by uprightRobotRadius as in grid_plan, while uncached plans do not collide with them.
+    """
+    failures = 0
+    for name, jump_probability in (('drifting obstacles', 0.0), ('jumping obstacles', 0.2)):
+        glob = Glob(0, current_work_directory)
+        p = PathPlan(glob)
+        sequences = approach_sequences(number_Of_Sequences, jump_probability = jump_probability)
+        print('sequences of approaches with {}:'.format(name), len(sequences), 'x', len(sequences[0]))
+        latencies = {'cached': [], 'uncached': []}
+        price_difference = 0
+        collisions = 0
+        failed = 0
+        for sequence in sequences:
+            for start_coord, target_coord, ball_coord, obstacles in sequence:
+                glob.ball_coord = ball_coord
+                glob.obstacles = obstacles
+                targets, penalties = approach_targets(ball_coord, target_coord[2])
+                revalidations = p.cache_revalidations
+                try:
+                    start = time.perf_counter()
+                    plan = p.plan_many(start_coord, targets, penalties)
+                    latencies['cached'].append((time.perf_counter() - start) * 1e3)
+                    start = time.perf_counter()
+                    reference = p.search_many(start_coord, targets, penalties)
+                    latencies['uncached'].append((time.perf_counter() - start) * 1e3)
+                except ZeroDivisionError:     # degenerate geometry of pure python search
+                    failed += 1
+                    continue
+                price_difference = max(price_difference, abs(plan[2] - reference[2]))
+                if p.cache_revalidations > revalidations:
+                    entry = p.plan_cache[next(reversed(p.plan_cache))]
+                    moved = moved_obstacles(p, obstacles, entry['obstacles'])
+                    if (plan_collides(p, plan, moved, uprightRobotRadius) and
+                        not plan_collides(p, reference, moved, uprightRobotRadius)): collisions += 1
+        for latency_name, values in latencies.items():
+            print('{:10s} mean {:8.2f} ms'.format(latency_name, sum(values) / len(values)))
+        statistics = p.cache_statistics()
+        print('hit rate {:.2f}, revalidated hits {}, saved time {:.2f} s, max difference of price to uncached plan: {}, '
+              'revalidated hits colliding unlike uncached plan: {}'.format(statistics['hit_rate'], statistics['revalidations'],
+                statistics['saved_time'], price_difference, collisions))
+        if collisions or failed:
+            print('FAILED: {}, revalidated hits colliding unlike uncached plan: {}, scenes failed in search: {}'.format(
+                    name, collisions, failed))
+        failures += collisions + failed
+    return failures
+
+
+def dense_scenes(number_Of_Scenes, seed = 3):
+    """
+    Returns list of scenes of random_scenes on Sim field with 4 to 7 obstacles between robot and ball.
+    Robot does not start inside of obstacle, obstacles are not closer than 0.5 m to the ball.
+    """
+    rng = random.Random(seed)
+    scenes = []
+    while len(scenes) < number_Of_Scenes:
+        start_coord = [rng.uniform(-1.6, 1.6), rng.uniform(-1.2, 1.2), rng.uniform(-math.pi, math.pi)]
+        ball_coord = [rng.uniform(-1.6, 1.6), rng.uniform(-1.2, 1.2)]
+        if math.sqrt((ball_coord[0] - start_coord[0])**2 + (ball_coord[1] - start_coord[1])**2) < 1: continue
+        target_yaw = rng.uniform(-math.pi, math.pi)
+        target_coord = [ball_coord[0] - 0.21 * math.cos(target_yaw), ball_coord[1] - 0.21 * math.sin(target_yaw), target_yaw]
+        obstacles = []
+        while len(obstacles) < rng.randrange(4, 8):
+            t = rng.uniform(0.2, 0.8)
+            obstacle = [start_coord[0] + (ball_coord[0] - start_coord[0]) * t + rng.uniform(-0.4, 0.4),
+                        start_coord[1] + (ball_coord[1] - start_coord[1]) * t + rng.uniform(-0.4, 0.4), 0.2]
+            if (math.sqrt((obstacle[0] - start_coord[0])**2 + (obstacle[1] - start_coord[1])**2) > 0.4 and
+                math.sqrt((obstacle[0] - ball_coord[0])**2 + (obstacle[1] - ball_coord[1])**2) > 0.5): obstacles.append(obstacle)
+        scenes.append((start_coord, target_coord, ball_coord, obstacles))
+    return scenes
+
+
+def benchmark_dense(current_work_directory, number_Of_Scenes = 100):
+    glob = Glob(0, current_work_directory)
+    p = PathPlan(glob)
+    scenes = dense_scenes(number_Of_Scenes)
+    print('approaches with dense obstacles:', len(scenes))
+    collision_price = path_planning.gridPlanCollisionPrice
+    for name, price in (('arc', None), ('arc+grid', collision_price)):
+        path_planning.gridPlanCollisionPrice = price
+        latencies = []
+        collisions = 0
+        prices = []
+        for start_coord, target_coord, ball_coord, obstacles in scenes:
+            glob.ball_coord = ball_coord
+            glob.obstacles = obstacles
+            targets, penalties = approach_targets(ball_coord, target_coord[2])
+            start = time.perf_counter()
+            dest, centers, number_Of_Cycles, index = p.search_many(start_coord, targets, penalties)
+            latencies.append((time.perf_counter() - start) * 1e3)
+            prices.append(number_Of_Cycles)
+            if len(dest) == 0 or any(p.path_touches_circle(dest, centers, obstacle[0], obstacle[1], obstacle[2] / 2 + roundAboutRadiusIncrement)
+                                     for obstacle in obstacles):
+                collisions += 1
+        latencies.sort()
+        prices.sort()
+        print('{:10s} mean {:8.2f} ms, median {:8.2f} ms, max {:8.2f} ms, median price {}, '
+              'plans colliding with obstacles or empty: {}'.format(name, sum(latencies) / len(latencies),
+                latencies[len(latencies) // 2], latencies[-1], prices[len(prices) // 2], collisions))
+    path_planning.gridPlanCollisionPrice = collision_price
+
+
+if __name__ == "__main__":
+    failures = benchmark(Path(__file__).resolve().parents[2])
+    failures += benchmark_approach(Path(__file__).resolve().parents[2])
+    failures += benchmark_cache(Path(__file__).resolve().parents[2])
+    benchmark_dense(Path(__file__).resolve().parents[2])
+    if failures: sys.exit(1)
@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 # -*- coding:utf-8 -*-
 
-from construct import Byte, Struct, Enum, Bytes, Const, Array, Int16ul, Int32ul, PaddedString, Flag, Int16sl
+import struct
+
+from construct import Byte, Struct, Enum, EnumInteger, Bytes, Const, Array, Int16ul, Int32ul, PaddedString, Flag, Int16sl
 
 Short = Int16ul
 
@@ -94,3 +96,126 @@ ReturnData = Struct(
     "player" / Byte,
     "message" / Byte
 )
+
+
+# Codec of GameState packets built on a precompiled struct layout, parsing with construct is much slower.
+# Packets are decoded into objects with the attribute names of the construct definition above, which also
+# support item access (state['teams']) like construct containers. Coach messages are decoded on first access.
+
+GAME_STATE_HEADER = b'RGme'
+GAME_STATE_VERSION = 12
+_ROBOT_INFO_FORMAT = '6B'
+_TEAM_INFO_FORMAT = '4BHB253s' + _ROBOT_INFO_FORMAT * 12
+_GAME_STATE_STRUCT = struct.Struct('<4sH7B4sBHhh' + _TEAM_INFO_FORMAT * 2)
+GAME_STATE_SIZE = _GAME_STATE_STRUCT.size
+_HEADER_VALUES = 14
+_TEAM_VALUES = 7 + 6 * 12
+
+
+def _field_names(construct_struct):
+    return tuple(subcon.name for subcon in construct_struct.subcon.subcons if subcon.name not in ['header', 'version'])
+
+
+def _enum_tables(construct_struct, name):
+    """Tables of an Enum field: decoded value of every byte (same objects as construct) and byte of every name."""
+    enum = getattr(construct_struct.subcon, name).subcon
+    return [enum.decmapping.get(value, EnumInteger(value)) for value in range(256)], dict(enum.encmapping)
+
+
+def _enum_value(encoding, value):
+    return value if isinstance(value, int) else encoding[value]
+
+
+class _Record:
+    __slots__ = ()
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({fields})'
+
+
+class RobotInfoData(_Record):
+    _fields = _field_names(RobotInfo)
+    __slots__ = _fields
+
+    def __init__(self, values):
+        self.penalty, self.secs_till_unpenalized, self.number_of_warnings, self.number_of_yellow_cards, \
+            self.number_of_red_cards, goalkeeper = values
+        self.goalkeeper = goalkeeper != 0
+
+
+class TeamInfoData(_Record):
+    _fields = _field_names(TeamInfo)
+    __slots__ = tuple(name for name in _fields if name != 'coach_message') + ('_coach_message', '_coach_message_bytes')
+    _team_colors, _team_color_values = _enum_tables(TeamInfo, 'team_color')
+
+    def __init__(self, values):
+        self.team_number, team_color, self.score, self.penalty_shot, self.single_shots, self.coach_sequence, \
+            self._coach_message_bytes = values[:7]
+        self.team_color = self._team_colors[team_color]
+        self._coach_message = None
+        self.coach = RobotInfoData(values[7:13])
+        self.players = [RobotInfoData(values[i:i + 6]) for i in range(13, _TEAM_VALUES, 6)]
+
+    @property
+    def coach_message(self):
+        if self._coach_message is None:
+            self._coach_message = self._coach_message_bytes.rstrip(b'\x00').decode('utf8')
+        return self._coach_message
+
+
+class GameStateData(_Record):
+    _fields = _field_names(GameState)
+    __slots__ = _fields
+    _game_states, _game_state_values = _enum_tables(GameState, 'game_state')
+    _secondary_states, _secondary_state_values = _enum_tables(GameState, 'secondary_state')
+
+    def __init__(self, values):
+        (self.packet_number, self.players_per_team, self.game_type, game_state, first_half, kickoff_team,
+         secondary_state, self.secondary_state_info, drop_in_team, self.drop_in_time, self.seconds_remaining,
+         self.secondary_seconds_remaining) = values[2:_HEADER_VALUES]
+        setattr(self, self._fields[5], kickoff_team)
+        self.game_state = self._game_states[game_state]
+        self.first_half = first_half != 0
+        self.secondary_state = self._secondary_states[secondary_state]
+        self.drop_in_team = drop_in_team != 0
+        self.teams = [TeamInfoData(values[_HEADER_VALUES:_HEADER_VALUES + _TEAM_VALUES]),
+                      TeamInfoData(values[_HEADER_VALUES + _TEAM_VALUES:])]
+
+
+def parse_game_state(data):
+    """Decode a GameState packet, raise ValueError if it is not a GameState packet of the supported version."""
+    if len(data) < GAME_STATE_SIZE:
+        raise ValueError(f'GameState packet too short: {len(data)} bytes')
+    values = _GAME_STATE_STRUCT.unpack_from(data)
+    if values[0] != GAME_STATE_HEADER or values[1] != GAME_STATE_VERSION:
+        raise ValueError(f'Not a GameState packet of version {GAME_STATE_VERSION}: {values[0]} {values[1]}')
+    return GameStateData(values)
+
+
+def _robot_info_values(robot):
+    return (robot.penalty, robot.secs_till_unpenalized, robot.number_of_warnings, robot.number_of_yellow_cards,
+            robot.number_of_red_cards, 1 if robot.goalkeeper else 0)
+
+
+def build_game_state(state):
+    """Encode a GameState packet from GameStateData, a construct Container or any object with the same attributes."""
+    values = [GAME_STATE_HEADER, GAME_STATE_VERSION, state.packet_number, state.players_per_team, state.game_type,
+              _enum_value(GameStateData._game_state_values, state.game_state), 1 if state.first_half else 0,
+              getattr(state, GameStateData._fields[5]),
+              _enum_value(GameStateData._secondary_state_values, state.secondary_state),
+              bytes(state.secondary_state_info), 1 if state.drop_in_team else 0, state.drop_in_time,
+              state.seconds_remaining, state.secondary_seconds_remaining]
+    for team in state.teams:
+        coach_message = team.coach_message.encode('utf8')
+        if len(coach_message) > 253:
+            raise ValueError('Coach message longer than 253 bytes')
+        values += [team.team_number, _enum_value(TeamInfoData._team_color_values, team.team_color), team.score,
+                   team.penalty_shot, team.single_shots, team.coach_sequence, coach_message]
+        values += _robot_info_values(team.coach)
+        for player in team.players:
+            values += _robot_info_values(player)
+    return _GAME_STATE_STRUCT.pack(*values)
@@ -20,8 +20,8 @@ import argparse
 import threading
 
 # Requires construct==2.5.3
-from construct import Container, ConstError
-from gamestate import GameState, ReturnData, GAME_CONTROLLER_RESPONSE_VERSION
+from construct import Container
+from gamestate import GAME_STATE_SIZE, ReturnData, parse_game_state, GAME_CONTROLLER_RESPONSE_VERSION
 
 logger = logging.getLogger('game_controller')
 logger.setLevel(logging.DEBUG)
@@ -92,11 +92,11 @@ class GameStateReceiver(object):
             Calls :func:`on_new_gamestate`
             Sends an answer to the GC """
         try:
-            data, peer = self.socket.recvfrom(GameState.sizeof())
+            data, peer = self.socket.recvfrom(GAME_STATE_SIZE)
 
             #print(len(data))
-            # Throws a ConstError if it doesn't work
-            parsed_state = GameState.parse(data)
+            # Throws a ValueError if it doesn't work
+            parsed_state = parse_game_state(data)
 
             # Assign the new package after it parsed successful to the state
             self.state = parsed_state
@@ -112,7 +112,7 @@ class GameStateReceiver(object):
             logger.error(ae.message)
         except socket.timeout:
             logger.warning("Socket timeout")
-        except ConstError:
+        except ValueError:
             logger.warning("Parse Error: Probably using an old protocol!")
         except Exception as e:
             logger.exception(e)
@@ -131,7 +131,7 @@ class GameStateReceiver(object):
             player=self.player,
             message=return_message)
         try:
-            destination = peer[0], GAME_CONTROLLER_ANSWER_PORT
+            destination = peer[0], self.answer_port
             self.socket.sendto(ReturnData.build(data), destination)
         except Exception as e:
             logger.log("Network Error: %s" % str(e))
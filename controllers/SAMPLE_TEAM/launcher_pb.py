@@ -6,26 +6,29 @@ The module is designed for strategy of soccer game by forward and goalkeeper.
 
 import time
 import logging
-from gcreceiver import ThreadedGameStateReceiver
+from gcreceiver import ThreadedGameStateReceiver, DEFAULT_LISTENING_HOST, GAME_CONTROLLER_LISTEN_PORT, GAME_CONTROLLER_ANSWER_PORT
 from Soccer.Localisation.class_Glob import Glob
 from Soccer.Localisation.class_Local import *
 from Soccer.strategy import Player
 from Soccer.Motion.class_Motion_Webots_PB import Motion_sim
 
 
-def init_gcreceiver(team, player, is_goalkeeper):
+def init_gcreceiver(team, player, is_goalkeeper, port = GAME_CONTROLLER_LISTEN_PORT, answer_port = GAME_CONTROLLER_ANSWER_PORT):
     """
     The function creates and object receiver of Game Controller messages. Game Controller messages are broadcasted to 
     teams and to referee. Format of messages can be seen in module gamestate.py. Messages from Game Controller 
     contains Robot info, Team info and Game state info.
     usage of function:
-        object: receiver = init_gcreceiver(int: team, int: player, bool: is_goalkeeper)
+        object: receiver = init_gcreceiver(int: team, int: player, bool: is_goalkeeper[, int: port, int: answer_port])
             team - number of team id. For junior competitions it is recommended to use unique id
                    for team in range 60 - 127
             player - number of player displayed at his trunk
             is_goalkeeper - True if player is appointed to play role of goalkeeper
+            port - UDP port of Game Controller messages
+            answer_port - UDP port of Game Controller for answers of player
     """
-    receiver = ThreadedGameStateReceiver(team, player, is_goalkeeper)    
+    receiver = ThreadedGameStateReceiver(team, player, is_goalkeeper, addr = (DEFAULT_LISTENING_HOST, port),
+                                         answer_port = answer_port)
     receiver.start() # Strat receiving and answering
     return receiver
 
@@ -70,7 +73,9 @@ def player_super_cycle(falling, team_id, robot_color, player_number, SIMULATION,
     initial_coord_forward_at_penalty = team_data['players']['2']['shootoutStartingPose']['pf_coord']
     if player_number == 1: is_goalkeeper = True
     else: is_goalkeeper = False
-    receiver = init_gcreceiver(team_id, player_number, is_goalkeeper)
+    receiver = init_gcreceiver(team_id, player_number, is_goalkeeper,
+                               game_data.get('game_state_port', GAME_CONTROLLER_LISTEN_PORT),
+                               game_data.get('game_controller_answer_port', GAME_CONTROLLER_ANSWER_PORT))
     robot.receiver = receiver
     former_game_state = 'STATE_SET'
     former_player_penalty = 0
@@ -114,7 +114,14 @@ def main_procedure():
     Port = sys.argv[1]
     logger.info('port = %s', Port)
     logarg =  log.get_logger('communication_manager')
-    robot = CommunicationManager(1, '127.0.0.1', int(Port), logarg, team_color=sys.argv[3].upper(), player_number = int(sys.argv[4]), time_step = 25)
+    # noise of simulated vision and localization is repeatable if game.json has noise_seed,
+    # every robot has its own noise stream derived from team color and player number
+    noise_seed = game_data.get('noise_seed')
+    if noise_seed is not None:
+        noise_seed = [int(noise_seed), ['RED', 'BLUE'].index(sys.argv[3].upper()), int(sys.argv[4])]
+        logger.info('noise seed = %s', noise_seed)
+    robot = CommunicationManager(1, '127.0.0.1', int(Port), logarg, team_color=sys.argv[3].upper(), player_number = int(sys.argv[4]), time_step = 25,
+                                 seed = noise_seed)
 
     falling = Falling()
 
@@ -1,6 +1,32 @@
 
+import os
 import json
-import random
+import numpy as np
+
+BLURRER_PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blurrer.json")
+
+_params_cache = {}
+
+
+def load_params(filename=BLURRER_PARAMS_FILE) -> dict:
+    """Read blurrer parameters from json file. File is parsed only once,
+    subsequent calls return cached parameters.
+
+    Args:
+        filename (str, optional): path to json file. Defaults to blurrer.json
+            located near this module.
+
+    Returns:
+        dict: copy of parameters.
+    """
+    filename = os.path.abspath(filename)
+    params = _params_cache.get(filename)
+    if params is None:
+        with open(filename) as f:
+            params = json.load(f)
+        _params_cache[filename] = params
+    return dict(params)
+
 
 class Blurrer():
     """Simulate localization and vision noize. 
@@ -24,11 +50,17 @@ class Blurrer():
             Defaults to 0..
         loc_noize_meters (float, optional): Multiplier for consistency, in 
             meters. Defaults to 0. Defaults to 0..
+        seed (int or list of ints, optional): Seed of noise generator as
+            accepted by numpy.random.default_rng. Blurrers with equal seeds
+            produce equal noise. Defaults to None (random seed).
+        block_size (int, optional): Number of noise samples drawn from
+            generator at once. Defaults to 1024.
     """
 
     def __init__(self, object_angle_noize=0., object_distance_noize=0.,
                  observation_bonus=0., step_cost=0., 
-                 constant_loc_noize=0., loc_noize_meters=0.):
+                 constant_loc_noize=0., loc_noize_meters=0.,
+                 seed=None, block_size=1024):
 
         self.object_angle_noize = object_angle_noize
         self.object_distance_noize = object_distance_noize
@@ -37,15 +69,19 @@ class Blurrer():
         self.constant_loc_noize = constant_loc_noize
         self.loc_noize_meters = loc_noize_meters
 
-        params = self.load_json("../player/blurrer.json")
+        self.load_json(BLURRER_PARAMS_FILE)
+
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.noise = []
+        self.noise_index = 0
 
         self.consistency = 1
         self.receiver = None
         #penalty = self.receiver.player_state.penalty
 
     def load_json(self, filename):
-        with open(filename) as f:
-            params = json.load(f)
+        params = load_params(filename)
 
         self.object_angle_noize = params["object_angle_noize"]
         self.object_distance_noize = params["object_distance_noize"]
@@ -54,11 +90,50 @@ class Blurrer():
         self.constant_loc_noize = params["constant_loc_noize"]
         self.loc_noize_meters = params["loc_noize_meters"]
 
+    def uniform(self) -> float:
+        """Next noise sample uniformly distributed from -1 to 1.
+        Samples are taken from block drawn in advance, block is refilled
+        when it is exhausted.
+        """
+        if self.noise_index >= len(self.noise):
+            self.noise = self.rng.uniform(-1., 1., self.block_size).tolist()
+            self.noise_index = 0
+        value = self.noise[self.noise_index]
+        self.noise_index += 1
+        return value
+
+    def uniform_array(self, size) -> np.ndarray:
+        """Next size noise samples uniformly distributed from -1 to 1,
+        taken from the same sequence as uniform().
+        """
+        values = self.noise[self.noise_index:self.noise_index + size]
+        self.noise_index += len(values)
+        while len(values) < size:
+            self.noise = self.rng.uniform(-1., 1., self.block_size).tolist()
+            self.noise_index = min(size - len(values), self.block_size)
+            values += self.noise[:self.noise_index]
+        return np.array(values)
+
     def course(self, angle):
-        return angle + random.uniform(-self.object_angle_noize, self.object_angle_noize)
+        return angle + self.object_angle_noize * self.uniform()
 
     def distance(self, distance):
-        return distance * (1 + random.uniform(-self.object_distance_noize, self.object_distance_noize))
+        return distance * (1 + self.object_distance_noize * self.uniform())
+
+    def objects_batch(self, courses, distances):
+        """Vectorized course and distance noise for several objects,
+        noise is drawn by one call of random generator.
+
+        Args:
+            courses (np.ndarray): ground truth courses.
+            distances (np.ndarray): ground truth distances.
+
+        Returns:
+            tuple: (courses, distances) arrays with noise.
+        """
+        noise = self.uniform_array(2 * len(courses)).reshape(2, len(courses))
+        return (courses + self.object_angle_noize * noise[0],
+                distances * (1 + self.object_distance_noize * noise[1]))
 
     def objects(self, course=course, distance=distance):
         return (self.course(course), self.distance(distance))
@@ -68,7 +143,7 @@ class Blurrer():
 
     def coord(self, p):
         random_factor = 1 - self.consistency
-        return p + self.loc_noize_meters * random.uniform(-random_factor, random_factor)
+        return p + self.loc_noize_meters * random_factor * self.uniform()
 
     def step(self):
         self.update_consistency(-self.step_cost)
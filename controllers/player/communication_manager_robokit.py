@@ -1,34 +1,54 @@
 """ Class that provides communication with simulator Webots.
 """
 import time
+import socket
+import selectors
 from threading import Thread, Lock
 from robot_client import RobotClient
 
 from blurrer import Blurrer
 from model_robokit import Model
+from latency_counter import LatencyCounter
+from sim_clock import SimClock
+from sensor_records import SensorRecords
+from sensor_history import SensorHistory
 import logging
 
 class CommunicationManager():
-    def __init__(self, maxsize=1, host='127.0.0.1', port=10001, logger = logging, team_color="RED", player_number=1, time_step=15):
+    def __init__(self, maxsize=1, host='127.0.0.1', port=10001, logger = logging, team_color="RED", player_number=1, time_step=15,
+                 history_size=64, seed=None):
         self.__client = RobotClient(host, port, logger)
         self.__client.connect_client()
         self.maxsize = maxsize
-        self.__sensors = {}
+        self.__records = SensorRecords()
+        self.history_size = history_size
         self.robot_color = team_color
         self.robot_number = player_number
         self.time_step = time_step
         self.tx_mutex = Lock()
         self.tx_message = {}
+        self.tx_queue_time = 0
+        self.latency = {"queue_to_wire": LatencyCounter(),
+                        "wire_to_history": LatencyCounter()}
+        # socketpair is used instead of os.pipe because select() on Windows
+        # works only with sockets
+        self.__wakeup_receiver, self.__wakeup_sender = socket.socketpair()
+        self.__wakeup_receiver.setblocking(False)
+        self.__wakeup_pending = False
+        self.__selector = selectors.DefaultSelector()
         self.__last_message = {}
         self.last_head_yaw = 0
         self.last_head_pitch = 0
-        self.__blurrer = Blurrer()
+        self.__blurrer = Blurrer(seed=seed)
         self.__model = Model(self.__blurrer)
         self.current_time = 0
+        self.clock = SimClock()
         self.sensor_time_step = time_step * 4
         self.logger = logger
         sensors = {"imu_body": self.time_step, "recognition": self.sensor_time_step, "gps_body": self.sensor_time_step}
         self.enable_sensors(sensors)
+        self.__selector.register(self.__client.socket, selectors.EVENT_READ)
+        self.__selector.register(self.__wakeup_receiver, selectors.EVENT_READ)
         self.thread = Thread(target=self.run)
         self.thread.start()
 
@@ -36,51 +56,134 @@ class CommunicationManager():
         for sensor in sensors:
             self.__client.initial(sensor, sensors[sensor])
             if sensor == "recognition":
-                self.__sensors.update({"BALL": {}})
-                self.__sensors.update({"RED_PLAYER_1": {}})
-                self.__sensors.update({"RED_PLAYER_2": {}})
-                self.__sensors.update({"BLUE_PLAYER_1": {}})
-                self.__sensors.update({"BLUE_PLAYER_2": {}})
-
-            self.__sensors.update({str(sensor): {}})
-        self.__sensors.update({"time": {}})
+                for name in ("BALL", "RED_PLAYER_1", "RED_PLAYER_2", "BLUE_PLAYER_1", "BLUE_PLAYER_2"):
+                    self.__records.add(name, history=SensorHistory(self.history_size, 2))
+                self.__records.add(str(sensor))
+            elif sensor.startswith("imu"):
+                self.__records.add(sensor, history=SensorHistory(self.history_size, 3, angles=True))
+            elif sensor.startswith("gps"):
+                self.__records.add(sensor, history=SensorHistory(self.history_size, 2))
+            else:
+                self.__records.add(str(sensor))
         self.__client.send_request("init")
 
     def __get_sensor(self, name) -> dict:
-        return self.__sensors[name]
+        return self.__records.as_dict(name)
+
+    def __get_sensor_at(self, name, sim_time) -> dict:
+        record = self.__records.get(name)
+        if record is None or record.history is None:
+            return self.__get_sensor(name)
+        position = record.history.at(sim_time)
+        if position is None:
+            return {}
+        return {"position": list(position), "time": sim_time}
+
+    def get_history(self, name) -> SensorHistory:
+        """Provide history of measurements of sensor or recognised object
+        with at(sim_ms) and window(ms) queries. History is kept for imu,
+        gps and objects of 'recognition' sensor.
+
+        Args:
+            name (str): sensor or object name, e.g. "imu_body" or "BALL".
+
+        Returns:
+            SensorHistory: history or None if it is not kept for the sensor.
+        """
+        record = self.__records.get(name)
+        if record is None:
+            return None
+        return record.history
 
     def __send_message(self):
         self.tx_mutex.acquire()
+        self.__wakeup_pending = False
         if self.tx_message:
             self.__client.send_request("positions", self.tx_message)
             self.tx_message = {}
+            self.latency["queue_to_wire"].add(self.tx_queue_time)
         self.tx_mutex.release()
 
-    def __update_history(self, message):
-        for sensor in message:
-            if sensor == "warnings":
-                self.logger.warning(message[sensor])
-            if sensor == "time":
-                delta = message[sensor]['sim time'] - self.current_time
-                if delta > 5:
-                    self.logger.warning(f"WARNING! Large protobuf time rx delta = {delta}")
-                self.current_time = message[sensor]['sim time']
-            self.__sensors[sensor] = message[sensor]
+    def __drain_wakeup(self):
+        try:
+            while self.__wakeup_receiver.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def __update_history(self, sim_time, warnings):
+        for warning in warnings:
+            self.logger.warning(warning)
+        delta = sim_time - self.current_time
+        if delta > 5:
+            self.logger.warning(f"WARNING! Large protobuf time rx delta = {delta}")
+        self.current_time = sim_time
+        self.clock.update(self.current_time)
+
+    def __procces_sample(self, sim_time, position):
+        # robot pose is taken at the time of recognition sample
+        imu_body = self.__get_sensor_at("imu_body", sim_time)
+        gps_body = self.__get_sensor_at("gps_body", sim_time)
+        if not (imu_body and gps_body and position):
+            return {}
+        self.__model.update_robot_state(gps_body, imu_body, self.__last_message, self.last_head_pitch, self.last_head_yaw)
+        proccessed_object_pos = self.__model.proccess_data(position[0], position[1])
+        return {"position": proccessed_object_pos, "time": sim_time}
 
     def __procces_object(self, name):
-        blur_object = {}
-        imu_body = self.__get_sensor("imu_body")
-        gps_body = self.__get_sensor("gps_body")
-        last_message = self.__last_message
-        real_object = self.__get_sensor(name).copy()
-        if real_object and imu_body and gps_body:
-            position = real_object["position"]
-            if position:
-                self.__model.update_robot_state(gps_body, imu_body, last_message, self.last_head_pitch, self.last_head_yaw)
-                proccessed_object_pos = self.__model.proccess_data(position[0], position[1])
-                real_object["position"] = proccessed_object_pos
-                blur_object = real_object
-        return blur_object
+        real_object = self.__get_sensor(name)
+        if not real_object:
+            return {}
+        return self.__procces_sample(real_object["time"], real_object["position"])
+
+    def __procces_frame(self, names, sim_time):
+        # objects from recognition frame with given time, even if newer
+        # frame was received meanwhile, are processed in one batch
+        results = [{} for _ in names]
+        if sim_time is None:
+            return results
+        imu_body = self.__get_sensor_at("imu_body", sim_time)
+        gps_body = self.__get_sensor_at("gps_body", sim_time)
+        if not (imu_body and gps_body):
+            return results
+        indexes = []
+        positions = []
+        for index, name in enumerate(names):
+            history = self.get_history(name)
+            samples = history.window(0, end=sim_time) if history is not None else []
+            if samples:
+                indexes.append(index)
+                positions.append(samples[-1][1])
+        if not positions:
+            return results
+        self.__model.update_robot_state(gps_body, imu_body, self.__last_message, self.last_head_pitch, self.last_head_yaw)
+        for index, proccessed_object_pos in zip(indexes, self.__model.proccess_batch(positions)):
+            results[index] = {"position": proccessed_object_pos, "time": sim_time}
+        return results
+
+    def __wait_for_sample(self, name, min_sim_time=None):
+        """Wait until object has measurement made not earlier than min_sim_time.
+        Waiting is limited by two periods of 'recognition' sensor in case
+        simulator does not send the object.
+
+        Args:
+            name (str): object name.
+            min_sim_time (float, optional): simulation time in ms. Defaults to
+                None (current simulation time, i.e. wait for next recognition
+                sample unless it was received at current time).
+
+        Returns:
+            float: time of the latest measurement or None if there were no measurements.
+        """
+        record = self.__records.get(name)
+        if record is None:
+            return None
+        if min_sim_time is None:
+            min_sim_time = self.current_time
+        deadline = min_sim_time + 2 * self.sensor_time_step
+        self.clock.wait(lambda: (record.time is not None and record.time >= min_sim_time)
+                        or self.clock.time >= deadline)
+        return record.time
 
     def time_sleep(self, t) -> None:
         """Emulate sleep according to simulation time.
@@ -90,9 +193,7 @@ class CommunicationManager():
         """
 
         self.logger.debug(f"Emulating delay of {t*1000} ms")
-        start_time = self.current_time
-        while (self.current_time - start_time < t * 1000):
-            time.sleep(0.001)
+        self.clock.wait_for(t * 1000)
 
     def get_imu_body(self) -> dict:
         """Provide last measurement from imu located in body. 
@@ -131,15 +232,17 @@ class CommunicationManager():
         """
         res = {}
         self.time_sleep(0.5)
-        res = self.__get_sensor("gps_body").copy()
+        res = self.__get_sensor("gps_body")
         if res:
             pos = res["position"]
             res["position"] = self.__blurrer.loc(pos[0], pos[1])
         self.logger.debug(res)
         return res
 
-    def get_ball(self) -> dict:
+    def get_ball(self, min_sim_time=None) -> dict:
         """Provide blurred position of the ball relative to the robot.
+        Returns immediately if measurement made not earlier than min_sim_time
+        is already received, otherwise waits for next recognition sample.
         Can be empty if:
         1. 'recognition', 'gps_body' or 'imu_body' sensors are not enabled
         2. webots did not send us any measurement.
@@ -148,16 +251,48 @@ class CommunicationManager():
 
         Also contains simulation time of measurement.
 
+        Args:
+            min_sim_time (float, optional): simulation time in ms. Defaults to
+                None (current simulation time).
+
         Returns:
             dict: {"position": [x, y], "time": time} 
         """
-        self.time_sleep(0.1)
+        self.__wait_for_sample("BALL", min_sim_time)
         res = self.__procces_object("BALL")
         self.logger.debug(res)
         return res
 
-    def get_opponents(self) -> list:
+    def get_ball_track(self, window_ms=None) -> list:
+        """Provide blurred positions of the ball relative to the robot for
+        all recognition samples received during window_ms before the latest one.
+        Every sample is processed with robot position at time of the sample.
+        Samples where ball is not visible are skipped.
+
+        Args:
+            window_ms (float, optional): length of window in ms. Defaults to
+                None (period of 'recognition' sensor, i.e. two latest samples).
+
+        Returns:
+            list: [{"position": [course, distance], "time": time}, ...] from the oldest to the latest.
+        """
+        self.__wait_for_sample("BALL")
+        history = self.get_history("BALL")
+        if history is None:
+            return []
+        if window_ms is None:
+            window_ms = self.sensor_time_step
+        track = []
+        for sim_time, position in history.window(window_ms):
+            res = self.__procces_sample(sim_time, position)
+            if res and res["position"]:
+                track.append(res)
+        self.logger.debug(track)
+        return track
+
+    def get_opponents(self, min_sim_time=None) -> list:
         """Provide blurred positions of the opponents relative to the robot.
+        Waits for recognition sample the same way as get_ball.
         Can be empty if:
             1. 'recognition', 'gps_body' or 'imu_body' sensors are not enabled
             2. webots did not send us any measurement.
@@ -166,12 +301,16 @@ class CommunicationManager():
 
         Also contains simulation time of measurement.
 
+        Args:
+            min_sim_time (float, optional): simulation time in ms. Defaults to
+                None (current simulation time).
+
         Returns:
             list: [{"position": [x1, y1], "time": time}, {"position": [x2, y2], "time": time}]
         """
-        self.time_sleep(0.1)
         players = (1,2)
         color = "BLUE" if self.robot_color == "RED" else "RED"
+        self.__wait_for_sample(f"{color}_PLAYER_1", min_sim_time)
         opponents = []
         for number in players:
             opponents.append(self.__procces_object(f"{color}_PLAYER_{number}"))
@@ -179,8 +318,9 @@ class CommunicationManager():
         self.logger.debug(opponents)
         return opponents        
 
-    def get_mates(self) -> dict:
+    def get_mates(self, min_sim_time=None) -> dict:
         """Provide blurred position of the mate relative to the robot.
+        Waits for recognition sample the same way as get_ball.
         Can be empty if:
             1. 'recognition', 'gps_body' or 'imu_body' sensors are not enabled
             2. webots did not send us any measurement.
@@ -189,15 +329,44 @@ class CommunicationManager():
 
         Also contains simulation time of measurement.
 
+        Args:
+            min_sim_time (float, optional): simulation time in ms. Defaults to
+                None (current simulation time).
+
         Returns:
             list: {"position": [x, y], "time": time}
         """
-        self.time_sleep(0.1)
         number = 1 if self.robot_number == 2 else 2
+        self.__wait_for_sample(f"{self.robot_color}_PLAYER_{number}", min_sim_time)
         res = self.__procces_object(f"{self.robot_color}_PLAYER_{number}")
         self.logger.debug(res)
         return res
 
+    def get_all_objects(self, min_sim_time=None) -> dict:
+        """Provide blurred positions of the ball, the mate and the opponents
+        from one recognition frame. Waits for recognition sample the same
+        way as get_ball. Values have the same format as results of get_ball,
+        get_mates and get_opponents.
+
+        Args:
+            min_sim_time (float, optional): simulation time in ms. Defaults to
+                None (current simulation time).
+
+        Returns:
+            dict: {"ball": {"position": [x, y], "time": time},
+            "mates": {"position": [x, y], "time": time},
+            "opponents": [{"position": [x1, y1], "time": time}, {"position": [x2, y2], "time": time}]}
+        """
+        sim_time = self.__wait_for_sample("BALL", min_sim_time)
+        mate_number = 1 if self.robot_number == 2 else 2
+        color = "BLUE" if self.robot_color == "RED" else "RED"
+        ball, mate, opponent1, opponent2 = self.__procces_frame(
+            ("BALL", f"{self.robot_color}_PLAYER_{mate_number}", f"{color}_PLAYER_1", f"{color}_PLAYER_2"),
+            sim_time)
+        res = {"ball": ball, "mates": mate, "opponents": [opponent1, opponent2]}
+        self.logger.debug(res)
+        return res
+
     def get_time(self) -> float:
         """Provide latest observed simulation time.
 
@@ -223,6 +392,10 @@ class CommunicationManager():
         """
         self.tx_mutex.acquire()
         self.tx_message = data
+        self.tx_queue_time = time.perf_counter()
+        if not self.__wakeup_pending:
+            self.__wakeup_pending = True
+            self.__wakeup_sender.send(b'\0')
         self.tx_mutex.release()
 
         # self.logger.debug(data)
@@ -235,27 +408,34 @@ class CommunicationManager():
         if "head_pitch" in data.keys():
             self.last_head_pitch = data["head_pitch"]
 
+    def get_latency(self) -> dict:
+        """Provide statistics of communication latencies in microseconds:
+        'queue_to_wire' - from send_servos call till message is sent to socket,
+        'wire_to_history' - from socket becoming readable till received
+        measurements are available to getters.
+
+        Returns:
+            dict: {"queue_to_wire": {"count": count, "mean": mean, "max": max, "last": last},
+            "wire_to_history": {...}}
+        """
+        return {name: counter.stats() for name, counter in self.latency.items()}
+
     def run(self):
         """Infinity cycle of sending and receiving messages.
         Should be launched in sepparet thread. Communication manager
-        launch this func itself in constructor
+        launch this func itself in constructor.
+        Thread sleeps in select() until either data arrives from simulator
+        or send_servos queues new servo positions.
         """
         while(True):
-            do_not_block = True
-            if do_not_block:
-                # Sending/receiving protobuf in non-blocking way
-                # If we have any data to send - do sending
-                # If full packet data is ready in socket - receive it, otherwise switch to check if sending is needed
-                self.__send_message()
-                messages_list = self.__client.receive2()
-                for message in messages_list:
-                    self.__update_history(message)
-            else:
-                # Sending/receiving protobuf in blocking way:
-                # wait for a message ready to be sent, then send it
-                # Then wait for a message to be received, and receive it
-                self.__send_message()
-                message = []
-                while not message:
-                    message = self.__client.receive2()
-                self.__update_history(message)
+            for key, _ in self.__selector.select():
+                if key.fileobj is self.__wakeup_receiver:
+                    self.__drain_wakeup()
+                    continue
+                wire_time = time.perf_counter()
+                messages_list = self.__client.receive_records(self.__records)
+                for sim_time, warnings in messages_list:
+                    self.__update_history(sim_time, warnings)
+                if messages_list:
+                    self.latency["wire_to_history"].add(wire_time)
+            self.__send_message()
@@ -20,6 +20,8 @@ while True:
         print(f"[PORT: {port}] Localisation: {manager.get_localization()}")
         print(f"[PORT: {port}] Opponents pos: {manager.get_opponents()}")
         print(f"[PORT: {port}] Mates pos: {manager.get_mates()}")
+        print(f"[PORT: {port}] All objects: {manager.get_all_objects()}")
+        print(f"[PORT: {port}] Latency, us: {manager.get_latency()}")
 
 for manager in managers:
     manager.thread.join()
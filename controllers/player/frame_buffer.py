@@ -0,0 +1,153 @@
+"""Receive buffer which splits the byte stream from player.exe into
+length-prefixed protobuf frames without copying them.
+
+Module can be launched stand alone to run a micro-benchmark of framing
+cost per message for different sizes of received backlog.
+"""
+import time
+
+
+class FrameBuffer():
+    """Preallocated receive buffer for length-prefixed frames.
+
+    Data is received with ``recv_into`` right after the last unread byte and
+    complete frames are returned as ``memoryview`` slices of the buffer.
+    Unread bytes are moved to the beginning of the buffer only when the free
+    space at its end becomes smaller than ``read_size``, so the cost of one
+    message does not depend on how many messages are waiting in the buffer.
+    Returned frames stay valid only until the next call of ``fill``.
+
+    Args:
+        read_size (int, optional): Maximum number of bytes requested from
+            the socket by one ``fill``. Defaults to 1024.
+        capacity (int, optional): Initial size of the buffer in bytes. Buffer
+            grows if a frame does not fit in it. Defaults to 65536.
+        header_size (int, optional): Size of big-endian header with frame
+            length. Defaults to 4.
+    """
+    def __init__(self, read_size=1024, capacity=65536, header_size=4):
+        self.read_size = read_size
+        self.header_size = header_size
+        self.buf = bytearray(max(capacity, read_size + header_size))
+        self.view = memoryview(self.buf)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def fill(self, sock) -> int:
+        """Receive data from socket into the free space of the buffer.
+
+        Args:
+            sock (socket.socket): Connected socket.
+
+        Returns:
+            int: Number of received bytes, 0 if connection is closed.
+        """
+        if len(self.buf) - self.end < self.read_size:
+            self.__make_room(self.read_size)
+        received = sock.recv_into(self.view[self.end:self.end + self.read_size])
+        self.end += received
+        return received
+
+    def frames(self):
+        """Yield all complete frames stored in the buffer.
+
+        Yields:
+            memoryview: Body of the frame without header.
+        """
+        header_size = self.header_size
+        view = self.view
+        while self.end - self.start >= header_size:
+            body_start = self.start + header_size
+            size = int.from_bytes(view[self.start:body_start],
+                                  byteorder='big', signed=False)
+            body_end = body_start + size
+            if body_end > self.end:
+                # not enough data for message body
+                break
+            self.start = body_end
+            yield view[body_start:body_end]
+        if self.start == self.end:
+            self.start = self.end = 0
+
+    def __make_room(self, free_size):
+        pending = self.end - self.start
+        if pending + free_size > len(self.buf):
+            buf = bytearray(max(2 * len(self.buf), pending + free_size))
+            view = memoryview(buf)
+            view[:pending] = self.view[self.start:self.end]
+            self.buf, self.view = buf, view
+        elif self.start:
+            # memoryview assignment handles overlapping regions
+            self.view[:pending] = self.view[self.start:self.end]
+        self.start = 0
+        self.end = pending
+
+
+class _StreamSocket():
+    """In-memory stand-in for a connected socket used by benchmark."""
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def recv(self, size):
+        chunk = bytes(self.data[self.pos:self.pos + size])
+        self.pos += len(chunk)
+        return chunk
+
+    def recv_into(self, buffer):
+        size = min(len(buffer), len(self.data) - self.pos)
+        buffer[:size] = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return size
+
+
+def _slicing_frames(sock, read_size, header_size=4):
+    """Framing the way RobotClient.receive2 did it before FrameBuffer."""
+    rx_buf = bytearray()
+    frames = 0
+    while True:
+        chunk = sock.recv(read_size)
+        if not chunk:
+            return frames
+        rx_buf.extend(chunk)
+        while len(rx_buf) >= header_size:
+            size = int.from_bytes(rx_buf[:header_size], byteorder='big', signed=False)
+            if len(rx_buf) < header_size + size:
+                break
+            rx_buf = rx_buf[header_size:]
+            data = rx_buf[:size]
+            rx_buf = rx_buf[size:]
+            frames += 1
+
+
+def _buffer_frames(sock, read_size):
+    rx_buf = FrameBuffer(read_size)
+    frames = 0
+    while rx_buf.fill(sock):
+        for _ in rx_buf.frames():
+            frames += 1
+    return frames
+
+
+def benchmark(backlogs=(1, 10, 100, 1000, 10000), message_size=300):
+    """Print framing cost per message in microseconds when whole backlog
+    is available at once, as it happens after a stall of the controller.
+    """
+    frame = message_size.to_bytes(4, byteorder='big', signed=False) + bytes(message_size)
+    print(f"{'backlog':>8} {'read size':>10} {'slicing, us':>12} {'buffer, us':>12}")
+    for backlog in backlogs:
+        data = frame * backlog
+        for read_size in (1024, len(data)):
+            results = []
+            for framing in (_slicing_frames, _buffer_frames):
+                start = time.perf_counter()
+                count = framing(_StreamSocket(data), read_size)
+                results.append((time.perf_counter() - start) / count * 1e6)
+            print(f"{backlog:>8} {read_size:>10} {results[0]:>12.2f} {results[1]:>12.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
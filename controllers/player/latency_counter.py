@@ -0,0 +1,39 @@
+"""Counter of latencies used to monitor communication with simulator.
+"""
+import time
+
+
+class LatencyCounter():
+    """Accumulates durations between two moments measured with
+    time.perf_counter. Values are reported in microseconds.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.last = 0.
+
+    def add(self, start_time) -> None:
+        """Register latency from start_time till now.
+
+        Args:
+            start_time (float): moment in time.perf_counter units.
+        """
+        latency = (time.perf_counter() - start_time) * 1e6
+        self.count += 1
+        self.total += latency
+        self.last = latency
+        if latency > self.max:
+            self.max = latency
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: {"count": count, "mean": mean, "max": max, "last": last},
+            latencies in microseconds.
+        """
+        mean = self.total / self.count if self.count else 0.
+        return {"count": self.count, "mean": mean, "max": self.max, "last": self.last}
@@ -7,6 +7,8 @@ import logging
 # from google.protobuf import text_format
 
 import messages_pb2
+from sensor_records import ScalarMeasurement, CameraMeasurement
+from positions_encoder import PositionsEncoder
 
 
 class MessageManager():
@@ -18,6 +20,8 @@ class MessageManager():
         self.logger = logger
         self.size = head_buffer_size
         self.init_request = None
+        self.answer = messages_pb2.SensorMeasurements()
+        self.positions_encoder = PositionsEncoder()
 
     def get_size(self):
         """
@@ -62,14 +66,25 @@ class MessageManager():
         return request
 
     def build_request_positions(self, positions):
+        """Generate bytes string of request with values of the actuators.
+        Wire bytes are packed into template cached for the set of servo
+        names, without building protobuf class instance.
+
+        Args:
+            positions (dict): key - servo name and values ​​- position.
+        Returns:
+            bytes: bytes string of message.
+        """
+        return self.positions_encoder.encode(positions)
+
+    def build_request_positions_protobuf(self, positions):
         """Сreating an instance of the protobuff class
         and fills it with the values ​​of the actuators
 
         Args:
             positions (dict): key - servo name and values ​​- position.
         Returns:
-            messages_pb2: protobuf class instance of filled
-            message with servos.
+            bytes: bytes string of message.
         """
         request = messages_pb2.ActuatorRequests()
         for pos in positions:
@@ -147,7 +162,8 @@ class MessageManager():
         """Parsing answer message from byte array to dict with measurements
 
         Args:
-            data ([type]): [description]
+            data (bytes-like): serialized message, memoryview is parsed
+                without copying.
 
         Returns:
             [type]: [description]
@@ -156,6 +172,63 @@ class MessageManager():
         message.ParseFromString(data)
         return self.parse_message(message)
 
+    def decode_answer_message(self, data, records):
+        """Parsing answer message from byte array directly into records of
+        sensors, without building dict with measurements.
+
+        Args:
+            data (bytes-like): serialized message, memoryview is parsed
+                without copying.
+            records (SensorRecords): records to be updated.
+
+        Returns:
+            tuple: (sim time, list of warnings), warnings are dicts
+            {"message_type": type, "text": text, "time": time}
+        """
+        message = self.answer
+        message.ParseFromString(data)
+        sim_time = message.time
+        records.sim_time = sim_time
+        records.unix_time = message.real_time
+        get = records.records.get
+        for sensor in message.imu:
+            record = get(sensor.name) or records.add(sensor.name)
+            angles = sensor.angles
+            record.position = (angles.roll, angles.pitch, angles.yaw)
+            record.time = sim_time
+            if record.history is not None:
+                record.history.append(sim_time, record.position)
+        for field in (message.gps, message.objects):
+            for sensor in field:
+                record = get(sensor.name) or records.add(sensor.name)
+                value = sensor.value
+                record.position = (value.X, value.Y)
+                record.time = sim_time
+                if record.history is not None:
+                    record.history.append(sim_time, record.position)
+        for field in (message.accelerometers, message.gyros):
+            for sensor in field:
+                record = get(sensor.name) or records.add(sensor.name)
+                value = sensor.value
+                record.position = (value.X, value.Y, value.Z)
+                record.time = sim_time
+                if record.history is not None:
+                    record.history.append(sim_time, record.position)
+        for sensor in message.position_sensors:
+            record = get(sensor.name) or records.add(sensor.name, ScalarMeasurement)
+            record.position = sensor.value
+            record.time = sim_time
+        for sensor in message.cameras:
+            record = get(sensor.name) or records.add(sensor.name, CameraMeasurement)
+            record.width = sensor.width
+            record.height = sensor.height
+            record.quality = sensor.quality
+            record.image = sensor.image
+            record.time = sim_time
+        warnings = [{"message_type": sensor.message_type, "text": sensor.text, "time": sim_time}
+                    for sensor in message.messages]
+        return sim_time, warnings
+
     @staticmethod
     def parse_message(message) -> dict:
         """
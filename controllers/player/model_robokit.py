@@ -1,5 +1,6 @@
 import math
 import logging
+import numpy as np
 
 class Model():
     def __init__(self, blurrer):
@@ -26,7 +27,12 @@ class Model():
         else:
             return True
 
-    def check_object_in_frame(self, distance, course):
+    def visible_area(self):
+        """Bounds of area visible by camera with current head position.
+
+        Returns:
+            tuple: (bottom distance, top distance, right course, left course)
+        """
         right_yaw_visible_area = -self.last_head_yaw - self.fov_y
         left_yaw_visible_area = -self.last_head_yaw + self.fov_y
 
@@ -46,10 +52,31 @@ class Model():
                          self.last_head_pitch -
                          self.fov_x)
 
+        return (bottom_distance_visible_area, top_distance_visible_area,
+                right_yaw_visible_area, left_yaw_visible_area)
+
+    def check_object_in_frame(self, distance, course):
+        bottom_distance_visible_area, top_distance_visible_area, \
+            right_yaw_visible_area, left_yaw_visible_area = self.visible_area()
         ball_in_dist = (bottom_distance_visible_area < distance < top_distance_visible_area)
         ball_in_yaw = (right_yaw_visible_area < course < left_yaw_visible_area)
         return ball_in_dist and ball_in_yaw
 
+    def check_objects_in_frame(self, distances, courses):
+        """Vectorized check_object_in_frame.
+
+        Args:
+            distances (np.ndarray): distances to objects.
+            courses (np.ndarray): courses to objects.
+
+        Returns:
+            np.ndarray: boolean mask of visible objects.
+        """
+        bottom_distance_visible_area, top_distance_visible_area, \
+            right_yaw_visible_area, left_yaw_visible_area = self.visible_area()
+        return ((bottom_distance_visible_area < distances) & (distances < top_distance_visible_area) &
+                (right_yaw_visible_area < courses) & (courses < left_yaw_visible_area))
+
 
     @staticmethod
     def dist(p1, p2):
@@ -72,6 +99,53 @@ class Model():
         angle = self.norm_yaw(angle)
         return (distance, angle)
 
+    def get_distances_courses(self, positions):
+        """Vectorized get_distance_course.
+
+        Args:
+            positions (np.ndarray): array of shape (n, 2) with coordinates of objects.
+
+        Returns:
+            tuple: (distances, courses) arrays of shape (n,)
+        """
+        robot_pos = self.robot_gps["position"]
+        robot_orientation = self.robot_imu["position"]
+        dx = positions[:, 0] - robot_pos[0]
+        dy = positions[:, 1] - robot_pos[1]
+        distances = np.hypot(dx, dy)
+        angles = -np.arctan2(-dy, dx) - robot_orientation[2]
+        angles %= 2 * math.pi
+        angles[angles > math.pi] -= 2 * math.pi
+        return distances, angles
+
+    def proccess_batch(self, positions) -> list:
+        """Process all objects of one recognition frame at once.
+        Same as calling proccess_data for every object, but distances,
+        courses, visibility and noise are computed in one pass.
+
+        Args:
+            positions (array_like): coordinates of objects [[x1, y1], [x2, y2], ...]
+
+        Returns:
+            list: blurred (course, distance) for every visible object and
+            empty list for every invisible object.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        count = len(positions)
+        if not self.check_robot_stand():
+            for _ in range(count):
+                self.blurrer.step()
+            logging.info("Robot in not standing")
+            return [[] for _ in range(count)]
+        for _ in range(count):
+            self.blurrer.step()
+            self.blurrer.observation()
+        distances, courses = self.get_distances_courses(positions)
+        visible = self.check_objects_in_frame(distances, courses)
+        blurred_courses, blurred_distances = self.blurrer.objects_batch(courses[visible], distances[visible])
+        blurred = iter(zip(blurred_courses.tolist(), blurred_distances.tolist()))
+        return [next(blurred) if is_visible else [] for is_visible in visible]
+
     def proccess_data(self, x, y):
         self.blurrer.step()
         if not self.check_robot_stand():
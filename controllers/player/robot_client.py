@@ -7,13 +7,14 @@ import time
 import logging
 
 from message_manager import MessageManager
+from frame_buffer import FrameBuffer
 
 
 class RobotClient():
     """[summary]
     """
     def __init__(self, host="127.0.0.1", port=1, logger=logging,
-                 max_attempts=20, wait_time=1):
+                 max_attempts=20, wait_time=1, read_size=1024):
         """[summary]
 
         Args:
@@ -21,6 +22,7 @@ class RobotClient():
             port (int): Port to connect to.
             max_attempts (int): Maximum number of attempts to connect. Defaults to 20.
             wait_time (float, optional): Time between attempts to connect, in seconds. Defaults to 1.
+            read_size (int, optional): Maximum number of bytes read from socket at once. Defaults to 1024.
         """
         self.logger = logger
         self.host = host
@@ -29,9 +31,8 @@ class RobotClient():
         self.wait_time = wait_time
         self.message_manager = MessageManager(self.logger)
         self.socket = None
-        self.rx_buf = bytearray()
-        self.rx_wait_for_data = False
-        self.rx_expected_data_size = 0
+        self.rx_buf = FrameBuffer(read_size,
+                                  header_size=self.message_manager.get_size())
 
     def connect_client(self):
         """[summary]
@@ -124,31 +125,31 @@ class RobotClient():
         return self.message_manager.parse_answer_message(data)
 
     def receive2(self):
+        """Receive available data and parse all complete messages.
+        Messages are parsed directly from the receive buffer without copying.
+
+        Returns:
+            list: parsed messages, can be empty.
+        """
         messages_list = []
-        chunk = self.socket.recv(1024)
-        self.rx_buf.extend(chunk)
-        # self.logger.debug("Receive %s chunk", chunk)
-        header_size = self.message_manager.get_size()
-        # self.logger.debug("Receive %s header size", header_size)
-        while True:
-            if self.rx_wait_for_data == False:
-                if len(self.rx_buf) >= header_size:
-                    self.rx_wait_for_data = True
-                    header = self.rx_buf[:header_size]
-                    self.rx_buf = self.rx_buf[header_size:]
-                    self.rx_expected_data_size = self.message_manager.get_answer_size(header)
-                else:
-                    # not enough data even for header
-                    break
-            if self.rx_wait_for_data == True:
-                if len(self.rx_buf) >= self.rx_expected_data_size:
-                    self.rx_wait_for_data = False
-                    data = self.rx_buf[:self.rx_expected_data_size]
-                    self.rx_buf = self.rx_buf[self.rx_expected_data_size:]
-                    messages_list.append(
-                        self.message_manager.parse_answer_message(data))
-                else:
-                    # not enough data for message body
-                    break
+        self.rx_buf.fill(self.socket)
+        for data in self.rx_buf.frames():
+            messages_list.append(
+                self.message_manager.parse_answer_message(data))
         # self.logger.debug("Receive %s bytes message", messages_list)
         return messages_list
+
+    def receive_records(self, records):
+        """Receive available data and decode all complete messages
+        directly into records of sensors.
+
+        Args:
+            records (SensorRecords): records to be updated.
+
+        Returns:
+            list: (sim time, list of warnings) for every decoded message,
+            can be empty.
+        """
+        self.rx_buf.fill(self.socket)
+        return [self.message_manager.decode_answer_message(data, records)
+                for data in self.rx_buf.frames()]
@@ -0,0 +1,126 @@
+"""Fixed-size history of sensor measurements indexed by simulation time.
+"""
+import math
+from array import array
+from threading import Lock
+
+
+class SensorHistory():
+    """Ring buffer with the latest measurements of one sensor.
+    Times and values are stored in preallocated arrays of doubles,
+    measurements must be appended in order of simulation time.
+
+    Args:
+        size (int): Number of stored measurements.
+        dimension (int): Number of values in one measurement.
+        angles (bool, optional): Values are angles in radians, interpolation
+            goes along the shortest arc. Defaults to False.
+    """
+    def __init__(self, size, dimension, angles=False):
+        self.size = size
+        self.dimension = dimension
+        self.angles = angles
+        self.times = array('d', bytes(8 * size))
+        self.values = array('d', bytes(8 * size * dimension))
+        self.count = 0
+        self.head = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, sim_time, values) -> None:
+        """
+        Args:
+            sim_time (int): simulation time of measurement in ms.
+            values (sequence): measured values.
+        """
+        with self.lock:
+            if self.count and sim_time <= self.times[(self.head - 1) % self.size]:
+                return
+            start = self.head * self.dimension
+            self.times[self.head] = sim_time
+            self.values[start:start + self.dimension] = array('d', values)
+            self.head = (self.head + 1) % self.size
+            if self.count < self.size:
+                self.count += 1
+
+    def __slot(self, index):
+        # index 0 is the oldest stored measurement
+        return (self.head - self.count + index) % self.size
+
+    def __sample(self, slot):
+        start = slot * self.dimension
+        return self.times[slot], tuple(self.values[start:start + self.dimension])
+
+    def latest(self):
+        """
+        Returns:
+            tuple: (time, values) of the latest measurement or None if
+            history is empty.
+        """
+        with self.lock:
+            if not self.count:
+                return None
+            return self.__sample(self.__slot(self.count - 1))
+
+    def at(self, sim_ms):
+        """Values at given simulation time, linearly interpolated between
+        neighbouring measurements. Outside of stored time range values of
+        the oldest or the latest measurement are returned.
+
+        Args:
+            sim_ms (float): simulation time in ms.
+
+        Returns:
+            tuple: values or None if history is empty.
+        """
+        with self.lock:
+            if not self.count:
+                return None
+            low, high = 0, self.count - 1
+            if sim_ms <= self.times[self.__slot(low)]:
+                return self.__sample(self.__slot(low))[1]
+            if sim_ms >= self.times[self.__slot(high)]:
+                return self.__sample(self.__slot(high))[1]
+            while high - low > 1:
+                middle = (low + high) // 2
+                if self.times[self.__slot(middle)] <= sim_ms:
+                    low = middle
+                else:
+                    high = middle
+            time0, values0 = self.__sample(self.__slot(low))
+            time1, values1 = self.__sample(self.__slot(high))
+        ratio = (sim_ms - time0) / (time1 - time0)
+        if self.angles:
+            return tuple(value0 + ratio * math.remainder(value1 - value0, 2 * math.pi)
+                         for value0, value1 in zip(values0, values1))
+        return tuple(value0 + ratio * (value1 - value0)
+                     for value0, value1 in zip(values0, values1))
+
+    def window(self, ms, end=None) -> list:
+        """Measurements made during ms milliseconds before end.
+
+        Args:
+            ms (float): length of window in ms.
+            end (float, optional): end of window in ms. Defaults to None
+                (time of the latest measurement).
+
+        Returns:
+            list: [(time, values), ...] from the oldest to the latest.
+        """
+        with self.lock:
+            if not self.count:
+                return []
+            if end is None:
+                end = self.times[self.__slot(self.count - 1)]
+            samples = []
+            for index in range(self.count - 1, -1, -1):
+                slot = self.__slot(index)
+                sim_time = self.times[slot]
+                if sim_time < end - ms:
+                    break
+                if sim_time <= end:
+                    samples.append(self.__sample(slot))
+        samples.reverse()
+        return samples
@@ -0,0 +1,127 @@
+"""Preallocated records with the last measurement of every sensor.
+MessageManager.decode_answer_message writes measurements directly into
+records, dict representation is built only when it is requested.
+"""
+
+
+class Measurement():
+    """Last measurement of a sensor with vector value: accelerometer,
+    gyro, gps, imu or recognised object. Optional history keeps
+    previous measurements.
+    """
+    __slots__ = ("position", "time", "history")
+
+    def __init__(self):
+        self.position = None
+        self.time = None
+        self.history = None
+
+    def as_dict(self) -> dict:
+        """
+        Returns:
+            dict: {"position": [x, y, ...], "time": time} or empty dict
+            if there were no measurements.
+        """
+        if self.position is None:
+            return {}
+        return {"position": list(self.position), "time": self.time}
+
+
+class ScalarMeasurement(Measurement):
+    """Last measurement of a sensor with scalar value: position sensor.
+    """
+    __slots__ = ()
+
+    def as_dict(self) -> dict:
+        """
+        Returns:
+            dict: {"position": value, "time": time} or empty dict
+            if there were no measurements.
+        """
+        if self.position is None:
+            return {}
+        return {"position": self.position, "time": self.time}
+
+
+class CameraMeasurement():
+    """Last image received from camera. Image bytes are not copied.
+    """
+    __slots__ = ("width", "height", "quality", "image", "time")
+
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.quality = 0
+        self.image = None
+        self.time = None
+
+    def as_dict(self) -> dict:
+        """
+        Returns:
+            dict: {"width": width, "height": height, "quality": quality,
+            "image": image, "time": time} or empty dict if there were no images.
+        """
+        if self.image is None:
+            return {}
+        return {"width": self.width, "height": self.height, "quality": self.quality,
+                "image": self.image, "time": self.time}
+
+
+class SensorRecords():
+    """Records of all sensors, keyed by sensor name.
+    Records of enabled sensors are created once by add(), records of
+    unexpected sensors are created on first measurement.
+    """
+    def __init__(self):
+        self.records = {}
+        self.sim_time = None
+        self.unix_time = None
+
+    def add(self, name, record_type=Measurement, history=None):
+        """Create record for sensor if it does not exist.
+
+        Args:
+            name (str): sensor name.
+            record_type (type, optional): Measurement, ScalarMeasurement
+                or CameraMeasurement. Defaults to Measurement.
+            history (SensorHistory, optional): history of vector
+                measurements. Defaults to None.
+
+        Returns:
+            record of the sensor.
+        """
+        record = self.records.get(name)
+        if record is None:
+            record = record_type()
+            self.records[name] = record
+        if history is not None:
+            record.history = history
+        return record
+
+    def get(self, name):
+        """
+        Args:
+            name (str): sensor name.
+
+        Returns:
+            record of the sensor or None if sensor is unknown.
+        """
+        return self.records.get(name)
+
+    def as_dict(self, name) -> dict:
+        """Compatibility view of record in format of MessageManager.parse_message.
+
+        Args:
+            name (str): sensor name or "time".
+
+        Returns:
+            dict: measurement, empty if there were no measurements.
+        """
+        if name == "time":
+            if self.sim_time is None:
+                return {}
+            return {"unix time": self.unix_time, "sim time": self.sim_time}
+        record = self.records.get(name)
+        if record is None:
+            return {}
+        return record.as_dict()
@@ -0,0 +1,71 @@
+"""Simulation clock which lets threads sleep until simulation time advances.
+"""
+from threading import Condition
+
+
+class SimClock():
+    """Latest simulation time received from simulator, in ms.
+    Waiting threads are woken up by update() instead of polling the time.
+    All waits accept optional timeout in seconds of real time and return
+    simulation time observed at wake up.
+    """
+    def __init__(self):
+        self.__condition = Condition()
+        self.time = 0
+
+    def update(self, sim_time) -> None:
+        """Set new simulation time and wake up all waiting threads.
+
+        Args:
+            sim_time (int): simulation time in ms.
+        """
+        with self.__condition:
+            self.time = sim_time
+            self.__condition.notify_all()
+
+    def wait_until(self, sim_ms, timeout=None) -> int:
+        """Block until simulation time reaches sim_ms.
+
+        Args:
+            sim_ms (float): simulation time in ms.
+            timeout (float, optional): real time limit in seconds.
+                Defaults to None (no limit).
+
+        Returns:
+            int: simulation time in ms.
+        """
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.time >= sim_ms, timeout)
+            return self.time
+
+    def wait_for(self, delta_ms, timeout=None) -> int:
+        """Block until simulation time advances by delta_ms from now.
+
+        Args:
+            delta_ms (float): simulation time interval in ms.
+            timeout (float, optional): real time limit in seconds.
+                Defaults to None (no limit).
+
+        Returns:
+            int: simulation time in ms.
+        """
+        with self.__condition:
+            target = self.time + delta_ms
+            self.__condition.wait_for(lambda: self.time >= target, timeout)
+            return self.time
+
+    def wait(self, predicate, timeout=None) -> int:
+        """Block until predicate becomes true. Predicate is checked on
+        every update of simulation time.
+
+        Args:
+            predicate (callable): function without arguments.
+            timeout (float, optional): real time limit in seconds.
+                Defaults to None (no limit).
+
+        Returns:
+            int: simulation time in ms.
+        """
+        with self.__condition:
+            self.__condition.wait_for(predicate, timeout)
+            return self.time
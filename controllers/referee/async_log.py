@@ -0,0 +1,143 @@
+"""Buffered logging written by a background thread.
+
+Messages are appended to a deque, which needs no lock in CPython, and a writer thread formats and writes
+them in batches every flush period, so the thread logging never waits for the file or the console.
+"""
+
+import atexit
+import collections
+import json
+import sys
+import threading
+import time
+
+LEVELS = {'Debug': 0, 'Info': 1, 'Warning': 2, 'Error': 3}
+FLUSH_PERIOD = 0.2  # maximal time between a message and its writing [s]
+
+
+class AsyncLogWriter:
+    """Log file written by a background thread.
+
+    Args:
+        path: log file.
+        level: messages with a lower level than level ('Debug', 'Info', 'Warning' or 'Error') are dropped.
+        json_lines: write every message as a JSON object on its own line instead of text_format.
+        text_format: format of a line of the log file, with the fields level, message, real_time (time since
+            the creation of the writer [s]) and the keyword arguments of write.
+        flush_period: time between two writes of the background thread [s].
+    """
+
+    def __init__(self, path, level='Info', json_lines=False, text_format='{level}: {message}',
+                 flush_period=FLUSH_PERIOD):
+        self.file = open(path, 'w')
+        self.configure(level, json_lines)
+        self.text_format = text_format
+        self.flush_period = flush_period
+        self.start_time = time.time()
+        self.queue = collections.deque()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.closed = False
+        atexit.register(self.close)  # fatal errors exit without clean_exit
+
+    def configure(self, level, json_lines):
+        if level not in LEVELS:
+            raise ValueError(f'Unknown log level: {level}')
+        self.level = level
+        self.min_level = LEVELS[level]
+        self.json_lines = json_lines
+
+    def start(self):
+        """Start the background thread, messages logged before are kept until it starts."""
+        if self.thread is None and not self.closed:
+            self.thread = threading.Thread(target=self.run, name='log writer', daemon=True)
+            self.thread.start()
+
+    def enabled(self, level):
+        """Return False if messages of level are dropped, to skip building them."""
+        return LEVELS[level] >= self.min_level and not self.closed
+
+    def write(self, level, message, console=None, args=(), **fields):
+        """Queue a message.
+
+        Args:
+            console: text printed on the standard output (standard error for errors), None to not print.
+            args: arguments of the %-format message, formatted by the background thread.
+            fields: additional fields of the message (JSON lines and text_format).
+        """
+        if LEVELS[level] < self.min_level:
+            return
+        if self.closed:  # after clean_exit, messages are only printed
+            if console is not None:
+                print(console, file=sys.stderr if level == 'Error' else sys.stdout, flush=True)
+            return
+        self.queue.append((time.time(), level, message, args, console, fields))
+        if level == 'Error':
+            self.wakeup.set()
+
+    def flush(self):
+        """Wait until all the messages queued before are written."""
+        if self.thread is None or self.closed:
+            self.write_pending()
+            return
+        written = threading.Event()
+        self.queue.append(written)
+        self.wakeup.set()
+        written.wait()
+
+    def close(self):
+        """Write all the pending messages and close the file."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.thread is not None:
+            self.wakeup.set()
+            self.thread.join()
+        self.write_pending()
+        self.file.close()
+
+    def run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_period)
+            self.wakeup.clear()
+            self.write_pending()
+
+    def format(self, real_time, level, message, args, fields):
+        real_time -= self.start_time
+        if args:
+            message = message % args
+        if self.json_lines:
+            return json.dumps({'real_time': round(real_time, 3), 'level': level, 'message': str(message), **fields})
+        return self.text_format.format(real_time=real_time, level=level, message=message, **fields)
+
+    def write_pending(self):
+        lines = []
+        console = []  # [stream, [texts]] of consecutive messages printed on the same stream
+        flushed = []
+        queue = self.queue
+        while True:
+            try:
+                record = queue.popleft()
+            except IndexError:
+                break
+            if isinstance(record, threading.Event):
+                flushed.append(record)
+                continue
+            real_time, level, message, args, text, fields = record
+            lines.append(self.format(real_time, level, message, args, fields))
+            if text is not None:
+                stream = sys.stderr if level == 'Error' else sys.stdout
+                if not console or console[-1][0] is not stream:
+                    console.append([stream, []])
+                console[-1][1].append(str(text))
+        try:
+            if lines:
+                self.file.write('\n'.join(lines) + '\n')
+                self.file.flush()
+            for stream, texts in console:
+                stream.write('\n'.join(texts) + '\n')
+                stream.flush()
+        except (OSError, ValueError):  # closed console or file
+            pass
+        for event in flushed:
+            event.set()
@@ -0,0 +1,179 @@
+# Headless batch runner of matches on Linux.
+#
+# usage: python batch_runner.py --matches 8 --jobs 4 --output batch
+#
+# Every match is played by its own Webots instance in fast mode without rendering in an isolated copy of the
+# project (worlds, controllers and game.json, compiled player controller and protos are linked) with its own
+# TCP/UDP ports. The GameController runs in the referee process (game_controller.py) in simulated time.
+# The referee writes the final score to result.json, the runner adds the wall time and writes summary.json
+# into the directory of the match and a summary of all matches into the output directory.
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+LINKED_CONTROLLERS = ['player']  # compiled controllers which are not modified by matches
+PORTS_PER_MATCH = 100
+RED_PORT_OFFSET = 1
+BLUE_PORT_OFFSET = 21
+GAME_STATE_PORT_OFFSET = 38
+GAME_CONTROLLER_ANSWER_PORT_OFFSET = 39
+GAME_CONTROLLER_PORT_OFFSET = 50
+
+
+def match_ports(base_port):
+    """Ports of a match using range [base_port, base_port + PORTS_PER_MATCH)."""
+    return {'red': [base_port + RED_PORT_OFFSET + i for i in range(4)],
+            'blue': [base_port + BLUE_PORT_OFFSET + i for i in range(4)],
+            'game_state_port': base_port + GAME_STATE_PORT_OFFSET,
+            'game_controller_answer_port': base_port + GAME_CONTROLLER_ANSWER_PORT_OFFSET,
+            'game_controller_port': base_port + GAME_CONTROLLER_PORT_OFFSET}
+
+
+def prepare_match_directory(match_dir, game, ports, half_time_duration):
+    """Copy the project into match_dir and write the game.json of the match."""
+    if match_dir.exists():
+        shutil.rmtree(match_dir)
+    match_dir.mkdir(parents=True)
+    patterns = shutil.ignore_patterns('__pycache__', 'log.txt', 'output*.txt', '*_log.txt', 'result.json')
+
+    def ignore(directory, names):
+        # the output directory may be inside of the project
+        return set(patterns(directory, names)) | {name for name in names
+                                                  if Path(directory, name).resolve() == match_dir.parent}
+
+    shutil.copytree(PROJECT_DIR / 'worlds', match_dir / 'worlds', ignore=ignore)
+    os.symlink(PROJECT_DIR / 'protos', match_dir / 'protos')
+    (match_dir / 'controllers').mkdir()
+    for controller in (PROJECT_DIR / 'controllers').iterdir():
+        if not controller.is_dir():
+            continue
+        if controller.name in LINKED_CONTROLLERS:
+            os.symlink(controller, match_dir / 'controllers' / controller.name)
+        else:
+            shutil.copytree(controller, match_dir / 'controllers' / controller.name, ignore=ignore)
+    game = json.loads(json.dumps(game))
+    game['limit_speed_to_realtime'] = False
+    game['press_a_key_to_terminate'] = False
+    game['close_webots_on_exit'] = True
+    game['use_bouncing_server'] = False
+    game['game_controller'] = 'embedded'
+    game['result_file'] = 'result.json'
+    game.pop('record_simulation', None)
+    game['red']['ports'] = ports['red']
+    game['blue']['ports'] = ports['blue']
+    for key in ['game_state_port', 'game_controller_answer_port', 'game_controller_port']:
+        game[key] = ports[key]
+    if half_time_duration is not None:
+        game['half_time_duration'] = half_time_duration
+    with open(match_dir / 'controllers' / 'referee' / 'game.json', 'w') as f:
+        json.dump(game, f, indent=2)
+
+
+def kill_match_processes(match_dir):
+    """Terminate processes left running in match_dir (team processes run in their own session)."""
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            cwd = os.readlink(f'/proc/{pid}/cwd')
+        except OSError:
+            continue
+        if cwd == str(match_dir) or cwd.startswith(str(match_dir) + os.sep):
+            try:
+                os.kill(int(pid), signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def run_match(index, args, game):
+    match_dir = Path(args.output).resolve() / f'match_{index:03d}'
+    ports = match_ports(args.base_port + index * PORTS_PER_MATCH)
+    prepare_match_directory(match_dir, game, ports, args.half_time)
+    command = [args.webots, '--batch', '--mode=fast', '--no-rendering', '--minimize', '--stdout', '--stderr',
+               str(match_dir / 'worlds' / args.world)]
+    if args.xvfb:
+        command = ['xvfb-run', '--auto-servernum'] + command
+    env = dict(os.environ)
+    env.pop('WEBOTS_ROBOCUP_GAME', None)  # the referee reads game.json of the match directory
+    summary = {'match': index, 'directory': str(match_dir), 'ports': ports, 'timed_out': False}
+    start = time.time()
+    with open(match_dir / 'webots.log', 'w') as log:
+        process = subprocess.Popen(command, cwd=match_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                   start_new_session=True)
+        try:
+            process.wait(timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            summary['timed_out'] = True
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        process.wait()
+    kill_match_processes(match_dir)
+    summary['wall_time'] = time.time() - start
+    summary['returncode'] = process.returncode
+    result_path = match_dir / 'controllers' / 'referee' / 'result.json'
+    try:
+        with open(result_path) as f:
+            summary['result'] = json.load(f)
+    except (OSError, ValueError):
+        summary['result'] = None
+    with open(match_dir / 'summary.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def describe(summary):
+    result = summary['result']
+    if result is None:
+        outcome = 'no result' + (' (timeout)' if summary['timed_out'] else '')
+    else:
+        speed_factor = result['speed_factor'] or 0
+        outcome = (f"{result['red']['name']} {result['red']['score']} : {result['blue']['score']} "
+                   f"{result['blue']['name']}, speed factor {speed_factor:.2f}")
+    return f"match {summary['match']}: {outcome}, wall time {summary['wall_time']:.1f} s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run matches in parallel with headless Webots.')
+    parser.add_argument('--matches', type=int, default=1, help='number of matches')
+    parser.add_argument('--jobs', type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                        help='number of matches played at the same time')
+    parser.add_argument('--output', default='batch', help='output directory')
+    parser.add_argument('--game', default=str(Path(__file__).resolve().parent / 'game.json'), help='game.json template')
+    parser.add_argument('--world', default='elsiros_game.wbt', help='world file in the worlds directory')
+    parser.add_argument('--webots', default='webots', help='Webots executable')
+    parser.add_argument('--xvfb', action='store_true', help='run Webots in a virtual X server (xvfb-run)')
+    parser.add_argument('--base-port', type=int, default=10000, help=f'first port, {PORTS_PER_MATCH} ports per match')
+    parser.add_argument('--half-time', type=int, default=None, help='duration of a half [s]')
+    parser.add_argument('--timeout', type=float, default=None, help='maximal wall time of a match [s]')
+    args = parser.parse_args()
+    if sys.platform == 'win32':
+        parser.error('batch_runner.py is only supported on Linux')
+    with open(args.game) as f:
+        game = json.load(f)
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+    start = time.time()
+    summaries = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(run_match, index, args, game) for index in range(args.matches)]
+        for future in concurrent.futures.as_completed(futures):
+            summary = future.result()
+            print(describe(summary), flush=True)
+            summaries.append(summary)
+    summaries.sort(key=lambda summary: summary['match'])
+    with open(Path(args.output) / 'summary.json', 'w') as f:
+        json.dump({'matches': summaries, 'wall_time': time.time() - start}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
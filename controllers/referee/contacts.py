@@ -0,0 +1,118 @@
+"""Helpers of the referee to detect ball touches by robots.
+
+Only robots with center of mass close to the ball are checked, ball contact points
+are kept in a spatial hash matched with tolerance and names of contact nodes are
+cached by node id.
+"""
+
+import math
+import time
+
+ROBOT_BOUNDING_RADIUS = 0.3  # horizontal distance from center of mass of a robot to its farthest part [m]
+CONTACT_TOLERANCE = 1e-6     # contact points of ball and robot closer than this distance are the same [m]
+
+
+class ContactPointHash:
+    """Set of 3D points. A point is found if a stored point is closer than tolerance."""
+
+    def __init__(self, tolerance=CONTACT_TOLERANCE):
+        self.tolerance = tolerance
+        self.cells = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _cell(self, point):
+        return tuple(math.floor(c / self.tolerance) for c in point[:3])
+
+    def clear(self):
+        self.cells.clear()
+        self.count = 0
+
+    def add(self, point):
+        self.cells.setdefault(self._cell(point), []).append(point)
+        self.count += 1
+
+    def __contains__(self, point):
+        if not self.count:
+            return False
+        x, y, z = self._cell(point)
+        tolerance2 = self.tolerance * self.tolerance
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for p in self.cells.get((x + dx, y + dy, z + dz), ()):
+                        if (p[0] - point[0]) ** 2 + (p[1] - point[1]) ** 2 + (p[2] - point[2]) ** 2 <= tolerance2:
+                            return True
+        return False
+
+
+class ContactTracker:
+    """Contact points of the ball and robots near the ball.
+
+    Args:
+        turf_depth: contacts lower than turf_depth are contacts with the ground.
+        ball_radius: radius of the ball [m].
+        robot_radius: radius of the bounding circle of a robot around its center of mass [m].
+        tolerance: tolerance of matching ball and robot contact points [m].
+    """
+
+    def __init__(self, turf_depth, ball_radius, robot_radius=ROBOT_BOUNDING_RADIUS, tolerance=CONTACT_TOLERANCE):
+        self.turf_depth = turf_depth
+        self.near_distance = ball_radius + robot_radius
+        self.ball_points = ContactPointHash(tolerance)
+        self.node_names = {}  # node id -> name of the solid
+        # timing of update_contacts
+        self.steps = 0
+        self.robots_checked = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def update_ball(self, ball):
+        """Store contact points of the ball which are not contacts with the ground.
+
+        Returns:
+            number of stored contact points.
+        """
+        self.ball_points.clear()
+        for i in range(ball.getNumberOfContactPoints()):
+            point = ball.getContactPoint(i)
+            if point[2] > self.turf_depth:
+                self.ball_points.add(point)
+        return len(self.ball_points)
+
+    def is_near_ball(self, position, ball_position):
+        return math.hypot(position[0] - ball_position[0], position[1] - ball_position[1]) <= self.near_distance
+
+    def node_name(self, node):
+        """Name of the solid of a contact point, cached by node id."""
+        node_id = node.getId()
+        name = self.node_names.get(node_id)
+        if name is None:
+            name_field = node.getField('name')
+            name = name_field.getSFString() if name_field else ''
+            self.node_names[node_id] = name
+        return name
+
+    def add_step_time(self, start, robots_checked):
+        """Register duration of contact update which started at start (time.perf_counter)."""
+        duration = time.perf_counter() - start
+        self.steps += 1
+        self.robots_checked += robots_checked
+        self.total_time += duration
+        if duration > self.max_time:
+            self.max_time = duration
+
+    def stats(self):
+        """Return statistics since the previous call: steps, mean and max step time [us], robots checked per step."""
+        steps = self.steps
+        result = {'steps': steps,
+                  'mean_us': self.total_time / steps * 1e6 if steps else 0.0,
+                  'max_us': self.max_time * 1e6,
+                  'robots_per_step': self.robots_checked / steps if steps else 0.0}
+        self.steps = 0
+        self.robots_checked = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        return result
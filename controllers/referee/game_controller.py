@@ -0,0 +1,261 @@
+# Python implementation of the part of the GameController used by the referee.
+#
+# GameController applies the commands the referee sends to GameControllerSimulator.jar ("CLOCK:<ms>", "STATE:*",
+# "SCORE:<team>", "KICKOFF:<team>", "SIDE_LEFT:<team>", "DROPPEDBALL" and "<interruption>:<team>[:<phase>]" with
+# interruptions DIRECT_FREEKICK, INDIRECT_FREEKICK, PENALTYKICK, CORNERKICK, GOALKICK and THROWIN) to a GameState
+# container and answers "OK", "INVALID" (malformed command) or "ILLEGAL" (command not allowed in the current state).
+# Game time is virtual: it only advances with CLOCK messages, so a game runs as fast as the simulation.
+
+import math
+
+from construct import Container
+from gamestate import build_game_state
+
+HALF_TIME_DURATION = 600                  # [s]
+OVERTIME_DURATION = 300                   # [s]
+PENALTY_SHOT_DURATION = 60                # [s]
+READY_DURATION = 45                       # time after which READY is followed by SET [s]
+FINISHED_TO_INITIAL_DELAY = 1             # time in FINISHED state at the end of a first half [s]
+INTERRUPTION_DURATION = 30                # secondary_seconds_remaining of a game interruption [s]
+SEND_PERIOD = 500                         # time between two periodic GameState packets [ms]
+DROPBALL = 128                            # kickoff_team after a dropped ball
+INTERRUPTIONS = ['DIRECT_FREEKICK', 'INDIRECT_FREEKICK', 'PENALTYKICK', 'CORNERKICK', 'GOALKICK', 'THROWIN']
+INTERRUPTION_PHASES = {'READY': 1, 'PREPARE': 2}
+
+
+def robot_info():
+    return Container(penalty=0, secs_till_unpenalized=0, number_of_warnings=0, number_of_yellow_cards=0,
+                     number_of_red_cards=0, goalkeeper=False)
+
+
+def team_info(team_number, team_color):
+    return Container(team_number=team_number, team_color=team_color, score=0, penalty_shot=0, single_shots=0,
+                     coach_sequence=0, coach_message='', coach=robot_info(), players=[robot_info() for i in range(11)])
+
+
+class GameController:
+    """Args:
+        game: content of game.json as a dictionary, optional half_time_duration, overtime_duration and
+            penalty_shot_duration are in seconds.
+        players_per_team: number of players of a team.
+    """
+
+    def __init__(self, game, players_per_team):
+        self.half_time_duration = game.get('half_time_duration', HALF_TIME_DURATION)
+        self.overtime_duration = game.get('overtime_duration', OVERTIME_DURATION)
+        self.penalty_shot_duration = game.get('penalty_shot_duration', PENALTY_SHOT_DURATION)
+        self.red_id = int(game['red']['id'])
+        self.blue_id = int(game['blue']['id'])
+        self.side_left = int(game['side_left'])
+        penalty_shootout = game['type'] == 'PENALTY'
+        self.state = Container(packet_number=0, players_per_team=players_per_team, game_type=0,
+                               game_state='STATE_INITIAL', first_half=True, kickoff_team=int(game['kickoff']),
+                               secondary_state='STATE_PENALTYSHOOT' if penalty_shootout else 'STATE_NORMAL',
+                               secondary_state_info=bytes(4), drop_in_team=False, drop_in_time=0,
+                               seconds_remaining=0, secondary_seconds_remaining=0,
+                               teams=[team_info(self.red_id, 'RED'), team_info(self.blue_id, 'BLUE')])
+        self.first_kickoff = self.state.kickoff_team
+        self.set_remaining(self.penalty_shot_duration if penalty_shootout else self.half_time_duration)
+        self.time = None                  # virtual time of the last CLOCK message [ms]
+        self.last_send_time = None        # virtual time of the last GameState packet [ms]
+        self.secondary_remaining = 0      # [ms]
+        self.timeout = None               # (virtual time [ms], game state) of the next automatic transition
+        self.return_state = 'STATE_NORMAL'  # secondary state restored at the end of a game interruption
+
+    def team(self, team_number):
+        for team in self.state.teams:
+            if team.team_number == team_number:
+                return team
+        return None
+
+    def other_team(self, team_number):
+        return self.blue_id if team_number == self.red_id else self.red_id
+
+    def set_remaining(self, seconds):
+        self.remaining = seconds * 1000
+        self.state.seconds_remaining = seconds
+
+    def set_game_state(self, game_state):
+        self.state.game_state = game_state
+        self.timeout = None
+        if self.time is None:
+            return
+        if game_state == 'STATE_READY':
+            self.timeout = (self.time + READY_DURATION * 1000, 'STATE_SET')
+        elif game_state == 'STATE_FINISHED' and self.state.first_half and \
+                self.state.secondary_state in ['STATE_NORMAL', 'STATE_OVERTIME']:
+            self.timeout = (self.time + FINISHED_TO_INITIAL_DELAY * 1000, 'STATE_INITIAL')
+
+    def set_secondary_state(self, secondary_state, team=0, phase=0):
+        self.state.secondary_state = secondary_state
+        self.state.secondary_state_info = bytes([team, phase, 0, 0])
+
+    def end_interruption(self):
+        if self.state.secondary_state[6:] in INTERRUPTIONS:
+            self.set_secondary_state(self.return_state)
+            self.state.secondary_seconds_remaining = 0
+
+    def start_second_half(self):
+        self.state.first_half = False
+        self.state.kickoff_team = self.other_team(self.first_kickoff)
+        self.set_remaining(self.overtime_duration if self.state.secondary_state == 'STATE_OVERTIME'
+                           else self.half_time_duration)
+
+    def clock(self, time):
+        """Advance the virtual time to time [ms]."""
+        if self.time is None:
+            self.time = time
+            self.set_game_state(self.state.game_state)  # start the timeout of the current state
+            return
+        elapsed = max(time - self.time, 0)
+        self.time = time
+        if self.state.game_state == 'STATE_PLAYING':
+            self.remaining -= elapsed
+            self.state.seconds_remaining = max(math.ceil(self.remaining / 1000), -32768)
+            if self.state.secondary_state in ['STATE_' + interruption for interruption in INTERRUPTIONS]:
+                self.secondary_remaining = max(self.secondary_remaining - elapsed, 0)
+                self.state.secondary_seconds_remaining = math.ceil(self.secondary_remaining / 1000)
+        if self.timeout is not None and self.timeout[0] <= time:
+            game_state = self.timeout[1]
+            if game_state == 'STATE_INITIAL':
+                self.start_second_half()
+            self.set_game_state(game_state)
+
+    def need_to_send(self):
+        """Return True if a periodic GameState packet is due."""
+        return self.time is not None and (self.last_send_time is None or
+                                          self.time - self.last_send_time >= SEND_PERIOD)
+
+    def packet(self):
+        """Return the next GameState packet."""
+        self.state.packet_number = (self.state.packet_number + 1) % 256
+        self.last_send_time = self.time
+        return build_game_state(self.state)
+
+    def handle(self, command):
+        """Apply a command of the referee.
+
+        Returns:
+            'OK', 'INVALID' or 'ILLEGAL'.
+        """
+        name, _, argument = command.partition(':')
+        try:
+            if name == 'CLOCK':
+                self.clock(int(argument))
+                return 'OK'
+            if name == 'STATE':
+                return self.handle_state(argument)
+            if name in ['SCORE', 'KICKOFF', 'SIDE_LEFT']:
+                team_number = int(argument)
+                if self.team(team_number) is None:
+                    return 'INVALID'
+                if name == 'SCORE':
+                    return self.score(team_number)
+                if name == 'KICKOFF':
+                    if self.state.game_state != 'STATE_INITIAL':
+                        return 'ILLEGAL'
+                    self.state.kickoff_team = team_number
+                    self.first_kickoff = team_number
+                else:
+                    self.side_left = team_number
+                return 'OK'
+            if command == 'DROPPEDBALL':
+                if self.state.game_state != 'STATE_PLAYING' or self.state.secondary_state == 'STATE_PENALTYSHOOT':
+                    return 'ILLEGAL'
+                self.end_interruption()
+                self.state.kickoff_team = DROPBALL
+                self.set_game_state('STATE_READY')
+                return 'OK'
+            if name in INTERRUPTIONS:
+                return self.interruption(name, argument)
+        except ValueError:
+            pass
+        return 'INVALID'
+
+    def handle_state(self, argument):
+        state = self.state
+        game_state = state.game_state
+        penalty_shootout = state.secondary_state == 'STATE_PENALTYSHOOT'
+        if argument == 'READY':
+            if penalty_shootout or game_state not in ['STATE_INITIAL', 'STATE_READY']:
+                return 'ILLEGAL'
+            self.set_game_state('STATE_READY')
+        elif argument == 'SET':
+            if penalty_shootout:
+                if game_state == 'STATE_FINISHED':  # next penalty shot is taken by the other team
+                    state.kickoff_team = self.other_team(state.kickoff_team)
+                    self.set_remaining(self.penalty_shot_duration)
+                elif game_state not in ['STATE_INITIAL', 'STATE_SET']:
+                    return 'ILLEGAL'
+            elif game_state not in ['STATE_READY', 'STATE_SET']:
+                return 'ILLEGAL'
+            self.set_game_state('STATE_SET')
+        elif argument == 'PLAY':
+            if game_state != 'STATE_SET':
+                return 'ILLEGAL'
+            if penalty_shootout:
+                self.team(state.kickoff_team).penalty_shot += 1
+            self.set_game_state('STATE_PLAYING')
+        elif argument == 'FINISH':
+            if game_state not in ['STATE_READY', 'STATE_SET', 'STATE_PLAYING']:
+                return 'ILLEGAL'
+            self.end_interruption()
+            self.set_game_state('STATE_FINISHED')
+        elif argument in ['OVERTIME-FIRST-HALF', 'PENALTY-SHOOTOUT']:
+            if game_state != 'STATE_FINISHED' or state.first_half or penalty_shootout:
+                return 'ILLEGAL'
+            if argument == 'OVERTIME-FIRST-HALF':
+                if state.secondary_state != 'STATE_NORMAL':
+                    return 'ILLEGAL'
+                self.set_secondary_state('STATE_OVERTIME')
+                self.set_remaining(self.overtime_duration)
+            else:
+                self.set_secondary_state('STATE_PENALTYSHOOT')
+                self.set_remaining(self.penalty_shot_duration)
+            state.first_half = True
+            state.kickoff_team = self.first_kickoff
+            self.set_game_state('STATE_INITIAL')
+        else:
+            return 'INVALID'
+        return 'OK'
+
+    def score(self, team_number):
+        state = self.state
+        if state.game_state != 'STATE_PLAYING':
+            return 'ILLEGAL'
+        team = self.team(team_number)
+        team.score += 1
+        if state.secondary_state == 'STATE_PENALTYSHOOT':
+            if team.penalty_shot > 0:
+                team.single_shots |= 1 << (team.penalty_shot - 1)
+            self.set_game_state('STATE_FINISHED')
+        else:
+            self.end_interruption()
+            state.kickoff_team = self.other_team(team_number)
+            self.set_game_state('STATE_READY')
+        return 'OK'
+
+    def interruption(self, name, argument):
+        state = self.state
+        team_number, _, phase = argument.partition(':')
+        team_number = int(team_number)
+        if self.team(team_number) is None or (phase and phase not in INTERRUPTION_PHASES and
+                                              phase not in ['EXECUTE', 'ABORT']):
+            return 'INVALID'
+        if state.game_state != 'STATE_PLAYING' or state.secondary_state == 'STATE_PENALTYSHOOT':
+            return 'ILLEGAL'
+        current = state.secondary_state[6:] if state.secondary_state_info[0] == team_number else None
+        if phase == '':
+            if state.secondary_state not in ['STATE_NORMAL', 'STATE_OVERTIME']:
+                return 'ILLEGAL'
+            self.return_state = state.secondary_state
+            self.set_secondary_state('STATE_' + name, team_number, 0)
+            self.secondary_remaining = INTERRUPTION_DURATION * 1000
+            state.secondary_seconds_remaining = INTERRUPTION_DURATION
+        elif current != name:
+            return 'ILLEGAL'
+        elif phase in INTERRUPTION_PHASES:
+            self.set_secondary_state(state.secondary_state, team_number, INTERRUPTION_PHASES[phase])
+        else:  # EXECUTE or ABORT
+            self.end_interruption()
+        return 'OK'
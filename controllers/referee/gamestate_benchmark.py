@@ -0,0 +1,120 @@
+# Round-trip check and benchmark of the struct based GameState codec against the construct definition.
+#
+# usage: python gamestate_benchmark.py [packets]
+#
+# Random GameState packets are encoded with construct and decoded with both construct and parse_game_state,
+# every field has to be equal and build_game_state has to give back the same bytes. Both copies of gamestate.py
+# (referee and SAMPLE_TEAM) are checked. Then the time to decode and encode a packet is measured.
+
+import importlib.util
+import random
+import sys
+import time
+from pathlib import Path
+
+from construct import Container
+
+CONTROLLERS_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_gamestate(directory):
+    spec = importlib.util.spec_from_file_location(f'gamestate_{directory}', CONTROLLERS_DIR / directory / 'gamestate.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def random_robot_info(rng):
+    return Container(penalty=rng.randrange(256), secs_till_unpenalized=rng.randrange(256),
+                     number_of_warnings=rng.randrange(256), number_of_yellow_cards=rng.randrange(256),
+                     number_of_red_cards=rng.randrange(256), goalkeeper=rng.random() < 0.5)
+
+
+def random_game_state(module, rng):
+    """Container with random values of all fields of module.GameState, including values out of enums."""
+    def enum_value(construct_struct, name):
+        names = list(getattr(construct_struct.subcon, name).subcon.encmapping)
+        return rng.choice(names) if rng.random() < 0.9 else rng.randrange(200, 256)
+
+    state = Container(packet_number=rng.randrange(256), players_per_team=rng.randrange(256),
+                      game_type=rng.randrange(256), game_state=enum_value(module.GameState, 'game_state'),
+                      first_half=rng.random() < 0.5,
+                      secondary_state=enum_value(module.GameState, 'secondary_state'),
+                      secondary_state_info=bytes(rng.randrange(256) for i in range(4)),
+                      drop_in_team=rng.random() < 0.5, drop_in_time=rng.randrange(65536),
+                      seconds_remaining=rng.randrange(-32768, 32768),
+                      secondary_seconds_remaining=rng.randrange(-32768, 32768), teams=[])
+    state[module.GameStateData._fields[5]] = rng.randrange(256)  # kickoff_team or kick_of_team
+    for i in range(2):
+        message = ''.join(rng.choice('abc xyzé') for i in range(rng.randrange(120)))
+        state.teams.append(Container(team_number=rng.randrange(256), team_color=enum_value(module.TeamInfo, 'team_color'),
+                                     score=rng.randrange(256), penalty_shot=rng.randrange(256),
+                                     single_shots=rng.randrange(65536), coach_sequence=rng.randrange(256),
+                                     coach_message=message, coach=random_robot_info(rng),
+                                     players=[random_robot_info(rng) for i in range(11)]))
+    return state
+
+
+def difference(decoded, reference, path='state'):
+    """Return path of the first field of decoded which is not equal to reference, None if all fields are equal."""
+    if isinstance(reference, list):
+        for i, (item, reference_item) in enumerate(zip(decoded, reference)):
+            result = difference(item, reference_item, f'{path}[{i}]')
+            if result:
+                return result
+        return None if len(decoded) == len(reference) else path
+    if isinstance(reference, Container):
+        for name, value in reference.items():
+            if name in ['header', 'version', '_io']:
+                continue
+            result = difference(getattr(decoded, name), value, f'{path}.{name}')
+            if result:
+                return result
+        return None
+    return None if decoded == reference and type(decoded) is type(reference) else path
+
+
+def check(module, packets, rng):
+    for i in range(packets):
+        data = module.GameState.build(random_game_state(module, rng))
+        decoded = module.parse_game_state(data)
+        result = difference(decoded, module.GameState.parse(data))
+        if result:
+            return f'{result} differs from construct'
+        if module.build_game_state(decoded) != data:
+            return 'build_game_state(parse_game_state(data)) differs from data'
+        if module.build_game_state(module.GameState.parse(data)) != data:
+            return 'build_game_state of construct container differs from data'
+    return None
+
+
+def measure(function, data, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        function(data)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    packets = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(0)
+    for directory in ['referee', 'SAMPLE_TEAM']:
+        module = load_gamestate(directory)
+        result = check(module, packets, rng)
+        print(f'{directory}/gamestate.py: {packets} packets, ' + (f'FAILED: {result}' if result else 'round trip OK'))
+    module = load_gamestate('referee')
+    data = module.GameState.build(random_game_state(module, rng))
+    state = module.GameState.parse(data)
+    repeat = 2000
+    print(f'construct parse:                      {measure(module.GameState.parse, data, repeat):8.1f} us')
+    print(f'parse_game_state:                     {measure(module.parse_game_state, data, repeat):8.1f} us')
+    print(f'parse_game_state with coach messages: '
+          f'{measure(lambda data: [team.coach_message for team in module.parse_game_state(data).teams], data, repeat):8.1f} us')
+    print(f'construct build:                      {measure(module.GameState.build, state, repeat):8.1f} us')
+    print(f'build_game_state of a container:      {measure(module.build_game_state, state, repeat):8.1f} us')
+    print(f'build_game_state of GameStateData:    '
+          f'{measure(module.build_game_state, module.parse_game_state(data), repeat):8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
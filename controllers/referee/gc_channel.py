@@ -0,0 +1,211 @@
+"""Asynchronous TCP channel from the referee to the GameController.
+
+Messages are written with increasing ids, acknowledgments ("<id>:<result>") are
+read by a background thread. The referee only blocks when it waits for the
+acknowledgment of a specific message.
+"""
+
+import socket
+import threading
+import time
+
+from gamestate import ReturnData
+
+
+class GameControllerChannel:
+    """Args:
+        sock: connected TCP socket of the GameController.
+        clock_period_ms: minimal simulated time between two CLOCK messages, CLOCK messages
+            sent more often are dropped.
+    """
+
+    def __init__(self, sock, clock_period_ms=100):
+        self.socket = sock
+        self.socket.setblocking(True)
+        self.clock_period_ms = clock_period_ms
+        self.condition = threading.Condition()
+        self.send_lock = threading.Lock()  # keeps ids in order of sending
+        self.id = 0
+        self.unanswered = {}
+        self.answers = []  # (id, message, result) of acknowledgments which are not OK, id is None for malformed ones
+        self.closed = False
+        self.last_clock = None
+        # statistics
+        self.sent = 0
+        self.clock_sent = 0
+        self.clock_dropped = 0
+        self.wait_time = 0.0
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def send(self, message):
+        """Queue a message and return its id without waiting for the acknowledgment."""
+        with self.send_lock:
+            with self.condition:
+                self.id += 1
+                id = self.id
+                self.unanswered[id] = message
+            self.socket.sendall(f'{id}:{message}\n'.encode('ascii'))
+            self.sent += 1
+        return id
+
+    def send_clock(self, time_count):
+        """Send CLOCK message unless the previous one was sent less than clock_period_ms ago.
+
+        Returns:
+            id of the message or None if the message was dropped.
+        """
+        if self.last_clock is not None and 0 <= time_count - self.last_clock < self.clock_period_ms:
+            self.clock_dropped += 1
+            return None
+        self.last_clock = time_count
+        self.clock_sent += 1
+        return self.send(f'CLOCK:{time_count}')
+
+    def wait(self, id, timeout=None):
+        """Wait for the acknowledgment of the message.
+
+        Returns:
+            True if the message was acknowledged, False on timeout or when the connection is closed.
+        """
+        start = time.time()
+        with self.condition:
+            answered = self.condition.wait_for(lambda: id not in self.unanswered or self.closed, timeout)
+        self.wait_time += time.time() - start
+        return answered and id not in self.unanswered
+
+    def pop_answers(self):
+        """Return acknowledgments which are not OK, received since the previous call."""
+        with self.condition:
+            answers, self.answers = self.answers, []
+        return answers
+
+    def stats(self):
+        return {'sent': self.sent, 'clock_sent': self.clock_sent, 'clock_dropped': self.clock_dropped,
+                'unanswered': len(self.unanswered), 'wait_time': self.wait_time}
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)  # wakes up the reader thread and lets the peer see the end
+        except OSError:
+            pass
+        self.socket.close()
+
+    def _read(self):
+        buffer = b''
+        while True:
+            try:
+                data = self.socket.recv(1024)
+            except OSError:
+                data = b''
+            if not data:
+                with self.condition:
+                    self.closed = True
+                    self.condition.notify_all()
+                return
+            buffer += data
+            lines = buffer.split(b'\n')
+            buffer = lines.pop()
+            with self.condition:
+                for line in lines:
+                    answer = line.decode('ascii')
+                    if answer == '':
+                        continue
+                    try:
+                        id, result = answer.split(':')
+                        id = int(id)
+                    except ValueError:
+                        self.answers.append((None, None, answer))
+                        continue
+                    message = self.unanswered.pop(id, None)
+                    if message is None or result != 'OK':
+                        self.answers.append((id, message, result))
+                self.condition.notify_all()
+
+
+class EmbeddedGameControllerChannel(GameControllerChannel):
+    """Channel to a GameController running in the referee process (see game_controller.py).
+
+    Messages are applied synchronously, so acknowledgments are available as soon as send returns.
+    GameState packets are broadcast on the loopback network after every command changing the state and
+    periodically in simulated time. ReturnData packets of robots are counted.
+
+    Args:
+        controller: game_controller.GameController.
+        game_state_port: UDP port of GameState packets.
+        answer_port: UDP port of ReturnData packets.
+        clock_period_ms: minimal simulated time between two CLOCK messages.
+    """
+
+    BROADCAST_ADDRESS = '127.255.255.255'
+
+    def __init__(self, controller, game_state_port, answer_port, clock_period_ms=100):
+        self.controller = controller
+        self.game_state_port = game_state_port
+        self.clock_period_ms = clock_period_ms
+        self.condition = threading.Condition()
+        self.id = 0
+        self.unanswered = {}
+        self.answers = []
+        self.closed = False
+        self.last_clock = None
+        self.return_data = {}  # (team, player) -> number of ReturnData packets
+        # statistics
+        self.sent = 0
+        self.clock_sent = 0
+        self.clock_dropped = 0
+        self.wait_time = 0.0
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.answer_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.answer_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.answer_socket.bind(('0.0.0.0', answer_port))
+        self.answer_socket.setblocking(False)
+
+    def send(self, message):
+        """Apply the message and return its id."""
+        self.id += 1
+        self.sent += 1
+        state = self.controller.state
+        previous = (state.game_state, state.secondary_state, state.secondary_state_info, state.kickoff_team,
+                    state.first_half)
+        result = self.controller.handle(message)
+        if result != 'OK':
+            self.answers.append((self.id, message, result))
+        is_clock = message[:6] == 'CLOCK:'
+        if not is_clock or self.controller.need_to_send() or \
+                previous != (state.game_state, state.secondary_state, state.secondary_state_info,
+                             state.kickoff_team, state.first_half):
+            self.socket.sendto(self.controller.packet(), (self.BROADCAST_ADDRESS, self.game_state_port))
+        if is_clock:
+            self._read_answers()
+        return self.id
+
+    def wait(self, id, timeout=None):
+        return not self.closed
+
+    def stats(self):
+        stats = super().stats()
+        stats['robots'] = len(self.return_data)
+        return stats
+
+    def close(self):
+        self.closed = True
+        self.socket.close()
+        self.answer_socket.close()
+
+    def _read_answers(self):
+        while True:
+            try:
+                data = self.answer_socket.recv(ReturnData.sizeof())
+            except (BlockingIOError, OSError):
+                return
+            try:
+                answer = ReturnData.parse(data)
+            except Exception:
+                continue
+            key = (answer.team, answer.player)
+            self.return_data[key] = self.return_data.get(key, 0) + 1
@@ -0,0 +1,122 @@
+# Local stand-in for GameControllerSimulator.jar running game_controller.py in a separate process.
+#
+# usage: python gc_standin.py game.json
+#
+# The referee connects to the TCP port game_controller_port (8750 by default) and sends "<id>:<COMMAND>" lines,
+# each of them is acknowledged with "<id>:OK", "<id>:INVALID" or "<id>:ILLEGAL". GameState packets are broadcast
+# on the UDP port game_state_port (3838 by default) of the loopback network after every command changing the
+# state and periodically in the virtual time of CLOCK messages. ReturnData packets sent back by robots to
+# game_controller_answer_port (3939 by default) are counted.
+# The referee can also run the same GameController in its own process with "game_controller": "embedded".
+
+import json
+import select
+import socket
+import sys
+import time
+
+from gamestate import ReturnData
+from game_controller import GameController
+
+GAME_CONTROLLER_PORT = 8750
+GAME_STATE_PORT = 3838
+GAME_CONTROLLER_ANSWER_PORT = 3939
+BROADCAST_ADDRESS = '127.255.255.255'
+
+
+def log(message):
+    if log_file:
+        real_time = int(1000 * (time.time() - log.real_time)) / 1000
+        log_file.write(f'[{real_time:08.3f}] {message}\n')
+        log_file.flush()
+
+
+log_file = None
+log.real_time = time.time()
+
+
+class GameControllerStandIn:
+    def __init__(self, game):
+        self.port = game.get('game_controller_port', GAME_CONTROLLER_PORT)
+        self.game_state_port = game.get('game_state_port', GAME_STATE_PORT)
+        self.answer_port = game.get('game_controller_answer_port', GAME_CONTROLLER_ANSWER_PORT)
+        with open(game['red']['config']) as f:
+            players_per_team = len(json.load(f)['players'])
+        self.controller = GameController(game, players_per_team)
+        self.return_data = {}     # (team, player) -> number of ReturnData packets
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('localhost', self.port))
+        self.server.listen(1)
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.udp.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.answers = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.answers.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.answers.bind(('0.0.0.0', self.answer_port))
+        self.connection = None
+
+    def broadcast(self):
+        self.udp.sendto(self.controller.packet(), (BROADCAST_ADDRESS, self.game_state_port))
+
+    def receive_answer(self):
+        data, peer = self.answers.recvfrom(ReturnData.sizeof())
+        try:
+            answer = ReturnData.parse(data)
+        except Exception:
+            log(f'Malformed ReturnData packet from {peer}')
+            return
+        key = (answer.team, answer.player)
+        if key not in self.return_data:
+            log(f'First ReturnData packet from team {answer.team} player {answer.player}')
+        self.return_data[key] = self.return_data.get(key, 0) + 1
+
+    def receive_commands(self, buffer):
+        try:
+            data = self.connection.recv(1024)
+        except OSError:
+            data = b''
+        if not data:
+            return None
+        buffer += data
+        lines = buffer.split(b'\n')
+        state = self.controller.state
+        for line in lines[:-1]:
+            message = line.decode('ascii').strip()
+            if message == '':
+                continue
+            id, _, command = message.partition(':')
+            previous = (state.game_state, state.secondary_state, state.secondary_state_info, state.kickoff_team,
+                        state.first_half)
+            result = self.controller.handle(command)
+            self.connection.sendall(f'{id}:{result}\n'.encode('ascii'))
+            is_clock = command[:6] == 'CLOCK:'
+            if not is_clock or result != 'OK':
+                log(f'{id}:{command} -> {result}')
+            if not is_clock or self.controller.need_to_send() or \
+                    previous != (state.game_state, state.secondary_state, state.secondary_state_info,
+                                 state.kickoff_team, state.first_half):
+                self.broadcast()
+        return lines[-1]
+
+    def run(self):
+        log(f'Waiting for the referee on port {self.port}')
+        self.connection, peer = self.server.accept()
+        log(f'Referee connected from {peer}, broadcasting GameState on port {self.game_state_port}')
+        buffer = b''
+        while True:
+            readable, _, _ = select.select([self.connection, self.answers], [], [])
+            if self.answers in readable:
+                self.receive_answer()
+            if self.connection in readable:
+                buffer = self.receive_commands(buffer)
+                if buffer is None:
+                    break
+        log(f'Referee disconnected, ReturnData packets received: {self.return_data}')
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1]) as f:
+        game_config = json.load(f)
+    log_file = open('gc_standin_log.txt', 'w')
+    GameControllerStandIn(game_config).run()
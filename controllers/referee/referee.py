@@ -3,6 +3,7 @@
 
 import copy
 import socket
+import signal
 import sys
 import os
 import subprocess
@@ -13,7 +14,12 @@ import traceback
 from types import SimpleNamespace
 from controller import Supervisor, AnsiCodes, Node
 from field import Field
-from gamestate import GameState
+from gamestate import GAME_STATE_SIZE, parse_game_state
+from gc_channel import GameControllerChannel, EmbeddedGameControllerChannel
+from game_controller import GameController
+from contacts import ContactTracker
+from async_log import AsyncLogWriter, LEVELS
+from step_timing import StepTimer
 
 DISABLE_ACTUATORS_MIN_DURATION = 1.0      # The minimal simulated time [s] until enabling actuators again after a reset
 STATUS_PRINT_PERIOD = 20                  # Real time between two status updates in seconds
@@ -44,18 +50,24 @@ supervisor = Supervisor()
 time_step = int(supervisor.getBasicTimeStep())
 time_count = 0
 
-log_file = open('log.txt', 'w')
+log_writer = AsyncLogWriter('log.txt')  # started once game.json is read
+
+def state_wait_time():
+    """Time [s] used to wait before requesting the next game state: simulated time with the embedded
+    GameController which runs in simulated time, real time otherwise."""
+    if game.game_controller == 'embedded':
+        return time_count / 1000
+    return time.time()
 
 def distance2(v1, v2):
     return math.sqrt((v1[0] - v2[0]) ** 2 + (v1[1] - v2[1]) ** 2)
 
-def log(message, msg_type, force_flush=True):
+def log(message, msg_type):
+    """Queue a message for the log file and the console, both are written by the thread of log_writer."""
     try:
         if type(message) is list:
             for m in message:
-                log(m, msg_type, False)
-            if log_file and force_flush:
-                log_file.flush()
+                log(m, msg_type)
             return
         if msg_type == 'Warning':
             console_message = f'{AnsiCodes.YELLOW_FOREGROUND}{AnsiCodes.BOLD}{message}{AnsiCodes.RESET}'
@@ -63,13 +75,7 @@ def log(message, msg_type, force_flush=True):
             console_message = f'{AnsiCodes.RED_FOREGROUND}{AnsiCodes.BOLD}{message}{AnsiCodes.RESET}'
         else:
             console_message = message
-        print(console_message, file=sys.stderr if msg_type == 'Error' else sys.stdout, flush=True)
-        if log_file:
-            #real_time = int(1000 * (time.time() - log.real_time)) / 1000
-            #log_file.write(f'[{real_time:08.3f}|{time_count / 1000:08.3f}] {msg_type}: {message}\n')  # log real and virtual times
-            log_file.write(f'{msg_type}: {message}\n')  # log real and virtual times
-            if force_flush:
-                log_file.flush()    
+        log_writer.write(msg_type, message, console_message, simulated_time=time_count / 1000)
     except Exception:
         pass
     
@@ -135,6 +141,31 @@ game.penalty_shootout = game.type == 'PENALTY'
 
 field_size = getattr(game, 'class').lower()
 game.field = Field(field_size)    
+if not hasattr(game, 'game_controller'):
+    game.game_controller = 'java'  # 'java' for GameControllerSimulator.jar, 'python' for gc_standin.py, 'embedded'
+if game.game_controller not in ['java', 'python', 'embedded']:
+    error(f'Unsupported game_controller: {game.game_controller}.', fatal=True)
+if not hasattr(game, 'game_controller_port'):
+    game.game_controller_port = 8750  # TCP port of the GameController, fixed for GameControllerSimulator.jar
+if not hasattr(game, 'game_state_port'):
+    game.game_state_port = 3838  # UDP port of GameState packets, fixed for GameControllerSimulator.jar
+if not hasattr(game, 'game_controller_answer_port'):
+    game.game_controller_answer_port = 3939  # UDP port of ReturnData packets of robots
+if not hasattr(game, 'log_level'):
+    game.log_level = 'Info'  # messages of a lower level are neither written to log.txt nor printed
+if game.log_level not in LEVELS:
+    error(f'Unsupported log_level: {game.log_level}.', fatal=True)
+if not hasattr(game, 'log_format'):
+    game.log_format = 'text'  # 'text' or 'json' (a JSON object per line)
+if game.log_format not in ['text', 'json']:
+    error(f'Unsupported log_format: {game.log_format}.', fatal=True)
+log_writer.configure(game.log_level, game.log_format == 'json')
+log_writer.start()
+if not hasattr(game, 'step_timing'):
+    game.step_timing = False  # time the stages of the main loop, percentiles are printed with the status
+if not hasattr(game, 'step_timing_trace'):
+    game.step_timing_trace = None  # Chrome trace-event file of the stages written on exit if step_timing is set
+game.step_timer = StepTimer(game.step_timing, game.step_timing_trace)
 
 def flip_pose(pose):
     pose['translation'][0] = -pose['translation'][0]
@@ -168,6 +199,7 @@ def perform_status_update():
     if not hasattr(game, "last_real_time"):
         game.last_real_time = now
         game.last_time_count = time_count
+        game.last_gc_wait_time = 0
     elif now - game.last_real_time > STATUS_PRINT_PERIOD:
         elapsed_real = now - game.last_real_time
         elapsed_simulation = (time_count - game.last_time_count) / 1000
@@ -181,6 +213,21 @@ def perform_status_update():
                 messages.append(f"  sec_state: {game.state.secondary_state} phase: {game.state.secondary_state_info[1]}")
         if game.penalty_shootout:
             messages.append(f"{get_penalty_shootout_msg()}")
+        if game.gc_channel is not None:
+            gc_stats = game.gc_channel.stats()
+            gc_wait_time = gc_stats['wait_time'] - game.last_gc_wait_time
+            game.last_gc_wait_time = gc_stats['wait_time']
+            messages.append(f"GameController: {gc_stats['sent']} messages sent, {gc_stats['clock_dropped']} CLOCK coalesced, "
+                            f"{gc_stats['unanswered']} unanswered, {gc_wait_time:.2f} seconds waiting for answers")
+            if elapsed_real > gc_wait_time:
+                speed_factor_without_gc = elapsed_simulation / (elapsed_real - gc_wait_time)
+                messages.append(f"Speed factor without waiting for GameController: {speed_factor_without_gc:.3f}")
+        if hasattr(game, 'contacts'):
+            contact_stats = game.contacts.stats()
+            messages.append(f"Contacts: {contact_stats['steps']} steps, {contact_stats['mean_us']:.1f} us mean, "
+                            f"{contact_stats['max_us']:.1f} us max, {contact_stats['robots_per_step']:.2f} robots checked per step")
+        if game.step_timer.enabled:
+            messages += [f"Step timing: {line}" for line in game.step_timer.report()]
         messages = [f"STATUS: {m}" for m in messages]
         info(messages)
         game.last_real_time = now
@@ -536,62 +583,50 @@ def game_controller_send(message):
                 else:
                     game.wait_for_sec_phase = 0
             info(f"Waiting for secondary state: {game.wait_for_sec_state}:{game.wait_for_sec_phase}")
-    game_controller_send.id += 1
-    if message[:6] != 'CLOCK:':
-        info(f'Sending {game_controller_send.id}:{message} to GameController.')
-    message = f'{game_controller_send.id}:{message}\n'
-    game.controller.sendall(message.encode('ascii'))
-    #info(f'sending {message.strip()} to GameController')
-    game_controller_send.unanswered[game_controller_send.id] = message.strip()
-    answered = False
-    sent_id = game_controller_send.id
-    while True:
-        try:
-            answers = game.controller.recv(1024).decode('ascii').split('\n')
-            for answer in answers:
-                if answer == '':
-                    continue
-                try:
-                    id, result = answer.split(':')
-                    if int(id) == sent_id:
-                        answered = True
-                except ValueError:
-                    error(f'Cannot split {answer}', fatal=True)
-                try:
-                    answered_message = game_controller_send.unanswered[int(id)]
-                    del game_controller_send.unanswered[int(id)]
-                except KeyError:
-                    error(f'Received acknowledgment message for unknown message: {id}', fatal=True)
-                    continue
-                if result == 'OK':
-                    #info(f'Received correct GameController answer to {answered_message}.') #will spam with clock
-                    continue
-                if result == 'INVALID':
-                    error(f'Received invalid answer from GameController for message {answered_message}.', fatal=True)
-                elif result == 'ILLEGAL':
-                    info_msg = f"Received illegal answer from GameController for message {answered_message}."
-                    if "YELLOW" in message:
-                        warning(info_msg)
-                    else:
-                        error(info_msg, fatal=True)
-                else:
-                    error(f'Received unknown answer from GameController: {answer}.', fatal=True)
-        except BlockingIOError:
-            if answered or ':CLOCK:' in message:
-                break
-            else:  # keep sending CLOCK messages to keep the GameController happy
-                info(f'Waiting for GameController to answer to {message.strip()}.')
-                time.sleep(0.2)
-                game_controller_send.id += 1
-                clock_message = f'{game_controller_send.id}:CLOCK:{time_count}\n'
-                game.controller.sendall(clock_message.encode('ascii'))
-                game_controller_send.unanswered[game_controller_send.id] = clock_message.strip()
+    if game.gc_channel is None:
+        return False
+    if message[:6] == 'CLOCK:':
+        game.gc_channel.send_clock(int(message[6:]))
+    else:
+        sent_id = game.gc_channel.send(message)
+        info(f'Sending {sent_id}:{message} to GameController.')
+        if (message[:6] == 'STATE:' or message[:6] == 'SCORE:' or game.wait_for_state is not None or
+                game.wait_for_sec_state is not None or game.wait_for_sec_phase is not None):
+            # state changing commands and the ones we wait an update for are awaited, other answers are checked later
+            while not game.gc_channel.wait(sent_id, 0.2):
+                if game.gc_channel.closed:
+                    error('Connection to GameController is closed.', fatal=True)
+                    break
+                info(f'Waiting for GameController to answer to {sent_id}:{message}.')
+                game.gc_channel.send(f'CLOCK:{time_count}')  # keep the GameController happy
+    game_controller_check_answers()
     # We are waiting for a specific update from the GC before testing anything else
     while game.wait_for_state is not None or game.wait_for_sec_state is not None or game.wait_for_sec_phase is not None:
         game_controller_receive()
+        game_controller_check_answers()  # an ILLEGAL or INVALID answer means the awaited update never comes
+        if game.gc_channel.closed:
+            error('Connection to GameController is closed.', fatal=True)
+            break
 
     return True     
 
+def game_controller_check_answers():
+    for id, answered_message, result in game.gc_channel.pop_answers():
+        if id is None:
+            error(f'Cannot split {result}', fatal=True)
+        elif answered_message is None:
+            error(f'Received acknowledgment message for unknown message: {id}', fatal=True)
+        elif result == 'INVALID':
+            error(f'Received invalid answer from GameController for message {id}:{answered_message}.', fatal=True)
+        elif result == 'ILLEGAL':
+            info_msg = f"Received illegal answer from GameController for message {id}:{answered_message}."
+            if "YELLOW" in answered_message:
+                warning(info_msg)
+            else:
+                error(info_msg, fatal=True)
+        else:
+            error(f'Received unknown answer from GameController: {id}:{result}.', fatal=True)
+
 def game_controller_receive():
     #All game state times are hardcoded in c:\Egor\Starkitrobots\Robokit\GameController\src\data\hl\HLSim.java 
     data = None
@@ -601,7 +636,7 @@ def game_controller_receive():
         #    game_controller_receive.others.append(ip)
         #    warning(f'Ignoring UDP packets from {ip} not matching GAME_CONTROLLER_UDP_FILTER={game_controller_udp_filter}.')
         try:
-            data, peer = game.udp.recvfrom(GameState.sizeof())
+            data, peer = game.udp.recvfrom(GAME_STATE_SIZE)
             #ip, port = peer
             #if game_controller_udp_filter is None or game_controller_udp_filter == ip:
             #    break
@@ -630,7 +665,11 @@ def game_controller_receive():
         previous_red_score = 0
         previous_blue_score = 0
 
-    game.state = GameState.parse(data)
+    try:
+        game.state = parse_game_state(data)
+    except ValueError as e:
+        warning(f'Ignoring UDP packet: {e}')
+        return
     #info(game.state.teams)
 
     if previous_state != game.state.game_state:
@@ -799,8 +838,10 @@ def set_penalty_positions():
     game.ball_translation.setSFVec3f(game.ball_kick_translation)
 
 def update_team_contacts(team):
+    """Check contacts of robots near the ball, return number of checked robots."""
     #early_game_interruption = is_early_game_interruption()
     color = team['color']
+    robots_checked = 0
     for number in team['players']:
         player = team['players'][number]
         robot = player['robot']
@@ -816,13 +857,16 @@ def update_team_contacts(team):
                 sum[i] += v[i]
         player['velocity'] = [s / l1 for s in sum]
         '''
+        player['position'] = robot.getCenterOfMass()
+        if not game.contacts.is_near_ball(player['position'], game.ball_position):
+            continue
+        robots_checked += 1
         n = robot.getNumberOfContactPoints(True)
         player['contact_points'] = []
         if n == 0:  # robot is asleep
             player['asleep'] = True
             continue
         player['asleep'] = False
-        player['position'] = robot.getCenterOfMass()
         # if less then 3 contact points, the contacts do not include contacts with the ground, so don't update the following
         # value based on ground collisions
         if n >= 3:
@@ -840,33 +884,20 @@ def update_team_contacts(team):
             fallen = True
         for i in range(n):
             point = robot.getContactPoint(i)
+            if point[2] <= game.field.turf_depth:  # contact with the ground
+                continue
             node = robot.getContactPointNode(i)
             if not node:
                 continue
-            name_field = node.getField('name')
-            #member = 'unknown body part'
-            if name_field:
-                name = name_field.getSFString()
-                #if name in player['tagged_solids']:
-                #    member = player['tagged_solids'][name]
-            if point[2] > game.field.turf_depth:  # not a contact with the ground
-                #if not early_game_interruption and point in game.ball.contact_points:  # ball contact
-                if point in game.ball.contact_points:  # ball contact
-                    if game.ball_last_touch_team != color or game.ball_last_touch_player_number != int(number):
-                        set_ball_touched(color, int(number))
-                        info(f'Ball touched by {color} player {number}.')                                   
+            #if not early_game_interruption and point in game.contacts.ball_points:  # ball contact
+            if point in game.contacts.ball_points:  # ball contact
+                if game.ball_last_touch_team != color or game.ball_last_touch_player_number != int(number):
+                    set_ball_touched(color, int(number))
+                    info(f'Ball touched by {color} player {number} ({game.contacts.node_name(node)}).')
+    return robots_checked
 
 def update_ball_contacts():
-    game.ball.contact_points = []
-    contact_points = game.ball.getContactPoints()
-    n = game.ball.getNumberOfContactPoints()
-    for i in range(n):
-        point = game.ball.getContactPoint(i)
-        if point[2] <= game.field.turf_depth:  # contact with the ground
-            continue
-        game.ball.contact_points.append(point)
-        break
-    return len(game.ball.contact_points)
+    return game.contacts.update_ball(game.ball)
 
 red_team = read_team(game.red.config)
 blue_team = read_team(game.blue.config)            
@@ -879,13 +910,14 @@ def is_robot_near(position, min_dist):
     return False    
 
 def update_contacts():
+    start = time.perf_counter()
+    robots_checked = 0
     valid_ball_contacts_number = update_ball_contacts()
     # Check robot contacts only if ball contacts numbers shows that there is some other contact than with ground exist
     if valid_ball_contacts_number > 0:
-        update_team_contacts(red_team)
-        update_team_contacts(blue_team)                   
-
-         
+        robots_checked += update_team_contacts(red_team)
+        robots_checked += update_team_contacts(blue_team)
+    game.contacts.add_step_time(start, robots_checked)
 
 def throw_in(middle_line, negative_x, negative_y):
     possible_restart_points = []
@@ -930,12 +962,46 @@ def need_to_stop_penalty_shootout():
             return True
     return False     
 
+def write_result():
+    """Write final score and speed of the game to the JSON file game.result_file (used by batch_runner.py)"""
+    if not hasattr(game, 'result_file'):
+        return
+    real_time = time.time() - game.start_real_time if hasattr(game, 'start_real_time') else 0
+    result = {'red': {'id': game.red.id, 'name': red_team['name'], 'score': None},
+              'blue': {'id': game.blue.id, 'name': blue_team['name'], 'score': None},
+              'simulated_time': time_count / 1000,
+              'real_time': real_time,
+              'speed_factor': time_count / 1000 / real_time if real_time > 0 else None,
+              'penalty_shootout_count': game.penalty_shootout_count,
+              'game_state': None,
+              'secondary_state': None}
+    if game.state:
+        for team in game.state.teams:
+            result['red' if team.team_color == 'RED' else 'blue']['score'] = team.score
+        result['game_state'] = game.state.game_state
+        result['secondary_state'] = game.state.secondary_state
+    try:
+        with open(game.result_file, 'w') as f:
+            json.dump(result, f, indent=2)
+    except OSError as e:
+        error(f'Failed to write result file {game.result_file}: {e}')
+
+def write_step_timing():
+    """Print the percentiles of the stage durations of the main loop and write the trace file"""
+    if not game.step_timer.enabled:
+        return
+    info([f"Step timing: {line}" for line in game.step_timer.report()])
+    try:
+        game.step_timer.write_trace()
+    except OSError as e:
+        error(f'Failed to write step timing trace {game.step_timing_trace}: {e}')
+
 def clean_exit():
     """Save logs and clean all subprocesses"""
     #announce_final_score()
-    if hasattr(game, "controller") and game.controller:
+    if hasattr(game, "gc_channel") and game.gc_channel:
         info("Closing 'controller' socket")
-        game.controller.close()
+        game.gc_channel.close()
     if hasattr(game, "controller_process") and game.controller_process:
         info("Terminating 'game_controller' process")
         game.controller_process.terminate()
@@ -953,9 +1019,16 @@ def clean_exit():
                 supervisor.step(time_step)
             info("Encoding finished")        
     #game.external_controllers_process.terminate()
-    subprocess.Popen("TASKKILL /F /PID {pid} /T".format(pid=game.external_controllers_process.pid))
-    if log_file:
-        log_file.close()    
+    if sys.platform == 'win32':
+        subprocess.Popen("TASKKILL /F /PID {pid} /T".format(pid=game.external_controllers_process.pid))
+    else:
+        try:  # start_teams.py and team processes share the session of start_teams.py
+            os.killpg(game.external_controllers_process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    write_result()
+    write_step_timing()
+    log_writer.close()
 
     close_webots_on_exit = False
     if hasattr(game, 'close_webots_on_exit'):
@@ -971,8 +1044,6 @@ def clean_exit():
 
 
 
-game_controller_send.id = 0
-game_controller_send.unanswered = {}
 game_controller_send.sent_once = None   
 
 
@@ -1005,12 +1076,20 @@ if 0:
     my_env["QT_QPA_PLATFORM_PLUGIN_PATH"] = "c:\\Qt\\6.0.4\\mingw81_64\\plugins"
     human_referee_process = subprocess.Popen(["python", "c:\\Egor\\Starkitrobots\\Robokit\\HumanReferee\\human_referee.py"], env=my_env) # to launch without console
     #os.startfile('c:\Egor\Starkitrobots\Robokit\HumanReferee\\test.bat') # to launch with console
+elif game.game_controller == 'python':
+    info('Launching Python GameController stand-in')
+    udp_bouncer_process = None
+    game.controller_process = subprocess.Popen([sys.executable, 'gc_standin.py', game_config_file])
+elif game.game_controller == 'embedded':
+    udp_bouncer_process = None
+    game.controller_process = None
 else:
     # launch GameController
-    info('Killing all Java instances')
-    os.system('taskkill /f /im java.exe')
-    os.system('wmic process where \"name like \'%java%\'\" delete')
-    time.sleep(1)
+    if sys.platform == 'win32':
+        info('Killing all Java instances')
+        os.system('taskkill /f /im java.exe')
+        os.system('wmic process where \"name like \'%java%\'\" delete')
+        time.sleep(1)
     info('Launching GameController')
     try:
         JAVA_HOME = os.environ['JAVA_HOME']
@@ -1057,7 +1136,10 @@ else:
         error('JAVA_HOME environment variable not set, unable to launch GameController.', fatal=True)
 
 #launching teams start script
-game.external_controllers_process = subprocess.Popen(['python', 'start_teams.py'], creationflags=subprocess.CREATE_NEW_CONSOLE)
+if sys.platform == 'win32':
+    game.external_controllers_process = subprocess.Popen(['python', 'start_teams.py'], creationflags=subprocess.CREATE_NEW_CONSOLE)
+else:
+    game.external_controllers_process = subprocess.Popen([sys.executable, 'start_teams.py'], start_new_session=True)
 
 game.state = None
 
@@ -1068,6 +1150,7 @@ game.penalty_shootout_time_to_reach_goal_area = [None, None, None, None, None, N
 game.penalty_shootout_time_to_touch_ball = [None, None, None, None, None, None, None, None, None, None]
 game.ball = supervisor.getFromDef('BALL')
 game.ball_radius = 0.04 # For junior league
+game.contacts = ContactTracker(game.field.turf_depth, game.ball_radius)
 game.ball_kick_translation = [0, 0, game.ball_radius + game.field.turf_depth]  # initial position of ball before kick
 game.ball_translation = supervisor.getFromDef('BALL').getField('translation')
 game.ball_exit_translation = None
@@ -1114,41 +1197,53 @@ last_number_of_contact_points_ball = 0
 
 # connecting to GameController
 try:
-    if game.controller_process:
-        info('Connecting to GameControllerSimulator at localhost:8750.')
-        game.controller = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        retry = 0
-        while True:
-            try:
-                game.controller.connect(('localhost', 8750))
-                game.controller.setblocking(False)
-                break
-            except socket.error as msg:
-                retry += 1
-                if retry <= 10:
-                    warning(f'Could not connect to GameController at localhost:8750: {msg}. Retrying ({retry}/10)...')
-                    time.sleep(retry)  # give some time to allow the GameControllerSimulator to start-up
-                    supervisor.step(0)
-                else:
-                    error('Could not connect to GameController at localhost:8750.', fatal=True)
-                    game.controller = None
+    if game.controller_process or game.game_controller == 'embedded':
+        clock_period_ms = game.game_controller_clock_period_ms if hasattr(game, 'game_controller_clock_period_ms') else 100
+        if game.game_controller == 'embedded':
+            info('Using the embedded GameController.')
+            game.controller = None
+            with open(game_config_file) as json_file:
+                embedded_controller = GameController(json.load(json_file), len(red_team['players']))
+            game.gc_channel = EmbeddedGameControllerChannel(embedded_controller, game.game_state_port,
+                                                            game.game_controller_answer_port, clock_period_ms)
+        else:
+            info(f'Connecting to GameControllerSimulator at localhost:{game.game_controller_port}.')
+            game.controller = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            retry = 0
+            while True:
+                try:
+                    game.controller.connect(('localhost', game.game_controller_port))
+                    game.controller.setblocking(False)
                     break
-        info('Connected to GameControllerSimulator at localhost:8750.')
+                except socket.error as msg:
+                    retry += 1
+                    if retry <= 10:
+                        warning(f'Could not connect to GameController at localhost:{game.game_controller_port}: {msg}. '
+                                f'Retrying ({retry}/10)...')
+                        time.sleep(retry)  # give some time to allow the GameControllerSimulator to start-up
+                        supervisor.step(0)
+                    else:
+                        error(f'Could not connect to GameController at localhost:{game.game_controller_port}.', fatal=True)
+                        game.controller = None
+                        break
+            info(f'Connected to GameControllerSimulator at localhost:{game.game_controller_port}.')
+            game.gc_channel = GameControllerChannel(game.controller, clock_period_ms)
         try:
             game.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
             game.udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             if hasattr(game, 'use_bouncing_server') and game.use_bouncing_server:
                 # In case we are using the bouncing server we have to select which interface is used because messages are not
                 # broadcast
-                game.udp.bind((game.host, 3838))
+                game.udp.bind((game.host, game.game_state_port))
             else:
-                game.udp.bind(('0.0.0.0', 3838))
+                game.udp.bind(('0.0.0.0', game.game_state_port))
             game.udp.setblocking(False)
         except Exception:
             error("Failed to set up UDP socket to listen to GC messages")
     else:
         info('GameControllerSimulator process not found')
         game.controller = None
+        game.gc_channel = None
 except Exception:
     error(f"Failed connecting to GameController with the following exception {traceback.format_exc()}", fatal=True)
 
@@ -1196,8 +1291,6 @@ if hasattr(game, 'record_simulation'):
 
 game.over = False
 game.human_referee_disconnected = False
-last_game_controller_send_time = 0
-last_game_controller_send_period_ms = 100
 game.initial_state_processed = False
 game.set_state_processed = False 
 game.finished_state_processed = False   
@@ -1213,14 +1306,22 @@ if hasattr(game, 'limit_speed_to_realtime'):
 
 
 info(f'simulationGetMode={supervisor.simulationGetMode()}')
+game.start_real_time = time.time()
 
 
+step_start = game.step_timer.start()
 while supervisor.step(time_step) != -1 and not game.over:    
+    game.step_timer.stop('webots_step', step_start)
+    loop_start = game.step_timer.start()
+    stage_start = loop_start
     perform_status_update() # To show realtime simulation factor if needed
-    #if time_count - last_game_controller_send_time >= last_game_controller_send_period_ms:
-    game_controller_send(f'CLOCK:{time_count}')
-    #    last_game_controller_send_time = time_count        
+    game.step_timer.stop('status', stage_start)
+    stage_start = game.step_timer.start()
+    game_controller_send(f'CLOCK:{time_count}')  # coalesced to game_controller_clock_period_ms by gc_channel
+    game.step_timer.stop('gc_send', stage_start)
+    stage_start = game.step_timer.start()
     game_controller_receive()  
+    game.step_timer.stop('gc_receive', stage_start)
 
     sec_state = game.state.secondary_state
     sec_phase = game.state.secondary_state_info[1]
@@ -1231,6 +1332,8 @@ while supervisor.step(time_step) != -1 and not game.over:
     blue_score = game.state.teams[blue_index].score  
     game.kickoff = game.state.kickoff_team # [Sol] GC is a master for kickoff decision in Junior league
     game.ball_position = game.ball_translation.getSFVec3f()
+    game_state = game.state.game_state
+    state_start = game.step_timer.start()
 
     # In KidSize league, this controller is autoreferee and acts as "Game state master". It  will advance through game states and send corresponding game state changes to GC
     # In Junior League, this controller is "Game state slave", The GC will switch game states according to it's rules, possibly with human interruption if needed. 
@@ -1242,12 +1345,17 @@ while supervisor.step(time_step) != -1 and not game.over:
             finish_just_sended = True
 
         ball_last_touch_team_old = game.ball_last_touch_team
+        stage_start = game.step_timer.start()
         update_contacts()
+        game.step_timer.stop('update_contacts', stage_start)
 
         if previous_seconds_remaining != game.state.seconds_remaining:
+            stage_start = game.step_timer.start()
             update_state_display()   
+            game.step_timer.stop('display', stage_start)
             previous_seconds_remaining = game.state.seconds_remaining 
             
+        stage_start = game.step_timer.start()
         if  (game.ball_position[1] - game.ball_radius >= game.field.size_y or
                 game.ball_position[1] + game.ball_radius <= -game.field.size_y or
                 game.ball_position[0] - game.ball_radius >= game.field.size_x or
@@ -1324,6 +1432,7 @@ while supervisor.step(time_step) != -1 and not game.over:
                     # Ball left the field during normal/extra time, let's do a throw-in according to the rules
                     middle_line = False if defender_touched_last else True
                     throw_in(middle_line, negative_x, negative_y)
+        game.step_timer.stop('ball_left_field', stage_start)
 
         # Checking for condition: in penalties attacker is not allowed to touch the ball after goalkeeper
         if sec_state == 'STATE_PENALTYSHOOT':   
@@ -1341,10 +1450,10 @@ while supervisor.step(time_step) != -1 and not game.over:
         if game.ready_state_processed == False:
             # below will be checked only once on entering this new game_state            
             game.ready_state_processed = True  
-            game.exit_from_ready_real_time = time.time() + 5         
+            game.exit_from_ready_real_time = state_wait_time() + 5         
         # below will be checked each sim cycle in this game_state          
         if game.exit_from_ready_real_time is not None: 
-            if game.exit_from_ready_real_time <= time.time():
+            if game.exit_from_ready_real_time <= state_wait_time():
                 info('Real-time to wait in ready elasped, moving to SET')
                 game.exit_from_ready_real_time = None
                 game_controller_send('STATE:SET')
@@ -1366,11 +1475,11 @@ while supervisor.step(time_step) != -1 and not game.over:
             if sec_state == 'STATE_PENALTYSHOOT':
                 set_penalty_positions()
                 place_ball(game.ball_kick_translation)    
-            game.playing_real_time = time.time() + REAL_TIME_SET_TO_PLAYING           
+            game.playing_real_time = state_wait_time() + REAL_TIME_SET_TO_PLAYING           
             finish_just_sended = False
         # below will be checked each sim cycle in this game_state
         if game.playing_real_time is not None:
-            if game.playing_real_time <= time.time():
+            if game.playing_real_time <= state_wait_time():
                 info('Real-time to wait elasped, moving to PLAYING')
                 game.playing_real_time = None
                 game_controller_send('STATE:PLAY')
@@ -1433,24 +1542,26 @@ while supervisor.step(time_step) != -1 and not game.over:
                 reset_player('blue', str(number), 'borderStartingPose')     
             move_ball_away()
             finish_just_sended = False
-            game.exit_from_initial_real_time = time.time() + REAL_TIME_BEFORE_FIRST_READY_STATE  # real time for ready state (initial kick-off)
+            game.exit_from_initial_real_time = state_wait_time() + REAL_TIME_BEFORE_FIRST_READY_STATE  # real time for ready state (initial kick-off)
     
         # below will be checked each sim cycle in this game_state
         if sec_state == 'STATE_PENALTYSHOOT':
             # In penalty there is no READY state, we can only do INITIAL->SET
             # And we can do it only once, all other penalty attempts except the first one will oscillate in SET->PLAYING->FINISHED->SET->PLAYING->FINISHED->...
             if game.exit_from_initial_real_time is not None: 
-                if game.exit_from_initial_real_time <= time.time():
+                if game.exit_from_initial_real_time <= state_wait_time():
                     info('Real-time to wait in initial elasped in penalty, moving to SET')
                     game.exit_from_initial_real_time = None
                     game_controller_send('STATE:SET')
         else:
             # In normal/extra is READY state, and we should do INITIAL->READY
             if game.exit_from_initial_real_time is not None: 
-                if game.exit_from_initial_real_time <= time.time():
+                if game.exit_from_initial_real_time <= state_wait_time():
                     info('Real-time to wait in initial elasped in normal/extra, moving to READY')
                     game.exit_from_initial_real_time = None
                     game_controller_send('STATE:READY')
+    if game.step_timer.enabled:
+        game.step_timer.stop(str(game_state).lower(), state_start)
 
     if game.state.game_state != 'STATE_INITIAL':   
         game.initial_state_processed = False
@@ -1462,5 +1573,7 @@ while supervisor.step(time_step) != -1 and not game.over:
         game.finished_state_processed = False              
     
     time_count += time_step
+    game.step_timer.stop('loop', loop_start)
+    step_start = game.step_timer.start()
 
 
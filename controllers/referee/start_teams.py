@@ -7,14 +7,18 @@
 import datetime
 import os
 import subprocess
+import sys
 from pathlib import Path
 import json
 
-# following 3 lines provide minimizing of console in Windows
+# following lines provide minimizing of console in Windows
 # you can comment them if you need console window.
-import win32gui, win32con
-t = win32gui.GetForegroundWindow()
-win32gui.ShowWindow(t, win32con.SW_MINIMIZE)
+if sys.platform == 'win32':
+    import win32gui, win32con
+    t = win32gui.GetForegroundWindow()
+    win32gui.ShowWindow(t, win32con.SW_MINIMIZE)
+
+python = 'python' if sys.platform == 'win32' else sys.executable
 
 with open('game.json', "r") as f:
     game_data = json.loads(f.read())
@@ -43,7 +47,7 @@ filename01 = "output" + f"{port01}"+ ".txt"
 with open(filename01, "w") as f01:
     print(datetime.datetime.now(), file = f01)
     if Path(red_team_data['robotStartCmd']).suffix == '.py':
-        p01 = subprocess.Popen(['python', red_team_controller_filename, port01, str(game_data['red']['id']),
+        p01 = subprocess.Popen([python, red_team_controller_filename, port01, str(game_data['red']['id']),
                               'red', '1', red_team_data['players']['1']['role']], stderr=f01)
     else:
         p01 = subprocess.Popen([red_team_controller_filename, port01, str(game_data['red']['id']), 'red', '1',
@@ -54,7 +58,7 @@ filename02 = "output" + f"{port02}"+ ".txt"
 with open(filename02, "w") as f02:
     print(datetime.datetime.now(), file = f02)
     if Path(red_team_data['robotStartCmd']).suffix == '.py':
-        p02 = subprocess.Popen(['python', red_team_controller_filename, port02, str(game_data['red']['id']),
+        p02 = subprocess.Popen([python, red_team_controller_filename, port02, str(game_data['red']['id']),
                                   'red', '2', red_team_data['players']['2']['role']], stderr=f02)
     else:
         p02 = subprocess.Popen([red_team_controller_filename, port02, str(game_data['red']['id']),
@@ -67,7 +71,7 @@ filename21 = "output" + f"{port21}"+ ".txt"
 with open(filename21, "w") as f21:
     print(datetime.datetime.now(), file = f21)
     if Path(blue_team_data['robotStartCmd']).suffix == '.py':
-        p21 = subprocess.Popen(['python', blue_team_controller_filename, port21 , str(game_data['blue']['id']),
+        p21 = subprocess.Popen([python, blue_team_controller_filename, port21 , str(game_data['blue']['id']),
                                   'blue', '1', blue_team_data['players']['1']['role']],  stderr=f21)
     else:
         p21 = subprocess.Popen([blue_team_controller_filename, port21 , str(game_data['blue']['id']),
@@ -78,7 +82,7 @@ filename22 = "output" + f"{port22}"+ ".txt"
 with open(filename22, "w") as f22:
     print(datetime.datetime.now(), file = f22)
     if Path(blue_team_data['robotStartCmd']).suffix == '.py':
-        p22 = subprocess.Popen(['python', blue_team_controller_filename, port22, str(game_data['blue']['id']),
+        p22 = subprocess.Popen([python, blue_team_controller_filename, port22, str(game_data['blue']['id']),
                                   'blue', '2', blue_team_data['players']['2']['role']], stderr=f22)
     else:
         p22 = subprocess.Popen([blue_team_controller_filename, port22, str(game_data['blue']['id']),
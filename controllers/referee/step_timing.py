@@ -0,0 +1,98 @@
+"""Opt-in timing of the stages of the referee main loop.
+
+Durations are counted in histograms with logarithmic bins allocated once, percentiles are read from the
+bins. Stage intervals can also be kept to be written as a Chrome trace-event file (chrome://tracing or
+https://ui.perfetto.dev).
+"""
+
+import json
+import math
+import time
+
+MIN_DURATION = 1e-7      # upper bound of the first bin [s]
+BINS_PER_DECADE = 20     # bins are 12% wide
+DECADES = 9              # last bin ends at 100 s
+TRACE_MAX_EVENTS = 2000000
+PERCENTILES = [('p50', 0.5), ('p90', 0.9), ('p99', 0.99)]
+
+
+class DurationHistogram:
+    def __init__(self):
+        self.bins = [0] * (BINS_PER_DECADE * DECADES + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration):
+        if duration <= MIN_DURATION:
+            index = 0
+        else:
+            index = min(int(math.log10(duration / MIN_DURATION) * BINS_PER_DECADE) + 1, len(self.bins) - 1)
+        self.bins[index] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def percentile(self, fraction):
+        """Upper bound of the bin of the percentile [s], the maximum if it is in the last bins."""
+        rank = fraction * self.count
+        cumulated = 0
+        for index, count in enumerate(self.bins):
+            cumulated += count
+            if cumulated >= rank and count:
+                return min(MIN_DURATION * 10 ** (index / BINS_PER_DECADE), self.max)
+        return self.max
+
+
+class StepTimer:
+    """Durations of the named stages of the referee loop.
+
+    Args:
+        enabled: if False, start and stop do nothing.
+        trace_file: Chrome trace-event file written by write_trace, None to not keep the stage intervals.
+    """
+
+    def __init__(self, enabled=False, trace_file=None):
+        self.enabled = enabled
+        self.trace_file = trace_file if enabled else None
+        self.histograms = {}
+        self.trace = []  # (stage, start, duration) [s]
+        self.origin = time.perf_counter()
+
+    def start(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def stop(self, stage, start):
+        """Register the duration of stage which started at start (returned by self.start)."""
+        if not self.enabled:
+            return
+        duration = time.perf_counter() - start
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = DurationHistogram()
+        histogram.add(duration)
+        if self.trace_file and len(self.trace) < TRACE_MAX_EVENTS:
+            self.trace.append((stage, start, duration))
+
+    def report(self):
+        """Return a list of lines with count, mean, percentiles and maximum [us] of each stage."""
+        lines = []
+        for stage, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            percentiles = ', '.join(f'{name} {histogram.percentile(fraction) * 1e6:.1f}'
+                                    for name, fraction in PERCENTILES)
+            lines.append(f'{stage}: {histogram.count} times, mean {histogram.total / histogram.count * 1e6:.1f}, '
+                         f'{percentiles}, max {histogram.max * 1e6:.1f} us')
+        return lines
+
+    def write_trace(self):
+        """Write the stage intervals as complete events of the Chrome trace-event format."""
+        if not self.trace_file:
+            return
+        events = [{'name': stage, 'ph': 'X', 'pid': 1, 'tid': 1,
+                   'ts': round((start - self.origin) * 1e6, 1), 'dur': round(duration * 1e6, 1)}
+                  for stage, start, duration in self.trace]
+        with open(self.trace_file, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
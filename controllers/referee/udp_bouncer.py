@@ -12,29 +12,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import socket
-import threading
+# UDP bouncer forwarding GameController packets to all hosts and team messages to the teammates of the sender.
+#
+# usage: python udp_bouncer.py game.json
+#
+# A single thread waits on the listening sockets with selectors, reads the pending packets of a ready socket
+# one after the other and forwards each of them through one persistent send socket to recipients precomputed
+# from game.json.
+# Counters are sent as one JSON line to every TCP connection on localhost:bouncer_status_port (3840 by
+# default), e.g. with "nc localhost 3840".
+
+import collections
 import json
+import selectors
+import socket
 import sys
 import time
 
-try:
-    from queue import SimpleQueue
-except ImportError:
-    # python < 3.7
-    from queue import Queue as SimpleQueue
+from async_log import AsyncLogWriter
 
 
-def log(message):
-    global log_file
-    if log_file:
-        real_time = int(1000 * (time.time() - log.real_time)) / 1000
-        log_file.write(f'[{real_time:08.3f}] {message}\n')
-        log_file.flush()
+def log(message, level='Info', args=()):
+    if log_writer:
+        log_writer.write(level, message, args=args)
 
 
-log_file = open("bouncing_log.txt", "w")
-log.real_time = time.time()
+log_writer = None
 
 # Port we receive messages from the GameController
 UDP_GC_LISTEN_PORT = 3839
@@ -48,108 +51,161 @@ UDP_TEAM_LISTEN_PORT = 3737
 # Port we forward robot messages to
 UDP_TEAM_SEND_PORT = 3737
 
+# Port of the status server
+BOUNCER_STATUS_PORT = 3840
+
 # IP of this UDP server
 SERVER_IP = "0.0.0.0"
 
 # Buffer size
 BUFFER = 1024
 
-# Setting up a Queue to handle incoming packages
-package_queue = SimpleQueue()
-
-# List of registered clients to send the information to
-clients = []
-robots_blue = []
-robots_red = []
-
-
-# Sends a given package to a given IP on the UDP_SEND_PORT
-def send_message_to_client(ip, port, package):
-    send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)  # UDP
-    send_sock.sendto(package, (ip, port))
-
-
-# Main function of the server that handles packages from clients and adds them to a queue
-def receive_input_from_client(port):
-    # Binding the server that listens to incoming UDP packages
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)  # UDP
-    sock.bind((SERVER_IP, port))
-    log(f"Binding receive on {SERVER_IP}:{port}")
-
-    while True:
-        data, addr = sock.recvfrom(BUFFER)
-        package_queue.put([time.time(), addr[0], port, data])
-        time.sleep(0.005)
-
-
-# Function that listens to queue updates and sends the messages out to the individual clients
-def on_queue_update():
-    while True:
-        if not package_queue.empty():
-            current_package = package_queue.get()
-            if current_package[2] == 3839:  # we received a GC update message
-                for client in clients:
-                    client_thread = threading.Thread(target=send_message_to_client, args=[client, UDP_GC_SEND_PORT,
-                                                                                          current_package[3]])
-                    client_thread.start()
-            else:  # we received an update from one of the teams
-                log(current_package)
-                if current_package[1] in robots_blue:
-                    for client in robots_blue:
-                        if client != current_package[1]:
-                            client_thread = threading.Thread(target=send_message_to_client,
-                                                             args=[client, UDP_TEAM_SEND_PORT, current_package[3]])
-                            client_thread.start()
-                elif current_package[1] in robots_red:
-                    for client in robots_red:
-                        if client != current_package[1]:
-                            client_thread = threading.Thread(target=send_message_to_client,
-                                                             args=[client, UDP_TEAM_SEND_PORT, current_package[3]])
-                            client_thread.start()
-                else:
-                    log("We received a message on the team communication port from a robot not registered with one of the"
-                        " teams. This should not happen.")
-        time.sleep(0.005)
-
-
-# Loads all client IP addresses from the game.json config file
-def add_clients_from_config(config):
-    with open(config, 'r') as game_json:
-        config = json.load(game_json)
-        clients.append(config['host'])
-        for blue_robot in config["blue"]["hosts"]:
-            if blue_robot != "127.0.0.1":
-                clients.append(blue_robot)
-                robots_blue.append(blue_robot)
-        for red_robot in config["red"]["hosts"]:
-            if red_robot != "127.0.0.1":
-                clients.append(red_robot)
-                robots_red.append(red_robot)
+# Size of the kernel buffers of the listening sockets, absorbs bursts of packets
+RECEIVE_BUFFER = 1 << 20
+
+# Number of fan-out latencies kept for the percentiles of the status
+LATENCY_SAMPLES = 4096
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class UDPBouncer:
+    """Args:
+        config: content of game.json as a dictionary.
+    """
+
+    def __init__(self, config):
+        # GameController packets go to the referee host and all robots, team messages to the teammates of the sender
+        blue = [host for host in config['blue']['hosts'] if host != '127.0.0.1']
+        red = [host for host in config['red']['hosts'] if host != '127.0.0.1']
+        self.clients = tuple((host, UDP_GC_SEND_PORT) for host in [config['host']] + blue + red)
+        self.teammates = {}  # sender IP -> addresses of its teammates
+        for team in [set(blue), set(red)]:
+            for host in team:
+                self.teammates[host] = tuple((teammate, UDP_TEAM_SEND_PORT) for teammate in team - {host})
+        self.selector = selectors.DefaultSelector()
+        self.send_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.send_socket.setblocking(False)
+        for port, handler in [(UDP_GC_LISTEN_PORT, self.forward_game_controller),
+                              (UDP_TEAM_LISTEN_PORT, self.forward_team)]:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+            sock.bind((SERVER_IP, port))
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, handler)
+            log(f"Binding receive on {SERVER_IP}:{port}")
+        self.status_port = config.get('bouncer_status_port', BOUNCER_STATUS_PORT)
+        status_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        status_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        status_socket.bind(('127.0.0.1', self.status_port))
+        status_socket.listen(4)
+        status_socket.setblocking(False)
+        self.selector.register(status_socket, selectors.EVENT_READ, self.send_status)
+        # counters
+        self.start_time = time.time()
+        self.received = {UDP_GC_LISTEN_PORT: 0, UDP_TEAM_LISTEN_PORT: 0}
+        self.sent = 0
+        self.dropped = 0              # packets which could not be sent to a recipient
+        self.unknown_senders = 0      # team messages from robots not registered with one of the teams
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)  # fan-out durations of the last packets [s]
+        self.last_status = (self.start_time, 0)  # time and number of received packets of the last status
+
+    def fan_out(self, packet, recipients, start):
+        sendto = self.send_socket.sendto
+        for address in recipients:
+            try:
+                sendto(packet, address)
+                self.sent += 1
+            except OSError:  # full send buffer or unreachable host
+                self.dropped += 1
+        self.latencies.append(time.perf_counter() - start)
+
+    def receive_all(self, sock):
+        """Yield (packet, sender IP, reception time) for all the packets waiting on sock."""
+        port = sock.getsockname()[1]
+        recvfrom = sock.recvfrom
+        while True:
+            try:
+                data, address = recvfrom(BUFFER)
+            except (BlockingIOError, InterruptedError):
+                return
+            except ConnectionResetError:  # ICMP port unreachable of a previous send on Windows
+                continue
+            self.received[port] += 1
+            yield data, address[0], time.perf_counter()
+
+    def forward_game_controller(self, sock):
+        for data, sender, start in self.receive_all(sock):
+            self.fan_out(data, self.clients, start)
+
+    def forward_team(self, sock):
+        debug = log_writer is not None and log_writer.enabled('Debug')
+        for data, sender, start in self.receive_all(sock):
+            recipients = self.teammates.get(sender)
+            if recipients is None:
+                self.unknown_senders += 1
+                log(f"We received a message on the team communication port from {sender}, which is not registered "
+                    "with one of the teams. This should not happen.", 'Warning')
+                continue
+            self.fan_out(data, recipients, start)
+            if debug:  # formatted by the thread of log_writer
+                log("Team message from %s: %s", 'Debug', (sender, data))
+
+    def status(self):
+        now = time.time()
+        received = sum(self.received.values())
+        last_time, last_received = self.last_status
+        self.last_status = (now, received)
+        latencies = sorted(self.latencies)
+        return {'uptime': now - self.start_time,
+                'received_game_controller': self.received[UDP_GC_LISTEN_PORT],
+                'received_team': self.received[UDP_TEAM_LISTEN_PORT],
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'unknown_senders': self.unknown_senders,
+                'packets_per_second': (received - last_received) / (now - last_time) if now > last_time else 0.0,
+                'fan_out_us': {name: percentile(latencies, fraction) * 1e6
+                               for name, fraction in [('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0)]}}
+
+    def send_status(self, status_socket):
+        try:
+            connection, peer = status_socket.accept()
+        except BlockingIOError:
+            return
+        try:
+            connection.sendall((json.dumps(self.status()) + '\n').encode('utf-8'))
+        except OSError:
+            pass
+        connection.close()
+
+    def run(self):
+        log("Setup completed")
+        while True:
+            for key, events in self.selector.select():
+                key.data(key.fileobj)
 
 
 def start_bouncing_server(game_config):
     log("Initializing UDP Server")
-
-    add_clients_from_config(game_config)
+    with open(game_config, 'r') as game_json:
+        config = json.load(game_json)
     log("Successfully read in %s" % game_config)
-    log("List of clients registered with the server is %s" % clients)
-    log("Robots in team blue are %s" % robots_blue)
-    log("Robots in team red are %s" % robots_red)
-
-    queue_thread = threading.Thread(target=on_queue_update)
-    queue_thread.start()
-    log("Queue thread started")
-
-    server_thread = threading.Thread(target=receive_input_from_client, args=[UDP_GC_LISTEN_PORT])
-    server_thread.start()
-    log("Server thread for GC port started")
-
-    server_thread = threading.Thread(target=receive_input_from_client, args=[UDP_TEAM_LISTEN_PORT])
-    server_thread.start()
-    log("Server thread for Robot port started")
-
-    log("Setup completed")
+    bouncer = UDPBouncer(config)
+    log("List of clients registered with the server is %s" % [host for host, port in bouncer.clients])
+    log("Teammates of robots are %s" % {host: [teammate for teammate, port in teammates]
+                                        for host, teammates in bouncer.teammates.items()})
+    log(f"Status available on localhost:{bouncer.status_port}")
+    bouncer.run()
 
 
 if __name__ == "__main__":
+    with open(sys.argv[1]) as f:
+        config = json.load(f)
+    log_writer = AsyncLogWriter("bouncing_log.txt", config.get('log_level', 'Info'), config.get('log_format') == 'json',
+                                text_format='[{real_time:08.3f}] {message}')
+    log_writer.start()
     start_bouncing_server(sys.argv[1])